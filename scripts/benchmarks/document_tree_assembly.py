@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Benchmark for assembling a DocumentTree from flat folder/document rows.
+
+Compares the previous quadratic, recursive assembly with build_document_tree
+over synthetic wide and deep trees. Run from the repository root:
+
+    python scripts/benchmarks/document_tree_assembly.py
+"""
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "src"))
+
+from core.infrastructure.repositories.document_tree_repository import build_document_tree
+from core.models.document import Document
+from core.models.document_tree import DocumentTree
+from core.models.entity_status import EntityStatus
+from core.models.folder import Folder
+
+NODE_COUNTS = [1_000, 10_000, 100_000]
+WIDE_FANOUT = 10
+
+# The previous implementation is O(F^2), skip it where it would take minutes
+LEGACY_MAX_NODES = 10_000
+
+NOW = datetime.now(timezone.utc)
+DATA_ROOM_ID = str(uuid.uuid4())
+
+
+def make_folder(name: str, parent_folder_id: str | None) -> Folder:
+    return Folder(
+        id=str(uuid.uuid4()),
+        name=name,
+        data_room_id=DATA_ROOM_ID,
+        parent_folder_id=parent_folder_id,
+        created_at=NOW,
+        updated_at=NOW,
+        status=EntityStatus.ACTIVE,
+        children_folder_ids=[],
+        document_ids=[]
+    )
+
+
+def make_document(name: str) -> Document:
+    return Document(
+        id=str(uuid.uuid4()),
+        name=name,
+        content="",
+        data_room_id=DATA_ROOM_ID,
+        created_at=NOW,
+        updated_at=NOW,
+        status=EntityStatus.ACTIVE
+    )
+
+
+def generate_tree(node_count: int, shape: str) -> tuple[Folder, list[Folder], dict[str, list[Document]]]:
+    """Half of the nodes are folders, each folder holds one document."""
+    folder_count = node_count // 2
+    root = make_folder("Root", None)
+    folders = [root]
+
+    for i in range(1, folder_count):
+        if shape == "wide":
+            parent = folders[(i - 1) // WIDE_FANOUT]
+        else:
+            parent = folders[i - 1]
+        folders.append(make_folder(f"Folder {folder_count - i:06d}", parent.id))
+
+    documents_by_folder = {folder.id: [make_document(f"Document {i:06d}")] for i, folder in enumerate(folders)}
+    return root, folders, documents_by_folder
+
+
+def legacy_build_tree(root_folder: Folder, folders: list[Folder], documents_by_folder: dict[str, list[Document]]) -> DocumentTree:
+    folders_map = {f.id: f for f in folders}
+
+    def build_tree(folder: Folder) -> DocumentTree:
+        child_folders = [f for f in folders_map.values() if f.parent_folder_id == folder.id]
+        folder.children_folder_ids = [f.id for f in child_folders]
+
+        folder_documents = documents_by_folder.get(folder.id, [])
+        folder.document_ids = [d.id for d in folder_documents]
+
+        children = []
+        for child_folder in sorted(child_folders, key=lambda f: f.name):
+            children.append(build_tree(child_folder))
+        for document in sorted(folder_documents, key=lambda d: d.name):
+            children.append(DocumentTree(data=document, children=[]))
+
+        return DocumentTree(data=folder, children=children)
+
+    return build_tree(root_folder)
+
+
+def time_build(build, root: Folder, folders: list[Folder], documents_by_folder: dict[str, list[Document]]) -> str:
+    try:
+        started = time.perf_counter()
+        build(root, folders, documents_by_folder)
+        return f"{(time.perf_counter() - started) * 1000:10.1f} ms"
+    except RecursionError:
+        return f"{'RecursionError':>13}"
+
+
+def main():
+    print(f"{'shape':<6} {'nodes':>8} {'legacy':>13} {'indexed':>13}")
+    for shape in ("wide", "deep"):
+        for node_count in NODE_COUNTS:
+            root, folders, documents_by_folder = generate_tree(node_count, shape)
+
+            legacy = f"{'skipped':>13}"
+            if node_count <= LEGACY_MAX_NODES:
+                legacy = time_build(legacy_build_tree, root, folders, documents_by_folder)
+            indexed = time_build(build_document_tree, root, folders, documents_by_folder)
+
+            print(f"{shape:<6} {node_count:>8} {legacy} {indexed}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Benchmark for encoding list responses, per row.
+
+Compares the validated path (rows to Pydantic models in the repository, then FastAPI's response
+validation and JSONResponse) with JSONRowsResponse encoding the rows directly, for the
+/users/{id}/projects, /projects/{id}/users and /projects/{id}/data-rooms payloads. Run from the
+repository root:
+
+    python scripts/benchmarks/list_response_serialization.py
+"""
+import asyncio
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "src"))
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+from core.models.data_room import DataRoom
+from core.models.project import ProjectUserOut
+from core.models.user import UserAccessibleProjectOut
+from service_host.json_rows_response import JSONRowsResponse
+
+ROW_COUNT = 10_000
+REPEATS = 5
+
+NOW = datetime.now(timezone.utc)
+
+
+def make_accessible_project_row(i: int) -> dict:
+    return {
+        "id": str(uuid.uuid4()), "name": f"Project {i}", "description": f"Description of project {i}",
+        "created_at": NOW, "updated_at": NOW, "status": "active", "role": "editor",
+    }
+
+
+def make_project_user_row(i: int) -> dict:
+    return {
+        "user_id": str(uuid.uuid4()), "user_auth_provider_user_id": f"auth0|{i:010d}",
+        "user_role": "viewer", "user_status": "active",
+    }
+
+
+def make_data_room_row(i: int) -> dict:
+    return {
+        "id": str(uuid.uuid4()), "created_at": NOW, "updated_at": NOW, "status": "active",
+        "name": f"Data room {i}", "source": "original", "root_folder_id": str(uuid.uuid4()),
+        "client_id": None, "client_secret": None,
+    }
+
+
+def encode_validated(model: type, rows: list[dict]) -> bytes:
+    models = [model.model_validate(row) for row in rows]
+    field = create_model_field(name="response", type_=list[model], mode="serialization")
+    content = asyncio.run(serialize_response(field=field, response_content=models, is_coroutine=True))
+    return JSONResponse(content).body
+
+
+def encode_rows(model: type, rows: list[dict]) -> bytes:
+    return JSONRowsResponse(rows).body
+
+
+def time_per_row(encode: Callable[[type, list[dict]], bytes], model: type, rows: list[dict]) -> tuple[float, bytes]:
+    best = float("inf")
+    for _ in range(REPEATS):
+        started = time.perf_counter()
+        body = encode(model, rows)
+        best = min(best, time.perf_counter() - started)
+    return best / len(rows) * 1_000_000, body
+
+
+def main():
+    payloads: list[tuple[str, type, Callable[[int], dict[str, Any]]]] = [
+        ("/users/{id}/projects", UserAccessibleProjectOut, make_accessible_project_row),
+        ("/projects/{id}/users", ProjectUserOut, make_project_user_row),
+        ("/projects/{id}/data-rooms", DataRoom, make_data_room_row),
+    ]
+
+    print(f"{ROW_COUNT} rows, best of {REPEATS}")
+    print(f"{'endpoint':<28} {'validated':>14} {'rows':>14} {'speedup':>8}")
+    for name, model, make_row in payloads:
+        rows = [make_row(i) for i in range(ROW_COUNT)]
+        validated, validated_body = time_per_row(encode_validated, model, rows)
+        direct, direct_body = time_per_row(encode_rows, model, rows)
+        assert validated_body == direct_body, f"{name} responses differ"
+        print(f"{name:<28} {validated:>9.2f} us/row {direct:>9.2f} us/row {validated / direct:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
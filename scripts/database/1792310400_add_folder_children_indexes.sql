@@ -0,0 +1,12 @@
+BEGIN;
+
+-- Serve folder-children pages ordered by (name, id) as index range scans
+CREATE INDEX IF NOT EXISTS idx_folders_parent_folder_id_name_id
+    ON folders (parent_folder_id, name, id)
+    WHERE status = 'active';
+
+CREATE INDEX IF NOT EXISTS idx_documents_folder_id_name_id
+    ON documents (folder_id, name, id)
+    WHERE status = 'active';
+
+COMMIT;
@@ -0,0 +1,80 @@
+BEGIN;
+
+-- Materialized ancestry: ids from the data room root down to the folder itself
+ALTER TABLE folders
+    ADD COLUMN path UUID[];
+
+WITH RECURSIVE folder_paths AS (
+    SELECT id, ARRAY[id] AS path
+    FROM folders
+    WHERE parent_folder_id IS NULL
+
+    UNION ALL
+
+    SELECT f.id, fp.path || f.id
+    FROM folders f
+    JOIN folder_paths fp ON f.parent_folder_id = fp.id
+)
+UPDATE folders
+SET path = fp.path
+FROM folder_paths fp
+WHERE folders.id = fp.id;
+
+ALTER TABLE folders
+    ALTER COLUMN path SET NOT NULL;
+
+-- Serves subtree (path @> ARRAY[id]) and ancestry lookups
+CREATE INDEX idx_folders_path ON folders USING GIN (path);
+
+-- Derive the path from the parent on insert and on moves
+CREATE OR REPLACE FUNCTION set_folder_path()
+RETURNS TRIGGER AS $$
+DECLARE
+    parent_path UUID[];
+BEGIN
+    IF NEW.parent_folder_id IS NULL THEN
+        NEW.path = ARRAY[NEW.id];
+        RETURN NEW;
+    END IF;
+
+    SELECT path INTO parent_path FROM folders WHERE id = NEW.parent_folder_id;
+
+    IF parent_path IS NULL THEN
+        RAISE EXCEPTION 'Parent folder % does not exist', NEW.parent_folder_id
+            USING ERRCODE = 'foreign_key_violation';
+    END IF;
+
+    IF NEW.id = ANY(parent_path) THEN
+        RAISE EXCEPTION 'Folder % cannot be moved into its own subtree', NEW.id
+            USING ERRCODE = 'check_violation';
+    END IF;
+
+    NEW.path = parent_path || NEW.id;
+    RETURN NEW;
+END;
+$$ language 'plpgsql';
+
+-- Re-root every descendant after a folder has moved
+CREATE OR REPLACE FUNCTION update_folder_descendant_paths()
+RETURNS TRIGGER AS $$
+BEGIN
+    UPDATE folders
+    SET path = NEW.path || path[array_length(OLD.path, 1) + 1:]
+    WHERE path @> ARRAY[NEW.id] AND id <> NEW.id;
+    RETURN NULL;
+END;
+$$ language 'plpgsql';
+
+CREATE TRIGGER set_folders_path
+    BEFORE INSERT OR UPDATE OF parent_folder_id ON folders
+    FOR EACH ROW EXECUTE FUNCTION set_folder_path();
+
+CREATE TRIGGER update_folders_descendant_paths
+    AFTER UPDATE OF parent_folder_id ON folders
+    FOR EACH ROW
+    WHEN (OLD.path IS DISTINCT FROM NEW.path)
+    EXECUTE FUNCTION update_folder_descendant_paths();
+
+COMMENT ON COLUMN folders.path IS 'Ids of all ancestors from the root folder down to this folder, inclusive; maintained by triggers';
+
+COMMIT;
@@ -0,0 +1,151 @@
+BEGIN;
+
+-- Monotonic change counters backing ETags on read endpoints
+ALTER TABLE data_rooms
+    ADD COLUMN revision BIGINT NOT NULL DEFAULT 0;
+
+ALTER TABLE projects
+    ADD COLUMN revision BIGINT NOT NULL DEFAULT 0;
+
+-- Any direct update of the row moves its revision forward
+CREATE OR REPLACE FUNCTION bump_revision_column()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF NEW.revision = OLD.revision THEN
+        NEW.revision = OLD.revision + 1;
+    END IF;
+    RETURN NEW;
+END;
+$$ language 'plpgsql';
+
+CREATE TRIGGER bump_data_rooms_revision
+    BEFORE UPDATE ON data_rooms
+    FOR EACH ROW EXECUTE FUNCTION bump_revision_column();
+
+CREATE TRIGGER bump_projects_revision
+    BEFORE UPDATE ON projects
+    FOR EACH ROW EXECUTE FUNCTION bump_revision_column();
+
+-- Folder and document changes bump their data room once per statement, so bulk writes stay cheap
+CREATE OR REPLACE FUNCTION bump_data_room_revision_from_rows()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        UPDATE data_rooms SET revision = revision + 1
+        WHERE id IN (SELECT data_room_id FROM new_rows);
+    ELSIF TG_OP = 'DELETE' THEN
+        UPDATE data_rooms SET revision = revision + 1
+        WHERE id IN (SELECT data_room_id FROM old_rows);
+    ELSE
+        UPDATE data_rooms SET revision = revision + 1
+        WHERE id IN (SELECT data_room_id FROM new_rows UNION SELECT data_room_id FROM old_rows);
+    END IF;
+    RETURN NULL;
+END;
+$$ language 'plpgsql';
+
+CREATE TRIGGER bump_data_room_revision_on_folders_insert
+    AFTER INSERT ON folders
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_data_room_revision_from_rows();
+
+CREATE TRIGGER bump_data_room_revision_on_folders_update
+    AFTER UPDATE ON folders
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_data_room_revision_from_rows();
+
+CREATE TRIGGER bump_data_room_revision_on_folders_delete
+    AFTER DELETE ON folders
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_data_room_revision_from_rows();
+
+CREATE TRIGGER bump_data_room_revision_on_documents_insert
+    AFTER INSERT ON documents
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_data_room_revision_from_rows();
+
+CREATE TRIGGER bump_data_room_revision_on_documents_update
+    AFTER UPDATE ON documents
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_data_room_revision_from_rows();
+
+CREATE TRIGGER bump_data_room_revision_on_documents_delete
+    AFTER DELETE ON documents
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_data_room_revision_from_rows();
+
+-- Membership and data room links bump their project once per statement
+CREATE OR REPLACE FUNCTION bump_project_revision_from_rows()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        UPDATE projects SET revision = revision + 1
+        WHERE id IN (SELECT project_id FROM new_rows);
+    ELSIF TG_OP = 'DELETE' THEN
+        UPDATE projects SET revision = revision + 1
+        WHERE id IN (SELECT project_id FROM old_rows);
+    ELSE
+        UPDATE projects SET revision = revision + 1
+        WHERE id IN (SELECT project_id FROM new_rows UNION SELECT project_id FROM old_rows);
+    END IF;
+    RETURN NULL;
+END;
+$$ language 'plpgsql';
+
+CREATE TRIGGER bump_project_revision_on_user_projects_insert
+    AFTER INSERT ON user_projects
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_project_revision_from_rows();
+
+CREATE TRIGGER bump_project_revision_on_user_projects_update
+    AFTER UPDATE ON user_projects
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_project_revision_from_rows();
+
+CREATE TRIGGER bump_project_revision_on_user_projects_delete
+    AFTER DELETE ON user_projects
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_project_revision_from_rows();
+
+CREATE TRIGGER bump_project_revision_on_project_data_rooms_insert
+    AFTER INSERT ON project_data_rooms
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_project_revision_from_rows();
+
+CREATE TRIGGER bump_project_revision_on_project_data_rooms_update
+    AFTER UPDATE ON project_data_rooms
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_project_revision_from_rows();
+
+CREATE TRIGGER bump_project_revision_on_project_data_rooms_delete
+    AFTER DELETE ON project_data_rooms
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_project_revision_from_rows();
+
+-- Projects embed data room and member details, so edits to those rows bump linked projects
+CREATE OR REPLACE FUNCTION bump_linked_project_revisions()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_TABLE_NAME = 'data_rooms' THEN
+        UPDATE projects SET revision = revision + 1
+        WHERE id IN (SELECT project_id FROM project_data_rooms WHERE data_room_id = NEW.id);
+    ELSE
+        UPDATE projects SET revision = revision + 1
+        WHERE id IN (SELECT project_id FROM user_projects WHERE user_id = NEW.id);
+    END IF;
+    RETURN NULL;
+END;
+$$ language 'plpgsql';
+
+CREATE TRIGGER bump_project_revision_on_data_rooms_update
+    AFTER UPDATE OF name, source, root_folder_id, status, client_id, client_secret ON data_rooms
+    FOR EACH ROW EXECUTE FUNCTION bump_linked_project_revisions();
+
+CREATE TRIGGER bump_project_revision_on_users_update
+    AFTER UPDATE OF auth_provider_user_id, status ON users
+    FOR EACH ROW EXECUTE FUNCTION bump_linked_project_revisions();
+
+COMMENT ON COLUMN data_rooms.revision IS 'Incremented on every change to the data room, its folders or its documents';
+COMMENT ON COLUMN projects.revision IS 'Incremented on every change to the project, its members or its linked data rooms';
+
+COMMIT;
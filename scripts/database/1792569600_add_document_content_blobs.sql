@@ -0,0 +1,18 @@
+BEGIN;
+
+-- New document bodies live in the blob store, addressed by the SHA-256 of their bytes.
+-- `content` is kept for rows written before the blob store existed.
+ALTER TABLE documents
+    ADD COLUMN content_hash CHAR(64),
+    ADD COLUMN content_size BIGINT,
+    ADD COLUMN content_type VARCHAR(255);
+
+ALTER TABLE documents
+    ADD CONSTRAINT chk_document_content_hash
+        CHECK (content_hash IS NULL OR content_hash ~ '^[0-9a-f]{64}$');
+
+-- Find every document sharing a blob, e.g. before deleting it
+CREATE INDEX idx_documents_content_hash ON documents (content_hash)
+    WHERE content_hash IS NOT NULL;
+
+COMMIT;
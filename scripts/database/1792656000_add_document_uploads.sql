@@ -0,0 +1,37 @@
+BEGIN;
+
+-- Resumable uploads: the bytes are staged in the blob store, the row tracks where they are going.
+-- document_id is set once the upload has been completed into a document.
+CREATE TABLE document_uploads (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    name VARCHAR(255) NOT NULL,
+    content_type VARCHAR(255) NOT NULL,
+    size BIGINT,
+    data_room_id UUID NOT NULL,
+    folder_id UUID NOT NULL,
+    document_id UUID,
+
+    -- Held by the request writing or completing the upload, so only one does at a time across workers;
+    -- a lease left behind by a worker that died simply expires
+    lease_id UUID,
+    lease_expires_at TIMESTAMP WITH TIME ZONE,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    status entity_status DEFAULT 'active',
+
+    CONSTRAINT fk_document_upload_data_room
+        FOREIGN KEY (data_room_id) REFERENCES data_rooms(id) ON DELETE CASCADE,
+    CONSTRAINT fk_document_upload_folder
+        FOREIGN KEY (folder_id) REFERENCES folders(id) ON DELETE CASCADE,
+    CONSTRAINT fk_document_upload_document
+        FOREIGN KEY (document_id) REFERENCES documents(id) ON DELETE SET NULL,
+    CONSTRAINT chk_document_upload_size
+        CHECK (size IS NULL OR size >= 0)
+);
+
+CREATE INDEX idx_document_uploads_data_room_id ON document_uploads (data_room_id);
+
+CREATE TRIGGER update_document_uploads_updated_at BEFORE UPDATE ON document_uploads
+    FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
+
+COMMIT;
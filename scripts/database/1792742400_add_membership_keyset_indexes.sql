@@ -0,0 +1,18 @@
+BEGIN;
+
+-- Serve membership pages ordered by (created_at, id) as index range scans
+CREATE INDEX IF NOT EXISTS idx_user_projects_user_id_created_at_id
+    ON user_projects (user_id, created_at, id);
+
+CREATE INDEX IF NOT EXISTS idx_user_projects_project_id_created_at_id
+    ON user_projects (project_id, created_at, id);
+
+CREATE INDEX IF NOT EXISTS idx_project_data_rooms_project_id_created_at_id
+    ON project_data_rooms (project_id, created_at, id);
+
+-- Covered by the leading column of the indexes above
+DROP INDEX IF EXISTS idx_user_projects_user_id;
+DROP INDEX IF EXISTS idx_user_projects_project_id;
+DROP INDEX IF EXISTS idx_project_data_rooms_project_id;
+
+COMMIT;
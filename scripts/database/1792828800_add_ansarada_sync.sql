@@ -0,0 +1,42 @@
+BEGIN;
+
+-- Ansarada data rooms are mirrored into folders and documents by a background sync
+ALTER TABLE data_rooms
+    ADD COLUMN external_id VARCHAR(255);
+
+CREATE UNIQUE INDEX idx_data_rooms_external_id ON data_rooms (source, external_id)
+    WHERE external_id IS NOT NULL;
+
+-- Mirrored rows are matched by their Ansarada id; the hash of their Ansarada fields tells whether they changed
+ALTER TABLE folders
+    ADD COLUMN external_id VARCHAR(255),
+    ADD COLUMN sync_hash CHAR(64);
+
+ALTER TABLE documents
+    ADD COLUMN external_id VARCHAR(255),
+    ADD COLUMN sync_hash CHAR(64);
+
+CREATE UNIQUE INDEX idx_folders_external_id ON folders (data_room_id, external_id)
+    WHERE external_id IS NOT NULL;
+
+CREATE UNIQUE INDEX idx_documents_external_id ON documents (data_room_id, external_id)
+    WHERE external_id IS NOT NULL;
+
+-- Kept apart from data_rooms, so recording a sync does not move the data room revision
+CREATE TABLE data_room_syncs (
+    data_room_id UUID PRIMARY KEY,
+    index_hash CHAR(64) NOT NULL,
+    item_count INTEGER NOT NULL,
+    synced_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
+
+    CONSTRAINT fk_data_room_sync_data_room
+        FOREIGN KEY (data_room_id) REFERENCES data_rooms(id) ON DELETE CASCADE
+);
+
+COMMENT ON COLUMN data_rooms.external_id IS 'Id of the data room in its source, only available for Ansarada sources';
+COMMENT ON COLUMN folders.external_id IS 'Id of the folder in Ansarada, for folders mirrored by the sync';
+COMMENT ON COLUMN documents.external_id IS 'Id of the document in Ansarada, for documents mirrored by the sync';
+COMMENT ON TABLE data_room_syncs IS 'Last successful sync of each Ansarada data room';
+COMMENT ON COLUMN data_room_syncs.index_hash IS 'Hash over the whole index, an unchanged index skips the write';
+
+COMMIT;
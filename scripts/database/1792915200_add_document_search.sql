@@ -0,0 +1,33 @@
+BEGIN;
+
+-- Text of bodies kept in the blob store, for searching and highlighting; `content` still covers older rows
+ALTER TABLE documents
+    ADD COLUMN search_text TEXT;
+
+-- Names weigh more than bodies. Bodies are capped so the vector stays below its 1MB limit.
+-- Adding a stored column rewrites the table, so run this outside of peak hours on large installs.
+ALTER TABLE documents
+    ADD COLUMN search_vector TSVECTOR GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', name), 'A') ||
+        setweight(to_tsvector('english', left(COALESCE(content, search_text, ''), 100000)), 'B')
+    ) STORED;
+
+CREATE INDEX idx_documents_search_vector ON documents USING GIN (search_vector);
+
+-- Substring matches on file names, e.g. "2025-q4" or ".xlsx". The index needs the pg_trgm extension from
+-- contrib; without it name matches still work, by scanning the documents of the data rooms searched.
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm') THEN
+        CREATE EXTENSION IF NOT EXISTS pg_trgm;
+        CREATE INDEX idx_documents_name_trgm ON documents USING GIN (name gin_trgm_ops);
+    ELSE
+        RAISE NOTICE 'pg_trgm is not available, idx_documents_name_trgm was not created';
+    END IF;
+END
+$$;
+
+COMMENT ON COLUMN documents.search_text IS 'Text of text bodies stored in the blob store, truncated; only used for search';
+COMMENT ON COLUMN documents.search_vector IS 'Full-text vector over the name and the body, maintained by Postgres';
+
+COMMIT;
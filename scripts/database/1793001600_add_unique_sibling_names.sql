@@ -0,0 +1,34 @@
+BEGIN;
+
+-- Existing duplicates keep the oldest row's name, the others get the start of their id appended
+WITH duplicate_folders AS (
+    SELECT id, row_number() OVER (PARTITION BY parent_folder_id, name ORDER BY created_at, id) AS position
+    FROM folders
+    WHERE status = 'active' AND parent_folder_id IS NOT NULL
+)
+UPDATE folders f
+SET name = left(f.name, 244) || ' (' || left(f.id::text, 8) || ')'
+FROM duplicate_folders d
+WHERE f.id = d.id AND d.position > 1;
+
+-- Documents keep their extension last
+WITH duplicate_documents AS (
+    SELECT id, row_number() OVER (PARTITION BY folder_id, name ORDER BY created_at, id) AS position
+    FROM documents
+    WHERE status = 'active' AND folder_id IS NOT NULL
+)
+UPDATE documents d
+SET name = regexp_replace(left(d.name, 244), '(\.[^.]*)?$', ' (' || left(d.id::text, 8) || ')\1')
+FROM duplicate_documents dd
+WHERE d.id = dd.id AND dd.position > 1;
+
+-- One active child per name and parent, so a path resolves to a single node with one lookup per segment
+CREATE UNIQUE INDEX idx_folders_parent_folder_id_name
+    ON folders (parent_folder_id, name)
+    WHERE status = 'active';
+
+CREATE UNIQUE INDEX idx_documents_folder_id_name
+    ON documents (folder_id, name)
+    WHERE status = 'active';
+
+COMMIT;
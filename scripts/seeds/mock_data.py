@@ -33,7 +33,7 @@ class AuralisMockData:
             ("Contract Negotiation", "Major contract lifecycle")
         ]
     
-    def api_call(self, method: str, endpoint: str, data: Dict[str, Any] | None = None) -> Dict[str, Any] | None:
+    def api_call(self, method: str, endpoint: str, data: Dict[str, Any] | None = None) -> Any:
         url = f"{self.base_url}{endpoint}"
         
         try:
@@ -133,24 +133,22 @@ class AuralisMockData:
         user_links = 0
         room_links = 0
         
-        # Add the single user to all projects as admin
-        user = self.created_users[0]
+        # Add the users to every project as admins, one batch per project
+        users = [{"user_id": user["id"], "user_role": "admin"} for user in self.created_users]
         for project in self.created_projects:
-            endpoint = f"/projects/{project['id']}/users/{user['id']}"
-            result = self.api_call("POST", endpoint, {"user_role": "admin"})
-            if result:
-                user_links += 1
+            results = self.api_call("POST", f"/projects/{project['id']}/users/batch", {"users": users})
+            if results:
+                user_links += sum(1 for result in results if result["status"] in ("added", "updated", "unchanged"))
         
-        # Link data rooms to projects
+        # Link data rooms to projects, one batch per project
         for project in self.created_projects:
             num_rooms = random.randint(1, min(3, len(self.created_data_rooms)))
             project_rooms = random.sample(self.created_data_rooms, num_rooms)
             
-            for room in project_rooms:
-                endpoint = f"/projects/{project['id']}/data-rooms/{room['id']}"
-                result = self.api_call("POST", endpoint)
-                if result:
-                    room_links += 1
+            data_room_ids = [room["id"] for room in project_rooms]
+            results = self.api_call("POST", f"/projects/{project['id']}/data-rooms/batch", {"data_room_ids": data_room_ids})
+            if results:
+                room_links += sum(1 for result in results if result["status"] in ("added", "unchanged"))
         
         print(f"Linked {user_links} user-project relationships")
         print(f"Linked {room_links} project-data room relationships")
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Stub of the Ansarada GraphQL API, for running the service without Ansarada credentials.
+
+Answers `me.dataRoomUsers` with generated data rooms, and `dataRoomDocumentIndex` with the items recorded
+in a JSON file keyed by Ansarada data room id, both paginated with `first` and `after`, whatever the query
+selects. The recording is read again on every request, so editing it stands in for changes in Ansarada.
+POST /connect/token hands out access tokens for any client credentials. GET /stats reports how many
+requests were served over how many TCP connections, which shows whether the client reuses its
+connections. Run from the repository root:
+
+    python scripts/stubs/ansarada_graphql_stub.py --port 8081 --data-rooms 250
+    ANSARADA_GRAPHQL_URL=http://127.0.0.1:8081/v1/graphql ANSARADA_TOKEN_URL=http://127.0.0.1:8081/connect/token \
+        fastapi dev src/service_host/main.py
+"""
+import argparse
+import asyncio
+import base64
+import json
+from pathlib import Path
+
+from aiohttp import web
+
+DEFAULT_DOCUMENT_INDEX_PATH = Path(__file__).resolve().parent / "fixtures" / "ansarada_document_index.json"
+
+
+def make_app(data_room_count: int, latency_seconds: float, document_index_path: Path) -> web.Application:
+    data_room_users = [
+        {
+            "id": f"dru-{i}",
+            "dataRoom": {"id": f"{i:08d}", "displayName": f"Data room {i}", "status": "Live"},
+        }
+        for i in range(data_room_count)
+    ]
+    stats = {"requests": 0, "connections": set()}
+
+    async def graphql(request: web.Request) -> web.Response:
+        if not request.headers.get("Authorization", "").startswith("Bearer "):
+            return web.json_response({"errors": [{"message": "Unauthorized"}]}, status=401)
+
+        stats["requests"] += 1
+        stats["connections"].add(id(request.transport))
+        if latency_seconds:
+            await asyncio.sleep(latency_seconds)
+
+        body = await request.json()
+        variables = body.get("variables") or {}
+        if "dataRoomDocumentIndex" in body["query"]:
+            document_index = json.loads(document_index_path.read_text())
+            items = document_index.get(variables["dataRoomId"])
+            if items is None:
+                return web.json_response({"data": {"dataRoomDocumentIndex": None}})
+
+            folder_ids = variables.get("folderIds")
+            items = [item for item in items if (item["parentId"] in folder_ids if folder_ids else item["parentId"] is None)]
+            return web.json_response({"data": {"dataRoomDocumentIndex": {"items": _paginate(items, variables)}}})
+
+        return web.json_response({"data": {"me": {"dataRoomUsers": _paginate(data_room_users, variables)}}})
+
+    async def token(request: web.Request) -> web.Response:
+        form = await request.post()
+        if form.get("grant_type") != "client_credentials" or not form.get("client_id"):
+            return web.json_response({"error": "invalid_client"}, status=400)
+        return web.json_response({"access_token": f"stub-{form['client_id']}", "token_type": "Bearer", "expires_in": 3600})
+
+    async def get_stats(request: web.Request) -> web.Response:
+        return web.json_response({"requests": stats["requests"], "connections": len(stats["connections"])})
+
+    app = web.Application()
+    app.router.add_post("/v1/graphql", graphql)
+    app.router.add_post("/connect/token", token)
+    app.router.add_get("/stats", get_stats)
+    return app
+
+
+def _paginate(items: list[dict], variables: dict) -> dict:
+    first = variables.get("first") or 10
+    start = _decode_cursor(variables["after"]) + 1 if variables.get("after") else 0
+    page = items[start:start + first]
+    end = start + len(page) - 1
+
+    return {
+        "nodes": page,
+        "pageInfo": {
+            "hasNextPage": end + 1 < len(items),
+            "endCursor": _encode_cursor(end) if page else None,
+        },
+    }
+
+
+def _encode_cursor(index: int) -> str:
+    return base64.b64encode(str(index).encode()).decode()
+
+
+def _decode_cursor(cursor: str) -> int:
+    return int(base64.b64decode(cursor))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--data-rooms", type=int, default=25)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--document-index", type=Path, default=DEFAULT_DOCUMENT_INDEX_PATH)
+    args = parser.parse_args()
+
+    web.run_app(make_app(args.data_rooms, args.latency_ms / 1000, args.document_index), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
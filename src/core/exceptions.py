@@ -0,0 +1,6 @@
+class InvalidRequestError(Exception):
+    """Raised when a request is well-formed but cannot be served as asked, mapped to HTTP 400."""
+
+
+class ConflictError(Exception):
+    """Raised when a request conflicts with the current state of a resource, mapped to HTTP 409."""
\ No newline at end of file
@@ -1,32 +1,107 @@
-from typing import Any
-from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+import time
+from contextlib import AsyncExitStack, asynccontextmanager
+from functools import partial
+from typing import Any, AsyncIterator
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine, create_async_engine
 from sqlalchemy import text
 
-from core.utils.env import get_required_env
+from core.infrastructure.database.query_metrics import QueryMetrics, estimate_size
+from core.infrastructure.database.replica_pool import ReplicaPool
+from core.infrastructure.database.unit_of_work import UnitOfWork, begin_unit_of_work_async, get_current_unit_of_work, is_replica_read_allowed
+from core.utils.env import get_optional_env, get_required_env
+from core.utils.request_timing import record_phase
 
 class DatabaseClient:
     def __init__(self):
         database_url = get_required_env("DATABASE_URL")        
-        self.engine: AsyncEngine = create_async_engine(
-            database_url,
-            echo=False,
-            future=True,
-            pool_pre_ping=True,
-            pool_size=5,
-            max_overflow=10,
+        self.engine: AsyncEngine = self._create_engine(database_url)
+
+        # Optional comma-separated replicas; reads that tolerate replication lag go there
+        replica_urls = [url.strip() for url in get_optional_env("DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
+        self.replica_pool = ReplicaPool(
+            [self._create_engine(url) for url in replica_urls],
+            cooldown_seconds=float(get_optional_env("DATABASE_REPLICA_COOLDOWN_SECONDS", "30")),
         )
 
-    async def execute_sql_async(self, sql: str, params: dict | None = None) -> list[dict]:
-        async with self.engine.connect() as connection:
-            result = await connection.execute(text(sql), params or {})
+        # None when disabled, so an uninstrumented query pays for a single attribute check
+        self.query_metrics: QueryMetrics | None = None
+        if get_optional_env("DATABASE_METRICS_ENABLED", "true").lower() == "true":
+            slow_query_ms = float(get_optional_env("DATABASE_SLOW_QUERY_MS", "500"))
+            self.query_metrics = QueryMetrics(
+                slow_query_ms / 1000 if slow_query_ms > 0 else None,
+                # Labels by repository method read better but walk the stack on every query
+                label_by_caller=get_optional_env("DATABASE_METRICS_CALLER_LABELS", "false").lower() == "true",
+            )
+
+    @asynccontextmanager
+    async def unit_of_work_async(self, read_only: bool = False, use_replica: bool = True) -> AsyncIterator[UnitOfWork]:
+        """
+        Route every statement executed inside the block through one transaction.
+
+        Read-only units of work run on a replica unless `use_replica` is off, e.g. right after the
+        same client wrote. The caller commits; anything not committed when the block exits is rolled back.
+        """
+        use_replica = read_only and use_replica
+        connect = partial(self._connect_async, use_replica)
+        async with begin_unit_of_work_async(connect, read_only, use_replica) as unit_of_work:
+            yield unit_of_work
+
+    async def execute_sql_async(self, sql: str, params: dict | None = None, read_only: bool = False) -> list[dict]:
+        unit_of_work = get_current_unit_of_work()
+        if unit_of_work is not None:
+            connection = await unit_of_work.get_connection_async()
+            return await self._execute_async(connection, sql, params)
+
+        if read_only:
+            # Single reads need neither BEGIN nor COMMIT
+            async with self._connection_async(read_only=True) as connection:
+                connection = await connection.execution_options(isolation_level="AUTOCOMMIT")
+                return await self._execute_async(connection, sql, params)
+
+        async with self._connection_async() as connection:
+            rows = await self._execute_async(connection, sql, params)
             await connection.commit()
-            try:
-                rows = result.mappings().all()
-            except Exception:
-                rows = []
-            await connection.close()
-            return [dict(row) for row in rows]
+            return rows
     
+    async def stream_sql_async(self, sql: str, params: dict | None = None, batch_size: int = 1000) -> AsyncIterator[dict]:
+        """
+        Yield rows one by one through a server-side cursor, fetching `batch_size` rows per round trip.
+
+        The connection stays checked out until the iterator is exhausted or closed. It is never the
+        unit of work's connection, since the rows are usually consumed after the request has committed.
+        """
+        async for row in self.stream_sql_statements_async([sql], params, batch_size):
+            yield row
+
+    async def stream_sql_statements_async(
+            self,
+            statements: list[str],
+            params: dict | None = None,
+            batch_size: int = 1000
+        ) -> AsyncIterator[dict]:
+        """Like `stream_sql_async`, the rows of each statement in turn, all read from one snapshot."""
+        async with self._connection_async(read_only=True) as connection:
+            connection = await connection.execution_options(isolation_level="REPEATABLE READ", postgresql_readonly=True)
+            for sql in statements:
+                # Timed until the last row, so the consumer's pace counts toward the query's duration
+                query_metrics = self.query_metrics
+                if query_metrics is not None:
+                    statement = query_metrics.get_statement_label(sql)
+                    started_at = time.perf_counter()
+                    row_count = byte_count = 0
+
+                result = await connection.stream(text(sql), params or {}, execution_options={"yield_per": batch_size})
+                async for partition in result.mappings().partitions(batch_size):
+                    for row in partition:
+                        row = dict(row)
+                        if query_metrics is not None:
+                            row_count += 1
+                            byte_count += estimate_size([row])
+                        yield row
+
+                if query_metrics is not None:
+                    query_metrics.record_query(statement, sql, params, time.perf_counter() - started_at, row_count, byte_count)
+
     async def execute_transaction_async(self, commands: list[tuple[str, dict[str, Any] | None]]) -> list[list[dict]]:
         """
         Execute multiple SQL commands in a single transaction.
@@ -37,16 +112,83 @@ class DatabaseClient:
         Returns:
             List of results for each command, where each result is a list of dictionaries
         """
-        async with self.engine.connect() as connection:
+        unit_of_work = get_current_unit_of_work()
+        if unit_of_work is not None:
+            connection = await unit_of_work.get_connection_async()
+            return [await self._execute_async(connection, sql, params) for sql, params in commands]
+
+        async with self._connection_async() as connection:
             async with connection.begin():
-                results = []
-                for sql, params in commands:
-                    result = await connection.execute(text(sql), params or {})
-                    try:
-                        rows = result.mappings().all()
-                        results.append([dict(row) for row in rows])
-                    except Exception:
-                        results.append([])
-            await connection.close()
-            return results
+                return [await self._execute_async(connection, sql, params) for sql, params in commands]
         
+
+    async def copy_records_async(self, copies: list[tuple[str, list[str], list[tuple]]]) -> None:
+        """
+        Bulk insert records with COPY, all tables in a single transaction.
+
+        Args:
+            copies: List of tuples where each tuple contains (table_name, column_names, records),
+                applied in order so later tables can reference rows of earlier ones
+        """
+        unit_of_work = get_current_unit_of_work()
+        async with AsyncExitStack() as stack:
+            if unit_of_work is not None:
+                connection = await unit_of_work.get_connection_async()
+            else:
+                connection = await stack.enter_async_context(self._connection_async())
+
+            raw_connection = await connection.get_raw_connection()
+            driver_connection = raw_connection.driver_connection
+            # A savepoint when running inside a unit of work
+            async with driver_connection.transaction():
+                for table_name, column_names, records in copies:
+                    started_at = time.perf_counter()
+                    await driver_connection.copy_records_to_table(table_name, records=records, columns=column_names)
+                    duration = time.perf_counter() - started_at
+
+                    record_phase("db", duration)
+                    if self.query_metrics is not None:
+                        self.query_metrics.record_query(f"COPY {table_name}", f"COPY {table_name}", None, duration, len(records), 0)
+
+    async def _execute_async(self, connection: AsyncConnection, sql: str, params: dict | None) -> list[dict]:
+        started_at = time.perf_counter()
+        result = await connection.execute(text(sql), params or {})
+        rows = [dict(row) for row in result.mappings().all()] if result.returns_rows else []
+        duration = time.perf_counter() - started_at
+
+        record_phase("db", duration)
+        if self.query_metrics is not None:
+            self.query_metrics.record_query(self.query_metrics.get_statement_label(sql), sql, params, duration, len(rows), estimate_size(rows))
+        return rows
+
+    @asynccontextmanager
+    async def _connection_async(self, read_only: bool = False) -> AsyncIterator[AsyncConnection]:
+        connection = await self._connect_async(read_only)
+        try:
+            yield connection
+        finally:
+            await connection.close()
+
+    async def _connect_async(self, read_only: bool = False) -> AsyncConnection:
+        started_at = time.perf_counter()
+        connection = None
+        if read_only and is_replica_read_allowed():
+            connection = await self.replica_pool.connect_async()
+        if connection is None:
+            connection = await self.engine.connect()
+
+        duration = time.perf_counter() - started_at
+        record_phase("pool", duration)
+        if self.query_metrics is not None:
+            self.query_metrics.record_pool_wait(duration)
+        return connection
+
+    def _create_engine(self, database_url: str) -> AsyncEngine:
+        return create_async_engine(
+            database_url,
+            echo=False,
+            future=True,
+            pool_pre_ping=True,
+            pool_size=5,
+            max_overflow=10,
+        )
@@ -0,0 +1,17 @@
+from asyncpg.exceptions import CheckViolationError, UniqueViolationError
+from sqlalchemy.exc import IntegrityError
+
+
+def get_violated_unique_index(error: Exception) -> str | None:
+    """Name of the unique index `error` violated, None for any other error."""
+    # SQLAlchemy wraps the driver's error, COPY raises it as is
+    if isinstance(error, IntegrityError):
+        error = error.orig.__cause__
+    return error.constraint_name if isinstance(error, UniqueViolationError) else None
+
+
+def is_check_violation(error: Exception) -> bool:
+    """Whether `error` is a failed check, raised by a CHECK constraint or by a trigger."""
+    if isinstance(error, IntegrityError):
+        error = error.orig.__cause__
+    return isinstance(error, CheckViolationError)
@@ -0,0 +1,154 @@
+import logging
+import re
+import sys
+import zlib
+from typing import Any, Iterable
+
+logger = logging.getLogger(__name__)
+
+DURATION_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+WHITESPACE_PATTERN = re.compile(r"\s+")
+
+
+class Histogram:
+    def __init__(self, buckets: tuple[float, ...] = DURATION_BUCKETS):
+        self.buckets = buckets
+        self.bucket_counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.count += 1
+        self.sum += value
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.bucket_counts[index] += 1
+                break
+
+
+class StatementStats:
+    def __init__(self):
+        self.duration = Histogram()
+        self.rows = 0
+        self.bytes = 0
+
+
+class QueryMetrics:
+    """
+    Per-statement latency, row and byte counts, plus connection checkout latency, in Prometheus text format.
+
+    Statements are labelled by the start of their SQL and a checksum of the rest, or with `label_by_caller`
+    by the repository method that issued them, which walks the stack on every query. Queries slower than
+    `slow_query_seconds` are logged with their parameter values redacted.
+    """
+
+    def __init__(self, slow_query_seconds: float | None = None, label_by_caller: bool = False):
+        self.slow_query_seconds = slow_query_seconds
+        self.label_by_caller = label_by_caller
+        self.statements: dict[str, StatementStats] = {}
+        self.pool_wait = Histogram()
+
+    def get_statement_label(self, sql: str) -> str:
+        return get_calling_statement(sql) if self.label_by_caller else get_sql_label(sql)
+
+    def record_query(self, statement: str, sql: str, params: dict | None, duration: float, row_count: int, byte_count: int) -> None:
+        stats = self.statements.get(statement)
+        if stats is None:
+            stats = self.statements[statement] = StatementStats()
+
+        stats.duration.observe(duration)
+        stats.rows += row_count
+        stats.bytes += byte_count
+
+        if self.slow_query_seconds is not None and duration >= self.slow_query_seconds:
+            logger.warning(
+                "Slow query %s took %.1f ms and returned %d rows: %s %s",
+                statement, duration * 1000, row_count, _fingerprint(sql), _redact(params),
+            )
+
+    def record_pool_wait(self, duration: float) -> None:
+        self.pool_wait.observe(duration)
+
+    def render_prometheus(self) -> str:
+        lines = [
+            "# HELP db_query_duration_seconds Time spent executing SQL statements.",
+            "# TYPE db_query_duration_seconds histogram",
+        ]
+        for statement, stats in self.statements.items():
+            lines.extend(_render_histogram("db_query_duration_seconds", stats.duration, f'statement="{_escape(statement)}"'))
+
+        lines.append("# HELP db_query_rows_total Rows returned by SQL statements, or written by COPY.")
+        lines.append("# TYPE db_query_rows_total counter")
+        for statement, stats in self.statements.items():
+            lines.append(f'db_query_rows_total{{statement="{_escape(statement)}"}} {stats.rows}')
+
+        lines.append("# HELP db_query_bytes_total Approximate bytes returned by SQL statements.")
+        lines.append("# TYPE db_query_bytes_total counter")
+        for statement, stats in self.statements.items():
+            lines.append(f'db_query_bytes_total{{statement="{_escape(statement)}"}} {stats.bytes}')
+
+        lines.append("# HELP db_pool_wait_seconds Time spent checking a connection out of the pool.")
+        lines.append("# TYPE db_pool_wait_seconds histogram")
+        lines.extend(_render_histogram("db_pool_wait_seconds", self.pool_wait))
+
+        return "\n".join(lines) + "\n"
+
+
+def get_calling_statement(sql: str) -> str:
+    """Name the first function outside the database package on the stack, e.g. a repository method."""
+    frame = sys._getframe(1)
+    while frame is not None:
+        module_name = frame.f_globals.get("__name__", "")
+        if not module_name.startswith("core.infrastructure.database") and module_name != "contextlib":
+            return frame.f_code.co_qualname
+        frame = frame.f_back
+
+    return _fingerprint(sql)[:120]
+
+
+def get_sql_label(sql: str) -> str:
+    """Name a statement by its first words, the checksum telling apart statements that start alike."""
+    fingerprint = _fingerprint(sql)
+    return f"{fingerprint[:80]} #{zlib.crc32(fingerprint.encode()):08x}"
+
+
+def estimate_size(rows: Iterable[dict]) -> int:
+    size = 0
+    for row in rows:
+        for value in row.values():
+            size += len(value) if isinstance(value, (str, bytes)) else 8
+    return size
+
+
+def _render_histogram(name: str, histogram: Histogram, labels: str = "") -> list[str]:
+    prefix = f"{labels}," if labels else ""
+    lines = []
+    cumulative = 0
+    for bound, count in zip(histogram.buckets, histogram.bucket_counts):
+        cumulative += count
+        lines.append(f'{name}_bucket{{{prefix}le="{bound}"}} {cumulative}')
+    lines.append(f'{name}_bucket{{{prefix}le="+Inf"}} {histogram.count}')
+
+    suffix = f"{{{labels}}}" if labels else ""
+    lines.append(f"{name}_sum{suffix} {histogram.sum}")
+    lines.append(f"{name}_count{suffix} {histogram.count}")
+    return lines
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _fingerprint(sql: str) -> str:
+    return WHITESPACE_PATTERN.sub(" ", sql).strip()
+
+
+def _redact(params: dict | None) -> dict[str, str]:
+    # Types and sizes only; values may be document content or personal data
+    return {name: _describe(value) for name, value in (params or {}).items()}
+
+
+def _describe(value: Any) -> str:
+    if isinstance(value, (str, bytes, list, tuple)):
+        return f"{type(value).__name__}[{len(value)}]"
+    return type(value).__name__
\ No newline at end of file
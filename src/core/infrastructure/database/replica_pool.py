@@ -0,0 +1,42 @@
+import itertools
+import logging
+import time
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+logger = logging.getLogger(__name__)
+
+
+class ReplicaPool:
+    """
+    Read replicas, tried least busy first.
+
+    Busy means connections currently checked out of the replica's pool; ties rotate so idle
+    replicas share the load. A replica that fails to hand out a connection is skipped for
+    `cooldown_seconds` before being tried again.
+    """
+
+    def __init__(self, engines: list[AsyncEngine], cooldown_seconds: float = 30):
+        self.engines = engines
+        self.cooldown_seconds = cooldown_seconds
+        self._unhealthy_until: dict[int, float] = {}
+        self._rotation = itertools.count()
+
+    async def connect_async(self) -> AsyncConnection | None:
+        """Return a connection from a healthy replica, or None when none can serve one."""
+        for engine in self._get_candidates():
+            try:
+                return await engine.connect()
+            except Exception as exc:
+                logger.warning("Replica %s is unavailable, skipping it for %ss: %s", engine.url.host, self.cooldown_seconds, exc)
+                self._unhealthy_until[id(engine)] = time.monotonic() + self.cooldown_seconds
+        return None
+
+    def _get_candidates(self) -> list[AsyncEngine]:
+        now = time.monotonic()
+        healthy = [engine for engine in self.engines if self._unhealthy_until.get(id(engine), 0) <= now]
+        if not healthy:
+            return []
+
+        offset = next(self._rotation) % len(healthy)
+        rotated = healthy[offset:] + healthy[:offset]
+        return sorted(rotated, key=lambda engine: engine.sync_engine.pool.checkedout())
\ No newline at end of file
@@ -0,0 +1,129 @@
+import inspect
+import time
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Awaitable, AsyncIterator, Callable
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from core.utils.request_timing import record_phase
+
+AfterCommitCallback = Callable[[], Awaitable[None] | None]
+
+_current_unit_of_work: ContextVar["UnitOfWork | None"] = ContextVar("current_unit_of_work", default=None)
+
+
+class UnitOfWork:
+    """
+    One connection and one transaction shared by every statement of a request.
+
+    The connection is only checked out by the first statement, so requests served without
+    touching the database never hold one.
+    """
+
+    def __init__(self, connect: Callable[[], Awaitable[AsyncConnection]], read_only: bool = False, use_replica: bool = False):
+        self.connect = connect
+        self.read_only = read_only
+
+        # Also applies to reads made after the unit of work has completed, e.g. while streaming a response
+        self.use_replica = use_replica
+        self.is_completed = False
+        self._connection: AsyncConnection | None = None
+        self._after_commit_callbacks: list[AfterCommitCallback] = []
+
+    async def get_connection_async(self) -> AsyncConnection:
+        if self._connection is None:
+            connection = await self.connect()
+            if self.read_only:
+                # One snapshot for the whole request, e.g. an ETag and the body it describes
+                connection = await connection.execution_options(isolation_level="REPEATABLE READ", postgresql_readonly=True)
+            await connection.begin()
+            self._connection = connection
+        return self._connection
+
+    @property
+    def has_connection(self) -> bool:
+        return self._connection is not None
+
+    def after_commit(self, callback: AfterCommitCallback) -> None:
+        self._after_commit_callbacks.append(callback)
+
+    async def commit_async(self) -> None:
+        """Commit and hand the connection back to the pool; later statements run on their own."""
+        if self.is_completed:
+            return
+
+        self.is_completed = True
+        if self._connection is not None:
+            started_at = time.perf_counter()
+            await self._connection.commit()
+            await self._close_connection_async()
+            record_phase("db", time.perf_counter() - started_at)
+
+        for callback in self._after_commit_callbacks:
+            result = callback()
+            if inspect.isawaitable(result):
+                await result
+
+    async def rollback_async(self) -> None:
+        if self.is_completed:
+            return
+
+        self.is_completed = True
+        if self._connection is not None:
+            await self._connection.rollback()
+            await self._close_connection_async()
+
+    async def _close_connection_async(self) -> None:
+        connection, self._connection = self._connection, None
+        await connection.close()
+
+
+@asynccontextmanager
+async def begin_unit_of_work_async(
+        connect: Callable[[], Awaitable[AsyncConnection]],
+        read_only: bool = False,
+        use_replica: bool = False
+    ) -> AsyncIterator[UnitOfWork]:
+    unit_of_work = UnitOfWork(connect, read_only, use_replica)
+    token = _current_unit_of_work.set(unit_of_work)
+    try:
+        yield unit_of_work
+    finally:
+        _current_unit_of_work.reset(token)
+        await unit_of_work.rollback_async()
+
+
+def get_current_unit_of_work() -> UnitOfWork | None:
+    unit_of_work = _current_unit_of_work.get()
+    return unit_of_work if unit_of_work is not None and not unit_of_work.is_completed else None
+
+
+def has_consistent_snapshot() -> bool:
+    """Whether the statements run from here on all see one snapshot, as in a read-only unit of work."""
+    unit_of_work = get_current_unit_of_work()
+    return unit_of_work is not None and unit_of_work.read_only
+
+
+def is_replica_read_allowed() -> bool:
+    """Whether reads outside of a unit of work may be served by a replica; always outside of a request."""
+    unit_of_work = _current_unit_of_work.get()
+    return unit_of_work is None or unit_of_work.use_replica
+
+
+async def after_commit_async(callback: AfterCommitCallback) -> None:
+    """Run `callback` once the current unit of work commits, or right away outside of one."""
+    unit_of_work = get_current_unit_of_work()
+    if unit_of_work is not None:
+        unit_of_work.after_commit(callback)
+        return
+
+    result = callback()
+    if inspect.isawaitable(result):
+        await result
+
+
+async def commit_unit_of_work_async() -> None:
+    """Commit the current unit of work early, e.g. to avoid holding a connection through a long transfer."""
+    unit_of_work = get_current_unit_of_work()
+    if unit_of_work is not None:
+        await unit_of_work.commit_async()
\ No newline at end of file
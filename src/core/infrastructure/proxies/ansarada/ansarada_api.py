@@ -1,29 +1,151 @@
-from gql import Client, gql
+from typing import Any
+
+import aiohttp
+from gql import Client, GraphQLRequest, gql
+from gql.client import AsyncClientSession
 from gql.transport.aiohttp import AIOHTTPTransport
 
 
+# Parsed once, requests only carry their variables
+DATA_ROOMS_QUERY = gql("""
+    query DataRooms($first: Int!, $after: String) {
+        me {
+            dataRoomUsers(first: $first, after: $after) {
+                nodes {
+                    dataRoom {
+                        id
+                        displayName
+                        status
+                    }
+                }
+                pageInfo {
+                    hasNextPage
+                    endCursor
+                }
+            }
+        }
+    }
+""")
+
+# `id` is not part of the item interface, so it is selected per type
+DOCUMENT_INDEX_ITEMS_QUERY = gql("""
+    query DocumentIndexItems($dataRoomId: ID!, $folderIds: [ID!], $first: Int!, $after: String) {
+        dataRoomDocumentIndex(dataRoomId: $dataRoomId) {
+            items(folderIds: $folderIds, first: $first, after: $after) {
+                nodes {
+                    __typename
+                    name
+                    number
+                    status
+                    parentId
+                    lastModifiedDate
+                    ... on DataRoomFolder {
+                        id
+                        hasChildren
+                    }
+                    ... on DataRoomDocument {
+                        id
+                        file {
+                            extension
+                            size
+                        }
+                    }
+                }
+                pageInfo {
+                    hasNextPage
+                    endCursor
+                }
+            }
+        }
+    }
+""")
+
+
 class AnsaradaApi:
 
     BASE_URL = "https://api.dev1.ansarada.com/v1/graphql"
 
-    async def get_data_rooms_async(self, access_token: str, first: int = 10):
-        transport = AIOHTTPTransport(url=self.BASE_URL, headers={"Authorization": f"Bearer {access_token}"})
-        client = Client(transport=transport, fetch_schema_from_transport=False)
-
-        query = gql(f"""
-            query {{
-                me {{
-                    dataRoomUsers(first: {first}) {{
-                        nodes {{
-                            dataRoom {{
-                                id
-                                displayName
-                                status
-                            }}
-                        }}
-                    }}
-                }}
-            }}
-        """)
-
-        return await client.execute_async(query)
\ No newline at end of file
+    def __init__(
+            self,
+            base_url: str = BASE_URL,
+            token_url: str | None = None,
+            max_connections: int = 100,
+            max_connections_per_host: int = 20,
+            keepalive_seconds: float = 30,
+            timeout_seconds: int = 30
+        ):
+        self.base_url = base_url
+        self.token_url = token_url
+        self.max_connections = max_connections
+        self.max_connections_per_host = max_connections_per_host
+        self.keepalive_seconds = keepalive_seconds
+        self.timeout_seconds = timeout_seconds
+        self._http_session: aiohttp.ClientSession | None = None
+        self._client: Client | None = None
+        self._session: AsyncClientSession | None = None
+
+    async def start_async(self) -> None:
+        """Open the connection pool shared by every request, the access token is sent per request."""
+        connector = aiohttp.TCPConnector(
+            limit=self.max_connections,
+            limit_per_host=self.max_connections_per_host,
+            keepalive_timeout=self.keepalive_seconds,
+        )
+        transport = AIOHTTPTransport(
+            url=self.base_url,
+            timeout=self.timeout_seconds,
+            client_session_args={"connector": connector},
+        )
+        self._client = Client(transport=transport, fetch_schema_from_transport=False)
+        self._session = await self._client.connect_async()
+
+        # Token requests share the pool, which closes with the GraphQL session
+        timeout = aiohttp.ClientTimeout(total=self.timeout_seconds)
+        self._http_session = aiohttp.ClientSession(connector=connector, connector_owner=False, timeout=timeout)
+
+    async def close_async(self) -> None:
+        if self._http_session is not None:
+            await self._http_session.close()
+        if self._client is not None:
+            await self._client.close_async()
+        self._client = None
+        self._session = None
+        self._http_session = None
+
+    async def get_access_token_async(self, client_id: str, client_secret: str) -> tuple[str, int]:
+        """Exchange the client credentials of a data room for an access token and its lifetime in seconds."""
+        if self._http_session is None:
+            raise RuntimeError("AnsaradaApi has not been started.")
+        if self.token_url is None:
+            raise RuntimeError("No Ansarada token URL is configured.")
+
+        data = {"grant_type": "client_credentials", "client_id": client_id, "client_secret": client_secret}
+        async with self._http_session.post(self.token_url, data=data) as response:
+            response.raise_for_status()
+            token = await response.json()
+
+        return token["access_token"], int(token.get("expires_in", 3600))
+
+    async def get_data_rooms_async(self, access_token: str, first: int = 10, after: str | None = None) -> dict[str, Any]:
+        return await self._execute_async(DATA_ROOMS_QUERY, {"first": first, "after": after}, access_token)
+
+    async def get_document_index_items_async(
+            self,
+            access_token: str,
+            data_room_id: str,
+            folder_ids: list[str] | None = None,
+            first: int = 100,
+            after: str | None = None
+        ) -> dict[str, Any]:
+        """Items directly inside `folder_ids`, or at the top of the index when None."""
+        variables = {"dataRoomId": data_room_id, "folderIds": folder_ids, "first": first, "after": after}
+        return await self._execute_async(DOCUMENT_INDEX_ITEMS_QUERY, variables, access_token)
+
+    async def _execute_async(self, query: GraphQLRequest, variables: dict[str, Any], access_token: str) -> dict[str, Any]:
+        if self._session is None:
+            raise RuntimeError("AnsaradaApi has not been started.")
+
+        return await self._session.execute(
+            GraphQLRequest(query, variable_values=variables),
+            extra_args={"headers": {"Authorization": f"Bearer {access_token}"}},
+        )
@@ -0,0 +1,200 @@
+from typing import Any, Iterable
+from sqlalchemy.exc import IntegrityError
+from core.exceptions import ConflictError
+from core.infrastructure.database.database_client import DatabaseClient
+from core.infrastructure.database.errors import get_violated_unique_index
+from core.infrastructure.repositories.document_tree_repository import DOCUMENT_NAME_INDEX, FOLDER_NAME_INDEX
+from core.models.ansarada_sync import AnsaradaIndexItem, AnsaradaSyncState
+
+
+# Sibling names are unique, and the unique indexes are checked row by row within a statement. Mirrored rows
+# about to be rewritten therefore first park under a name of their own, or swapping two names, or handing a name
+# from one row to another, would collide halfway through the upserts.
+RELEASE_FOLDER_NAMES_SQL = '''
+    UPDATE folders f
+    SET name = 'sync-' || f.id
+    FROM unnest(CAST(:external_ids AS text[]), CAST(:sync_hashes AS text[])) AS i(external_id, sync_hash)
+    WHERE f.data_room_id = :data_room_id AND f.external_id = i.external_id
+    AND f.status = 'active' AND f.sync_hash IS DISTINCT FROM i.sync_hash
+'''
+
+RELEASE_DOCUMENT_NAMES_SQL = '''
+    UPDATE documents d
+    SET name = 'sync-' || d.id
+    FROM unnest(CAST(:external_ids AS text[]), CAST(:sync_hashes AS text[])) AS i(external_id, sync_hash)
+    WHERE d.data_room_id = :data_room_id AND d.external_id = i.external_id
+    AND d.status = 'active' AND d.sync_hash IS DISTINCT FROM i.sync_hash
+'''
+
+# Items without a mirrored parent are at the top of the index and go below the root folder
+UPSERT_FOLDERS_SQL = '''
+    INSERT INTO folders (data_room_id, external_id, parent_folder_id, name, status, sync_hash)
+    SELECT CAST(:data_room_id AS uuid), i.external_id, COALESCE(p.id, CAST(:root_folder_id AS uuid)),
+        i.name, CAST(i.status AS entity_status), i.sync_hash
+    FROM unnest(
+        CAST(:external_ids AS text[]), CAST(:parent_external_ids AS text[]), CAST(:names AS text[]),
+        CAST(:statuses AS text[]), CAST(:sync_hashes AS text[])
+    ) AS i(external_id, parent_external_id, name, status, sync_hash)
+    LEFT JOIN folders p ON p.data_room_id = CAST(:data_room_id AS uuid) AND p.external_id = i.parent_external_id
+    ON CONFLICT (data_room_id, external_id) WHERE external_id IS NOT NULL DO UPDATE
+    SET parent_folder_id = EXCLUDED.parent_folder_id, name = EXCLUDED.name,
+        status = EXCLUDED.status, sync_hash = EXCLUDED.sync_hash
+    WHERE folders.sync_hash IS DISTINCT FROM EXCLUDED.sync_hash
+    RETURNING id
+'''
+
+UPSERT_DOCUMENTS_SQL = '''
+    INSERT INTO documents (data_room_id, external_id, folder_id, name, status, sync_hash, content_type, content_size)
+    SELECT CAST(:data_room_id AS uuid), i.external_id, COALESCE(p.id, CAST(:root_folder_id AS uuid)),
+        i.name, CAST(i.status AS entity_status), i.sync_hash, i.content_type, i.content_size
+    FROM unnest(
+        CAST(:external_ids AS text[]), CAST(:parent_external_ids AS text[]), CAST(:names AS text[]),
+        CAST(:statuses AS text[]), CAST(:sync_hashes AS text[]), CAST(:content_types AS text[]),
+        CAST(:content_sizes AS bigint[])
+    ) AS i(external_id, parent_external_id, name, status, sync_hash, content_type, content_size)
+    LEFT JOIN folders p ON p.data_room_id = CAST(:data_room_id AS uuid) AND p.external_id = i.parent_external_id
+    ON CONFLICT (data_room_id, external_id) WHERE external_id IS NOT NULL DO UPDATE
+    SET folder_id = EXCLUDED.folder_id, name = EXCLUDED.name, status = EXCLUDED.status,
+        sync_hash = EXCLUDED.sync_hash, content_type = EXCLUDED.content_type, content_size = EXCLUDED.content_size
+    WHERE documents.sync_hash IS DISTINCT FROM EXCLUDED.sync_hash
+    RETURNING id
+'''
+
+
+class AnsaradaSyncRepository:
+    def __init__(self, db_client: DatabaseClient):
+        self.db_client = db_client
+
+    async def get_syncable_data_room_ids_async(self) -> list[str]:
+        sql = '''
+            SELECT id FROM data_rooms
+            WHERE source = 'ansarada' AND status = 'active'
+            AND external_id IS NOT NULL AND client_id IS NOT NULL AND client_secret IS NOT NULL
+            ORDER BY created_at
+        '''
+        results = await self.db_client.execute_sql_async(sql, read_only=True)
+        return [str(result["id"]) for result in results]
+
+    async def get_sync_state_async(self, data_room_id: str) -> AnsaradaSyncState | None:
+        sql = '''
+            SELECT dr.id, dr.external_id, dr.root_folder_id, dr.client_id, dr.client_secret, s.index_hash
+            FROM data_rooms dr
+            LEFT JOIN data_room_syncs s ON s.data_room_id = dr.id
+            WHERE dr.id = :data_room_id AND dr.source = 'ansarada' AND dr.status = 'active'
+            AND dr.external_id IS NOT NULL AND dr.client_id IS NOT NULL AND dr.client_secret IS NOT NULL
+        '''
+        # From the primary, an index hash lagging on a replica would send the sync after changes already applied
+        results = await self.db_client.execute_sql_async(sql, {"data_room_id": data_room_id}, read_only=False)
+        if not results:
+            return None
+
+        result = results[0]
+        return AnsaradaSyncState(
+            data_room_id=str(result["id"]),
+            external_id=result["external_id"],
+            root_folder_id=str(result["root_folder_id"]),
+            client_id=result["client_id"],
+            client_secret=result["client_secret"],
+            index_hash=result["index_hash"],
+        )
+
+    async def apply_sync_async(
+            self,
+            state: AnsaradaSyncState,
+            folder_levels: list[list[AnsaradaIndexItem]],
+            documents: list[AnsaradaIndexItem],
+            index_hash: str
+        ) -> tuple[int, int] | None:
+        """
+        Mirror a whole index in one transaction, returning how many rows changed and how many were deleted.
+        None if another worker is applying a sync of the same data room meanwhile.
+
+        `folder_levels` lists the folders level by level from the top of the index, so each parent is in place
+        before its children. Rows whose sync hash is unchanged are not written, and neither is anything
+        mirrored that is missing from the index.
+        """
+        params = {"data_room_id": state.data_room_id, "root_folder_id": state.root_folder_id}
+
+        # Deletes first, so names freed by removed items can be taken by the upserts. Documents before
+        # folders, since deleting a folder also takes whatever is still inside it.
+        commands: list[tuple[str, dict[str, Any] | None]] = [
+            ('''
+                DELETE FROM documents
+                WHERE data_room_id = :data_room_id AND external_id IS NOT NULL
+                AND NOT (external_id = ANY(CAST(:external_ids AS text[])))
+                RETURNING id
+            ''', {"data_room_id": state.data_room_id, "external_ids": [document.external_id for document in documents]}),
+            ('''
+                DELETE FROM folders
+                WHERE data_room_id = :data_room_id AND external_id IS NOT NULL
+                AND NOT (external_id = ANY(CAST(:external_ids AS text[])))
+                RETURNING id
+            ''', {"data_room_id": state.data_room_id, "external_ids": [folder.external_id for folders in folder_levels for folder in folders]}),
+            (RELEASE_FOLDER_NAMES_SQL, {"data_room_id": state.data_room_id, **_to_hash_arrays(folder for folders in folder_levels for folder in folders)}),
+            (RELEASE_DOCUMENT_NAMES_SQL, {"data_room_id": state.data_room_id, **_to_hash_arrays(documents)}),
+        ]
+
+        for folders in folder_levels:
+            commands.append((UPSERT_FOLDERS_SQL, {**params, **_to_item_arrays(folders)}))
+
+        commands.append((UPSERT_DOCUMENTS_SQL, {
+            **params,
+            **_to_item_arrays(documents),
+            "content_types": [document.content_type for document in documents],
+            "content_sizes": [document.content_size for document in documents],
+        }))
+
+        commands.append(('''
+            INSERT INTO data_room_syncs (data_room_id, index_hash, item_count)
+            VALUES (:data_room_id, :index_hash, :item_count)
+            ON CONFLICT (data_room_id) DO UPDATE
+            SET index_hash = EXCLUDED.index_hash, item_count = EXCLUDED.item_count, synced_at = NOW()
+        ''', {
+            "data_room_id": state.data_room_id,
+            "index_hash": index_hash,
+            "item_count": sum(len(folders) for folders in folder_levels) + len(documents),
+        }))
+
+        async with self.db_client.unit_of_work_async() as unit_of_work:
+            # Every worker runs the periodic sync, but only one writes a data room at a time
+            locked = await self.db_client.execute_sql_async(
+                "SELECT pg_try_advisory_xact_lock(hashtext(:data_room_id)) AS locked",
+                {"data_room_id": state.data_room_id}
+            )
+            if not locked[0]["locked"]:
+                return None
+
+            try:
+                results = await self.db_client.execute_transaction_async(commands)
+            except IntegrityError as e:
+                # Names among the mirrored rows are unique, so the clash is with a row created in the data room
+                if get_violated_unique_index(e) in (FOLDER_NAME_INDEX, DOCUMENT_NAME_INDEX):
+                    raise ConflictError("An Ansarada item has the name of a folder or document added to the data room outside of the sync.")
+                raise
+            await unit_of_work.commit_async()
+
+        deleted_count = len(results[0]) + len(results[1])
+        changed_count = sum(len(result) for result in results[4:-1])
+        return changed_count, deleted_count
+
+    async def record_unchanged_sync_async(self, data_room_id: str) -> None:
+        sql = "UPDATE data_room_syncs SET synced_at = NOW() WHERE data_room_id = :data_room_id"
+        await self.db_client.execute_sql_async(sql, {"data_room_id": data_room_id})
+
+
+def _to_hash_arrays(items: Iterable[AnsaradaIndexItem]) -> dict[str, list]:
+    external_ids, sync_hashes = [], []
+    for item in items:
+        external_ids.append(item.external_id)
+        sync_hashes.append(item.sync_hash)
+    return {"external_ids": external_ids, "sync_hashes": sync_hashes}
+
+
+def _to_item_arrays(items: list[AnsaradaIndexItem]) -> dict[str, list]:
+    return {
+        "external_ids": [item.external_id for item in items],
+        "parent_external_ids": [item.parent_external_id for item in items],
+        "names": [item.name for item in items],
+        "statuses": [item.status.value for item in items],
+        "sync_hashes": [item.sync_hash for item in items],
+    }
@@ -0,0 +1,87 @@
+import asyncio
+import contextvars
+from typing import Awaitable, Callable, Generic, Hashable, TypeVar
+
+from core.infrastructure.database.unit_of_work import get_current_unit_of_work, is_replica_read_allowed
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class DataLoader(Generic[K, V]):
+    """
+    Coalesce lookups by key across concurrent requests.
+
+    Keys requested within one event-loop tick are resolved by a single `batch_load` call, and a key that
+    is already being loaded joins that load instead of starting another, so callers may share the returned
+    value and must not modify it. Nothing is cached once a load completes. Batches run outside of any
+    request's unit of work on a connection of their own; callers that must see their own writes, or that
+    already hold a connection, load on their own.
+    """
+
+    def __init__(self, batch_load: Callable[[list[K]], Awaitable[dict[K, V]]], max_batch_size: int = 500):
+        self.batch_load = batch_load
+        self.max_batch_size = max_batch_size
+        self._queued: dict[K, asyncio.Future[V | None]] = {}
+        self._loading: dict[K, asyncio.Future[V | None]] = {}
+        self._dispatch_scheduled = False
+        self._tasks: set[asyncio.Task] = set()
+
+    async def load_async(self, key: K) -> V | None:
+        if not _can_share_reads():
+            return (await self.batch_load([key])).get(key)
+
+        future = self._loading.get(key) or self._queued.get(key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            self._queued[key] = future
+
+            if len(self._queued) >= self.max_batch_size:
+                self._dispatch()
+            elif not self._dispatch_scheduled:
+                self._dispatch_scheduled = True
+                loop.call_soon(self._dispatch)
+
+        # One caller giving up must not cancel the load for the others
+        return await asyncio.shield(future)
+
+    def _dispatch(self) -> None:
+        self._dispatch_scheduled = False
+        if not self._queued:
+            return
+
+        batch, self._queued = self._queued, {}
+        self._loading.update(batch)
+
+        # A fresh context, since the batch serves several requests and must not join the unit of work of any
+        task = asyncio.get_running_loop().create_task(self._load_batch_async(batch), context=contextvars.Context())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _load_batch_async(self, batch: dict[K, asyncio.Future[V | None]]) -> None:
+        try:
+            values = await self.batch_load(list(batch))
+        except Exception as e:
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(e)
+        else:
+            for key, future in batch.items():
+                if not future.done():
+                    future.set_result(values.get(key))
+        finally:
+            for key, future in batch.items():
+                if self._loading.get(key) is future:
+                    del self._loading[key]
+
+
+def _can_share_reads() -> bool:
+    unit_of_work = get_current_unit_of_work()
+    if unit_of_work is not None and (not unit_of_work.read_only or unit_of_work.has_connection):
+        # Writes of the request may not be visible to a shared load yet. And a request holding a
+        # connection must not wait for a batch that needs another, or a burst could exhaust the pool.
+        return False
+
+    # Also false for clients that wrote recently, see UnitOfWorkMiddleware
+    return is_replica_read_allowed()
@@ -1,64 +1,79 @@
-from typing import Any
+from sqlalchemy.exc import IntegrityError
+from core.exceptions import ConflictError
 from core.infrastructure.database.database_client import DatabaseClient
+from core.infrastructure.database.errors import get_violated_unique_index
+from core.infrastructure.database.unit_of_work import has_consistent_snapshot
+from core.infrastructure.repositories.data_loader import DataLoader
 from core.models.data_room import DataRoom, DataRoomIn
 from core.models.entity_status import EntityStatus
+from core.utils.ids import normalize_uuid
 
 class DataRoomRepository:
     def __init__(self, database_client: DatabaseClient):
         self.db = database_client
+        self.data_room_loader: DataLoader[str, DataRoom] = DataLoader(self._load_data_rooms_async)
+        self.revision_loader: DataLoader[str, int] = DataLoader(self._load_data_room_revisions_async)
 
     async def create_data_room_with_root_folder_async(self, data_room: DataRoomIn) -> DataRoom:
-        commands: list[tuple[str, dict[str, Any] | None]] = [
-            # Defer the foreign key constraint
-            ('SET CONSTRAINTS fk_data_room_root_folder DEFERRED', None),
-            
-            # Create data room
-            ('''
-                INSERT INTO data_rooms (name, source, client_id, client_secret)
-                VALUES (:name, :source, :client_id, :client_secret)
-                RETURNING id, created_at, updated_at
-            ''', {"name": data_room.name, "source": data_room.source.value, "client_id": data_room.client_id, "client_secret": data_room.client_secret}),
+        return (await self.create_data_rooms_with_root_folders_async([data_room]))[0]
 
-            # Create root folder
-            ('''
-                INSERT INTO folders (name, data_room_id, parent_folder_id)
-                SELECT 'Root', d.id, NULL 
-                FROM data_rooms d 
-                WHERE d.name = :name AND d.source = :source
-                ORDER BY d.created_at DESC 
-                LIMIT 1
-                RETURNING id
-            ''', {"name": data_room.name, "source": data_room.source.value}),
+    async def create_data_rooms_with_root_folders_async(self, data_rooms: list[DataRoomIn]) -> list[DataRoom]:
+        """Create data rooms and their root folders in one statement, returned in input order."""
+        # Both ids are generated up front so each insert references the other directly. The root folder
+        # constraints are checked at the end of the statement, once both rows exist.
+        sql = '''
+            WITH input AS MATERIALIZED (
+                SELECT gen_random_uuid() AS id, gen_random_uuid() AS root_folder_id, i.*
+                FROM unnest(
+                    CAST(:names AS text[]), CAST(:sources AS data_room_source[]), CAST(:client_ids AS text[]),
+                    CAST(:client_secrets AS text[]), CAST(:external_ids AS text[])
+                ) WITH ORDINALITY AS i(name, source, client_id, client_secret, external_id, position)
+            ),
+            inserted_data_rooms AS (
+                INSERT INTO data_rooms (id, name, source, client_id, client_secret, external_id, root_folder_id)
+                SELECT id, name, source, client_id, client_secret, external_id, root_folder_id
+                FROM input
+                RETURNING id, created_at, updated_at
+            ),
+            inserted_root_folders AS (
+                INSERT INTO folders (id, name, data_room_id, parent_folder_id)
+                SELECT root_folder_id, 'Root', id, NULL
+                FROM input
+            )
+            SELECT i.id, i.root_folder_id, d.created_at, d.updated_at
+            FROM input i
+            JOIN inserted_data_rooms d ON d.id = i.id
+            ORDER BY i.position
+        '''
+        params = {
+            "names": [data_room.name for data_room in data_rooms],
+            "sources": [data_room.source.value for data_room in data_rooms],
+            "client_ids": [data_room.client_id for data_room in data_rooms],
+            "client_secrets": [data_room.client_secret for data_room in data_rooms],
+            "external_ids": [data_room.external_id for data_room in data_rooms],
+        }
+        try:
+            results = await self.db.execute_sql_async(sql, params)
+        except IntegrityError as e:
+            if get_violated_unique_index(e) == "idx_data_rooms_external_id":
+                raise ConflictError("A data room already mirrors the same external data room.")
+            raise
 
-            # Set root folder ID in data room
-            ('''
-                UPDATE data_rooms 
-                SET root_folder_id = f.id
-                FROM folders f
-                WHERE data_rooms.name = :name 
-                AND data_rooms.source = :source
-                AND f.name = 'Root'
-                AND f.data_room_id = data_rooms.id
-                AND f.parent_folder_id IS NULL
-                RETURNING data_rooms.id, data_rooms.created_at, data_rooms.updated_at, data_rooms.root_folder_id
-            ''', {"name": data_room.name, "source": data_room.source.value})
+        return [
+            DataRoom(
+                id=str(result["id"]),
+                name=data_room.name,
+                source=data_room.source,
+                status=EntityStatus.ACTIVE,
+                created_at=result["created_at"],
+                updated_at=result["updated_at"],
+                root_folder_id=str(result["root_folder_id"]),
+                client_id=data_room.client_id,
+                client_secret=data_room.client_secret,
+            )
+            for data_room, result in zip(data_rooms, results)
         ]
 
-        results = await self.db.execute_transaction_async(commands)
-        result = results[3][0]
-
-        return DataRoom(
-            id=str(result["id"]),
-            name=data_room.name,
-            source=data_room.source,
-            status=EntityStatus.ACTIVE,
-            created_at=result["created_at"],
-            updated_at=result["updated_at"],
-            root_folder_id=str(result["root_folder_id"]),
-            client_id=data_room.client_id,
-            client_secret=data_room.client_secret,
-        )
-
     async def link_data_room_to_project_async(self, data_room_id: str, project_id: str) -> None:
         sql = '''
             INSERT INTO project_data_rooms (project_id, data_room_id)
@@ -67,24 +82,32 @@ class DataRoomRepository:
         await self.db.execute_sql_async(sql, {"project_id": project_id, "data_room_id": data_room_id})
 
     async def get_data_room_by_id_async(self, id: str) -> DataRoom | None:
-        sql = "SELECT * FROM data_rooms WHERE id = :id"
-        result = (await self.db.execute_sql_async(sql, {"id": id}))
-    
-        if not result:
-            return None
+        return await self.data_room_loader.load_async(normalize_uuid(id))
+
+    async def _load_data_rooms_async(self, ids: list[str]) -> dict[str, DataRoom]:
+        sql = "SELECT * FROM data_rooms WHERE id = ANY(CAST(:ids AS uuid[]))"
+        results = await self.db.execute_sql_async(sql, {"ids": ids}, read_only=True)
 
-        data_room = result[0]
-        if not data_room:
-            return None
-        
-        return DataRoom(
+        return {str(data_room["id"]): DataRoom(
             id=str(data_room["id"]),
             name=data_room["name"],
             source=data_room["source"],
             created_at=data_room["created_at"],
             updated_at=data_room["updated_at"],
             status=data_room["status"],
-            root_folder_id=str(data_room["root_folder_id"]),
+            root_folder_id=str(data_room["root_folder_id"]) if data_room["root_folder_id"] else None,
             client_id=data_room["client_id"],
             client_secret=data_room["client_secret"],
-        )
\ No newline at end of file
+        ) for data_room in results}
+
+    async def get_data_room_revision_async(self, id: str) -> int | None:
+        id = normalize_uuid(id)
+        if has_consistent_snapshot():
+            # Read in the request's snapshot, which a shared batch on another connection is not
+            return (await self._load_data_room_revisions_async([id])).get(id)
+        return await self.revision_loader.load_async(id)
+
+    async def _load_data_room_revisions_async(self, ids: list[str]) -> dict[str, int]:
+        sql = "SELECT id, revision FROM data_rooms WHERE id = ANY(CAST(:ids AS uuid[]))"
+        results = await self.db.execute_sql_async(sql, {"ids": ids}, read_only=True)
+        return {str(result["id"]): result["revision"] for result in results}
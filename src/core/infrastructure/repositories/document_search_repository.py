@@ -0,0 +1,96 @@
+from core.infrastructure.database.database_client import DatabaseClient
+from core.models.document_search_hit import DocumentSearchHit
+from core.models.page import Page
+from core.utils.cursor import InvalidCursorError, decode_cursor, encode_cursor
+from core.utils.ids import normalize_uuid
+
+# A name containing the query outranks any body match
+NAME_MATCH_RANK = 1.0
+
+# Trigram indexes cannot narrow down shorter substrings
+MIN_NAME_MATCH_LENGTH = 3
+
+
+class DocumentSearchRepository:
+    def __init__(self, db_client: DatabaseClient):
+        self.db_client = db_client
+
+    async def search_data_room_documents_async(self, data_room_id: str, query: str, limit: int, cursor: str | None = None) -> Page[DocumentSearchHit]:
+        scope = "d.data_room_id = :data_room_id"
+        return await self._search_documents_async(scope, {"data_room_id": normalize_uuid(data_room_id)}, query, limit, cursor)
+
+    async def search_project_documents_async(self, project_id: str, query: str, limit: int, cursor: str | None = None) -> Page[DocumentSearchHit]:
+        scope = "d.data_room_id IN (SELECT data_room_id FROM project_data_rooms WHERE project_id = :project_id)"
+        return await self._search_documents_async(scope, {"project_id": normalize_uuid(project_id)}, query, limit, cursor)
+
+    async def _search_documents_async(self, scope: str, params: dict, query: str, limit: int, cursor: str | None) -> Page[DocumentSearchHit]:
+        """
+        Active documents whose name or body matches `query` as a web search, or whose name contains it,
+        best first and paged by (rank, id).
+        """
+        params = {**params, "query": query, "limit": limit + 1}
+        name_match = "FALSE"
+        if len(query) >= MIN_NAME_MATCH_LENGTH:
+            params["name_pattern"] = f"%{_escape_like(query)}%"
+            name_match = "d.name ILIKE :name_pattern"
+        keyset = ""
+        if cursor:
+            after_rank, after_id = decode_cursor(cursor, 2)
+            if not isinstance(after_rank, (int, float)) or not isinstance(after_id, str):
+                raise InvalidCursorError("Malformed pagination cursor.")
+            params["after_rank"], params["after_id"] = float(after_rank), normalize_uuid(after_id)
+            keyset = "WHERE rank < :after_rank OR (rank = :after_rank AND id > CAST(:after_id AS uuid))"
+
+        # Matches come from the GIN indexes on search_vector and, where pg_trgm is installed, on name trigrams.
+        # Snippets are the costly part, so they are only cut for the page being returned. The text is escaped
+        # before highlighting, so the <mark> tags are the only markup a snippet can contain.
+        sql = f'''
+            WITH search AS (
+                SELECT websearch_to_tsquery('english', :query) AS tsquery
+            ),
+            matches AS (
+                SELECT d.id, d.data_room_id, d.folder_id, d.name, d.content_type, d.updated_at,
+                    COALESCE(d.content, d.search_text) AS body,
+                    CAST(
+                        ts_rank_cd(d.search_vector, s.tsquery)
+                        + CASE WHEN {name_match} THEN {NAME_MATCH_RANK} ELSE 0 END
+                    AS float8) AS rank
+                FROM documents d, search s
+                WHERE {scope} AND d.status = 'active'
+                AND (d.search_vector @@ s.tsquery OR {name_match})
+            ),
+            page AS (
+                SELECT * FROM matches
+                {keyset}
+                ORDER BY rank DESC, id
+                LIMIT :limit
+            )
+            SELECT p.id::text AS id, p.data_room_id::text AS data_room_id, p.folder_id::text AS folder_id,
+                p.name, p.content_type, p.updated_at, p.rank,
+                ts_headline(
+                    'english', {_html_escape_sql("COALESCE(NULLIF(left(p.body, 100000), ''), p.name)")}, s.tsquery,
+                    'StartSel=<mark>, StopSel=</mark>, MaxFragments=2, MaxWords=20, MinWords=8'
+                ) AS snippet
+            FROM page p, search s
+            ORDER BY p.rank DESC, p.id
+        '''
+        rows = await self.db_client.execute_sql_async(sql, params, read_only=True)
+
+        next_cursor = None
+        if len(rows) > limit:
+            last = rows[limit - 1]
+            next_cursor = encode_cursor([last["rank"], last["id"]])
+
+        return Page(items=[DocumentSearchHit.model_validate(row) for row in rows[:limit]], next_cursor=next_cursor)
+
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _html_escape_sql(expression: str) -> str:
+    """SQL HTML-escaping the text `expression` evaluates to."""
+    # Ampersands first, so the entities added afterwards are not escaped again; '' is a quote in SQL
+    for character, entity in (("&", "&amp;"), ("<", "&lt;"), (">", "&gt;"), ('"', "&quot;"), ("''", "&#39;")):
+        expression = f"replace({expression}, '{character}', '{entity}')"
+    return expression
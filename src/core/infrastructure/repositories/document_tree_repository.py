@@ -1,8 +1,32 @@
+from typing import AsyncIterator, Iterable
+from asyncpg.exceptions import UniqueViolationError
+from sqlalchemy.exc import IntegrityError
+from core.exceptions import ConflictError, InvalidRequestError
 from core.infrastructure.database.database_client import DatabaseClient
+from core.infrastructure.database.errors import get_violated_unique_index, is_check_violation
 from core.models.folder import Folder, FolderIn
 from core.models.document import Document, DocumentIn
 from core.models.document_tree import DocumentTree
+from core.models.document_tree_import import DocumentTreeImportNodeIn, DocumentTreeImportOut
+from core.models.document_tree_node import DocumentTreeNode
+from core.models.document_upload import DocumentUpload, DocumentUploadIn
+from core.models.folder_child import FolderChild
 from core.models.entity_status import EntityStatus
+from core.models.page import Page
+from core.models.path_node import PathNode
+from core.utils.cursor import InvalidCursorError, decode_cursor, encode_cursor
+from core.utils.ids import normalize_uuid
+
+# Folders sort before documents among a folder's children
+FOLDER_RANK = 0
+DOCUMENT_RANK = 1
+
+# Unique among the active children of a folder
+FOLDER_NAME_INDEX = "idx_folders_parent_folder_id_name"
+DOCUMENT_NAME_INDEX = "idx_documents_folder_id_name"
+
+FOLDER_PRIMARY_KEY = "folders_pkey"
+DOCUMENT_PRIMARY_KEY = "documents_pkey"
 
 
 class DocumentTreeRepository:
@@ -20,7 +44,12 @@ class DocumentTreeRepository:
             "data_room_id": folder.data_room_id,
             "parent_folder_id": folder.parent_folder_id
         }
-        result = (await self.db_client.execute_sql_async(sql, params))[0]
+        try:
+            result = (await self.db_client.execute_sql_async(sql, params))[0]
+        except IntegrityError as e:
+            if get_violated_unique_index(e) == FOLDER_NAME_INDEX:
+                raise ConflictError(f"A folder named '{folder.name}' already exists in the folder.")
+            raise
 
         if not result:
             return None
@@ -37,19 +66,33 @@ class DocumentTreeRepository:
             document_ids=[]
         )
 
-    async def create_document_async(self, document: DocumentIn) -> Document | None:
+    async def create_document_async(
+            self,
+            document: DocumentIn,
+            content_hash: str,
+            content_size: int,
+            search_text: str | None = None
+        ) -> Document | None:
         sql = '''
-            INSERT INTO documents (name, content, folder_id, data_room_id) 
-            VALUES (:name, :content, :folder_id, :data_room_id)
+            INSERT INTO documents (name, content_hash, content_size, content_type, search_text, folder_id, data_room_id) 
+            VALUES (:name, :content_hash, :content_size, :content_type, :search_text, :folder_id, :data_room_id)
             RETURNING id, created_at, updated_at
         '''
         params = {
             "name": document.name,
-            "content": document.content,
+            "content_hash": content_hash,
+            "content_size": content_size,
+            "content_type": document.content_type,
+            "search_text": search_text,
             "folder_id": document.folder_id,
             "data_room_id": document.data_room_id
         }
-        result = (await self.db_client.execute_sql_async(sql, params))[0]
+        try:
+            result = (await self.db_client.execute_sql_async(sql, params))[0]
+        except IntegrityError as e:
+            if get_violated_unique_index(e) == DOCUMENT_NAME_INDEX:
+                raise ConflictError(f"A document named '{document.name}' already exists in the folder.")
+            raise
 
         if not result:
             return None
@@ -61,63 +104,423 @@ class DocumentTreeRepository:
             data_room_id=document.data_room_id,
             created_at=result["created_at"],
             updated_at=result["updated_at"],
-            status=EntityStatus.ACTIVE
+            status=EntityStatus.ACTIVE,
+            content_hash=content_hash,
+            content_size=content_size,
+            content_type=document.content_type
+        )
+
+    async def get_document_async(self, data_room_id: str, document_id: str) -> Document | None:
+        sql = '''
+            SELECT
+                id, name, content, data_room_id, created_at, updated_at, status,
+                content_hash, COALESCE(content_size, octet_length(content)) as content_size, content_type
+            FROM documents
+            WHERE id = :document_id AND data_room_id = :data_room_id AND status = 'active'
+        '''
+        results = await self.db_client.execute_sql_async(sql, {"data_room_id": data_room_id, "document_id": document_id}, read_only=True)
+
+        if not results:
+            return None
+
+        row = results[0]
+        return Document(
+            id=str(row["id"]),
+            name=row["name"],
+            content=row["content"],
+            data_room_id=str(row["data_room_id"]),
+            created_at=row["created_at"],
+            updated_at=row["updated_at"],
+            status=EntityStatus(row["status"]),
+            content_hash=row["content_hash"],
+            content_size=row["content_size"],
+            content_type=row["content_type"]
         )
     
-    async def get_document_tree_async(self, data_room_id: str) -> DocumentTree | None:
+    async def create_document_upload_async(self, upload: DocumentUploadIn) -> DocumentUpload | None:
+        # The folder has to be an active folder of the same data room
         sql = '''
-            WITH RECURSIVE folder_tree AS (
-                -- Base case: get the root folder
-                SELECT 
-                    f.id, f.name, f.data_room_id, f.parent_folder_id, 
-                    f.created_at, f.updated_at, f.status,
-                    0 as level, ARRAY[f.id] as path
+            INSERT INTO document_uploads (name, content_type, size, data_room_id, folder_id)
+            SELECT :name, :content_type, :size, f.data_room_id, f.id
+            FROM folders f
+            WHERE f.id = :folder_id AND f.data_room_id = :data_room_id AND f.status = 'active'
+            RETURNING id, created_at, updated_at
+        '''
+        params = {
+            "name": upload.name,
+            "content_type": upload.content_type,
+            "size": upload.size,
+            "data_room_id": upload.data_room_id,
+            "folder_id": upload.folder_id
+        }
+        results = await self.db_client.execute_sql_async(sql, params)
+
+        if not results:
+            return None
+
+        result = results[0]
+        return DocumentUpload(
+            id=str(result["id"]),
+            name=upload.name,
+            content_type=upload.content_type,
+            data_room_id=upload.data_room_id,
+            folder_id=upload.folder_id,
+            size=upload.size,
+            created_at=result["created_at"],
+            updated_at=result["updated_at"],
+            status=EntityStatus.ACTIVE
+        )
+
+    async def get_document_upload_async(self, data_room_id: str, upload_id: str) -> DocumentUpload | None:
+        sql = '''
+            SELECT id, name, content_type, size, data_room_id, folder_id, document_id, created_at, updated_at, status
+            FROM document_uploads
+            WHERE id = :upload_id AND data_room_id = :data_room_id AND status = 'active'
+        '''
+        results = await self.db_client.execute_sql_async(sql, {"data_room_id": data_room_id, "upload_id": upload_id}, read_only=True)
+
+        if not results:
+            return None
+
+        row = results[0]
+        return DocumentUpload(
+            id=str(row["id"]),
+            name=row["name"],
+            content_type=row["content_type"],
+            data_room_id=str(row["data_room_id"]),
+            folder_id=str(row["folder_id"]),
+            size=row["size"],
+            document_id=str(row["document_id"]) if row["document_id"] else None,
+            created_at=row["created_at"],
+            updated_at=row["updated_at"],
+            status=EntityStatus(row["status"])
+        )
+
+    async def acquire_document_upload_lease_async(self, data_room_id: str, upload_id: str, lease_seconds: int) -> str | None:
+        """Lease an open upload to the caller and return the lease id; None if another request holds a live lease."""
+        sql = '''
+            UPDATE document_uploads
+            SET lease_id = gen_random_uuid(), lease_expires_at = NOW() + CAST(:lease_seconds AS integer) * interval '1 second'
+            WHERE id = :upload_id AND data_room_id = :data_room_id
+            AND status = 'active' AND document_id IS NULL
+            AND (lease_id IS NULL OR lease_expires_at < NOW())
+            RETURNING lease_id
+        '''
+        params = {"data_room_id": data_room_id, "upload_id": upload_id, "lease_seconds": lease_seconds}
+        results = await self.db_client.execute_sql_async(sql, params)
+        return str(results[0]["lease_id"]) if results else None
+
+    async def renew_document_upload_lease_async(self, upload_id: str, lease_id: str, lease_seconds: int) -> bool:
+        """Extend a lease; False if it has been taken over after expiring."""
+        sql = '''
+            UPDATE document_uploads
+            SET lease_expires_at = NOW() + CAST(:lease_seconds AS integer) * interval '1 second'
+            WHERE id = :upload_id AND lease_id = :lease_id
+            RETURNING id
+        '''
+        results = await self.db_client.execute_sql_async(sql, {"upload_id": upload_id, "lease_id": lease_id, "lease_seconds": lease_seconds})
+        return len(results) > 0
+
+    async def release_document_upload_lease_async(self, upload_id: str, lease_id: str) -> None:
+        sql = '''
+            UPDATE document_uploads
+            SET lease_id = NULL, lease_expires_at = NULL
+            WHERE id = :upload_id AND lease_id = :lease_id
+        '''
+        await self.db_client.execute_sql_async(sql, {"upload_id": upload_id, "lease_id": lease_id})
+
+    async def complete_document_upload_async(
+            self,
+            data_room_id: str,
+            upload_id: str,
+            lease_id: str,
+            content_hash: str,
+            content_size: int,
+            search_text: str | None = None
+        ) -> Document | None:
+        """
+        Create the document and link it to the upload in one statement.
+
+        None if the upload was already completed or the caller's lease on it was taken over.
+        """
+        sql = '''
+            WITH upload AS (
+                SELECT id, name, content_type, data_room_id, folder_id
+                FROM document_uploads
+                WHERE id = :upload_id AND data_room_id = :data_room_id
+                AND status = 'active' AND document_id IS NULL AND lease_id = :lease_id
+                FOR UPDATE
+            ),
+            document AS (
+                INSERT INTO documents (name, content_hash, content_size, content_type, search_text, folder_id, data_room_id)
+                SELECT name, :content_hash, :content_size, content_type, :search_text, folder_id, data_room_id
+                FROM upload
+                RETURNING id, name, content_type, data_room_id, created_at, updated_at
+            ),
+            completed AS (
+                UPDATE document_uploads du
+                SET document_id = document.id
+                FROM document
+                WHERE du.id = :upload_id
+            )
+            SELECT * FROM document
+        '''
+        params = {
+            "data_room_id": data_room_id,
+            "upload_id": upload_id,
+            "lease_id": lease_id,
+            "content_hash": content_hash,
+            "content_size": content_size,
+            "search_text": search_text
+        }
+        try:
+            results = await self.db_client.execute_sql_async(sql, params)
+        except IntegrityError as e:
+            if get_violated_unique_index(e) == DOCUMENT_NAME_INDEX:
+                raise ConflictError("A document with the name of the upload already exists in the folder.")
+            raise
+
+        if not results:
+            return None
+
+        row = results[0]
+        return Document(
+            id=str(row["id"]),
+            name=row["name"],
+            content=None,
+            data_room_id=str(row["data_room_id"]),
+            created_at=row["created_at"],
+            updated_at=row["updated_at"],
+            status=EntityStatus.ACTIVE,
+            content_hash=content_hash,
+            content_size=content_size,
+            content_type=row["content_type"]
+        )
+
+    async def delete_document_upload_async(self, data_room_id: str, upload_id: str) -> bool:
+        sql = '''
+            UPDATE document_uploads
+            SET status = 'deleted'
+            WHERE id = :upload_id AND data_room_id = :data_room_id
+            AND status = 'active' AND document_id IS NULL
+            RETURNING id
+        '''
+        results = await self.db_client.execute_sql_async(sql, {"data_room_id": data_room_id, "upload_id": upload_id})
+        return len(results) > 0
+
+    async def import_document_tree_async(
+            self,
+            data_room_id: str,
+            folder_id: str,
+            folders: list[DocumentTreeImportNodeIn],
+            documents: list[tuple[DocumentTreeImportNodeIn, str, int, str | None]]
+        ) -> DocumentTreeImportOut | None:
+        """
+        COPY a whole hierarchy below `folder_id` in one transaction.
+
+        `folders` must be ordered parents first, since the path trigger reads each parent's path as the row
+        is inserted. `documents` pairs each document with its content hash, size and search text.
+        """
+        sql = '''
+            SELECT 1 FROM folders
+            WHERE id = :folder_id AND data_room_id = :data_room_id AND status = 'active'
+        '''
+        if not await self.db_client.execute_sql_async(sql, {"data_room_id": data_room_id, "folder_id": folder_id}):
+            return None
+
+        folder_records = [
+            (folder.id, folder.name, data_room_id, folder.parent_folder_id or folder_id)
+            for folder in folders
+        ]
+        document_records = [
+            (document.id, document.name, data_room_id, document.parent_folder_id or folder_id, content_hash, content_size, document.content_type, search_text)
+            for document, content_hash, content_size, search_text in documents
+        ]
+
+        try:
+            await self.db_client.copy_records_async([
+                ("folders", ["id", "name", "data_room_id", "parent_folder_id"], folder_records),
+                ("documents", ["id", "name", "data_room_id", "folder_id", "content_hash", "content_size", "content_type", "search_text"], document_records),
+            ])
+        except UniqueViolationError as e:
+            violated_index = get_violated_unique_index(e)
+            if violated_index in (FOLDER_NAME_INDEX, DOCUMENT_NAME_INDEX):
+                raise ConflictError("Some of the imported names are already taken in their folder.")
+            if violated_index in (FOLDER_PRIMARY_KEY, DOCUMENT_PRIMARY_KEY):
+                raise ConflictError("Some of the imported ids already exist.")
+            raise
+
+        return DocumentTreeImportOut(folder_count=len(folder_records), document_count=len(document_records))
+
+    async def move_folder_async(self, data_room_id: str, folder_id: str, parent_folder_id: str) -> Folder | None:
+        # Locks, ordered by id, the subtree being moved (the path triggers rewrite all of it) and every non-root
+        # ancestor of the new parent. Two moves that could close a cycle between them lock the same folders, so
+        # the second one waits and its path trigger then sees the first move and raises check_violation.
+        sql = '''
+            WITH locked AS (
+                SELECT id
+                FROM folders
+                WHERE data_room_id = :data_room_id AND parent_folder_id IS NOT NULL
+                AND (
+                    path @> ARRAY[CAST(:folder_id AS uuid)]
+                    OR id = ANY(SELECT unnest(path) FROM folders WHERE id = :parent_folder_id AND data_room_id = :data_room_id)
+                )
+                ORDER BY id
+                FOR UPDATE
+            )
+            UPDATE folders
+            SET parent_folder_id = :parent_folder_id
+            WHERE id = :folder_id
+            AND data_room_id = :data_room_id
+            AND parent_folder_id IS NOT NULL
+            AND EXISTS (SELECT 1 FROM folders p WHERE p.id = :parent_folder_id AND p.data_room_id = :data_room_id)
+            AND (SELECT count(*) FROM locked) > 0
+            RETURNING id, name, data_room_id, created_at, updated_at, status
+        '''
+        params = {"data_room_id": data_room_id, "folder_id": folder_id, "parent_folder_id": parent_folder_id}
+        try:
+            results = await self.db_client.execute_sql_async(sql, params)
+        except IntegrityError as e:
+            if get_violated_unique_index(e) == FOLDER_NAME_INDEX:
+                raise ConflictError("A folder with the same name already exists in the target folder.")
+            if is_check_violation(e):
+                raise InvalidRequestError("A folder cannot be moved into its own subtree.")
+            raise
+
+        if not results:
+            return None
+
+        result = results[0]
+        return Folder(
+            id=str(result["id"]),
+            name=result["name"],
+            data_room_id=str(result["data_room_id"]),
+            parent_folder_id=parent_folder_id,
+            created_at=result["created_at"],
+            updated_at=result["updated_at"],
+            status=EntityStatus(result["status"]),
+            children_folder_ids=[],
+            document_ids=[]
+        )
+
+    async def resolve_path_async(self, data_room_id: str, names: list[str]) -> PathNode | None:
+        """
+        Return the node reached by following `names` down from the root folder, the root folder itself when empty.
+
+        The last name may be a folder or a document, the folder wins when both exist.
+        """
+        # Each step down is a lookup on the unique (parent_folder_id, name) index
+        sql = f'''
+            WITH RECURSIVE walk AS (
+                SELECT f.id, 0 as depth
                 FROM data_rooms dr
-                JOIN folders f ON dr.root_folder_id = f.id
+                JOIN folders f ON f.id = dr.root_folder_id
                 WHERE dr.id = :data_room_id AND dr.status = 'active' AND f.status = 'active'
-                
+
                 UNION ALL
-                
-                -- Recursive case: get child folders
-                SELECT 
+
+                SELECT f.id, w.depth + 1
+                FROM walk w
+                JOIN folders f ON f.parent_folder_id = w.id
+                    AND f.name = (CAST(:names AS text[]))[w.depth + 1]
+                    AND f.status = 'active'
+                WHERE w.depth < :depth
+            )
+            SELECT * FROM (
+                (SELECT
+                    {FOLDER_RANK} as type_rank,
                     f.id, f.name, f.data_room_id, f.parent_folder_id,
-                    f.created_at, f.updated_at, f.status,
-                    ft.level + 1, ft.path || f.id
-                FROM folders f
-                JOIN folder_tree ft ON f.parent_folder_id = ft.id
-                WHERE f.status = 'active'
-            ),
-            -- Get all documents for folders in the tree
-            folder_documents AS (
-                SELECT 
-                    d.id, d.name, d.content, d.data_room_id, d.folder_id,
+                    f.created_at, f.updated_at, f.status
+                FROM walk w
+                JOIN folders f ON f.id = w.id
+                WHERE w.depth = :depth)
+
+                UNION ALL
+
+                (SELECT
+                    {DOCUMENT_RANK} as type_rank,
+                    d.id, d.name, d.data_room_id, d.folder_id as parent_folder_id,
                     d.created_at, d.updated_at, d.status
+                FROM walk w
+                JOIN documents d ON d.folder_id = w.id
+                    AND d.name = (CAST(:names AS text[]))[:depth]
+                    AND d.status = 'active'
+                WHERE w.depth = :depth - 1)
+            ) nodes
+            ORDER BY type_rank
+            LIMIT 1
+        '''
+        params = {"data_room_id": data_room_id, "names": names, "depth": len(names)}
+        results = await self.db_client.execute_sql_async(sql, params, read_only=True)
+
+        return _to_path_node(results[0]) if results else None
+
+    async def get_folder_breadcrumbs_async(self, data_room_id: str, folder_id: str) -> list[PathNode] | None:
+        """Return the folders from the root folder down to and including `folder_id`, None if it does not exist."""
+        sql = f'''
+            SELECT
+                {FOLDER_RANK} as type_rank,
+                a.id, a.name, a.data_room_id, a.parent_folder_id,
+                a.created_at, a.updated_at, a.status
+            FROM folders f
+            CROSS JOIN LATERAL unnest(f.path) WITH ORDINALITY AS p(id, depth)
+            JOIN folders a ON a.id = p.id
+            WHERE f.id = :folder_id AND f.data_room_id = :data_room_id AND f.status = 'active'
+            ORDER BY p.depth
+        '''
+        results = await self.db_client.execute_sql_async(sql, {"data_room_id": data_room_id, "folder_id": folder_id}, read_only=True)
+
+        return [_to_path_node(row) for row in results] or None
+
+    async def get_document_breadcrumbs_async(self, data_room_id: str, document_id: str) -> list[PathNode] | None:
+        """Return the folders from the root folder down to the document, then the document, None if it does not exist."""
+        # The materialized path of the document's folder holds all of its ancestors
+        sql = f'''
+            WITH document AS (
+                SELECT d.id, d.name, d.data_room_id, d.folder_id, d.created_at, d.updated_at, d.status, f.path
                 FROM documents d
-                JOIN folder_tree ft ON d.folder_id = ft.id
-                WHERE d.status = 'active'
+                JOIN folders f ON f.id = d.folder_id
+                WHERE d.id = :document_id AND d.data_room_id = :data_room_id AND d.status = 'active'
             )
-            -- Main query: get folders and documents together
-            SELECT 
-                'folder' as type,
-                ft.id, ft.name, ft.data_room_id, ft.parent_folder_id,
-                ft.created_at, ft.updated_at, ft.status, ft.level,
-                NULL as content, NULL as folder_id
-            FROM folder_tree ft
-            
-            UNION ALL
-            
-            SELECT 
-                'document' as type,
-                fd.id, fd.name, fd.data_room_id, NULL as parent_folder_id,
-                fd.created_at, fd.updated_at, fd.status, NULL as level,
-                fd.content, fd.folder_id
-            FROM folder_documents fd
-            
-            ORDER BY type, level, name
+            SELECT * FROM (
+                SELECT
+                    {FOLDER_RANK} as type_rank,
+                    a.id, a.name, a.data_room_id, a.parent_folder_id,
+                    a.created_at, a.updated_at, a.status, p.depth
+                FROM document d
+                CROSS JOIN LATERAL unnest(d.path) WITH ORDINALITY AS p(id, depth)
+                JOIN folders a ON a.id = p.id
+
+                UNION ALL
+
+                SELECT
+                    {DOCUMENT_RANK} as type_rank,
+                    d.id, d.name, d.data_room_id, d.folder_id as parent_folder_id,
+                    d.created_at, d.updated_at, d.status, cardinality(d.path) + 1 as depth
+                FROM document d
+            ) breadcrumbs
+            ORDER BY depth
         '''
-        
-        params = {"data_room_id": data_room_id}
-        results = await self.db_client.execute_sql_async(sql, params)
+        results = await self.db_client.execute_sql_async(sql, {"data_room_id": data_room_id, "document_id": document_id}, read_only=True)
+
+        return [_to_path_node(row) for row in results] or None
+
+    async def get_data_room_revision_async(self, data_room_id: str) -> int | None:
+        """The revision in the snapshot of the current unit of work, even outside of a read-only one."""
+        sql = "SELECT revision FROM data_rooms WHERE id = :data_room_id"
+        results = await self.db_client.execute_sql_async(sql, {"data_room_id": normalize_uuid(data_room_id)}, read_only=True)
+        return results[0]["revision"] if results else None
+
+    async def get_document_tree_async(
+            self,
+            data_room_id: str,
+            include_content: bool = False,
+            max_depth: int | None = None,
+            root_folder_id: str | None = None
+        ) -> DocumentTree | None:
+        sql = self._get_document_tree_sql(include_content)
+        params = {"data_room_id": data_room_id, "max_depth": max_depth, "root_folder_id": root_folder_id}
+        results = await self.db_client.execute_sql_async(sql, params, read_only=True)
         
         if not results:
             return None
@@ -141,7 +544,7 @@ class DocumentTreeRepository:
                     document_ids=[]
                 )
                 folders_map[folder.id] = folder
-                if folder.parent_folder_id is None:
+                if row["level"] == 0:
                     root_folder = folder
             else:  # document
                 document = Document(
@@ -151,7 +554,10 @@ class DocumentTreeRepository:
                     data_room_id=str(row["data_room_id"]),
                     created_at=row["created_at"],
                     updated_at=row["updated_at"],
-                    status=EntityStatus(row["status"])
+                    status=EntityStatus(row["status"]),
+                    content_hash=row["content_hash"],
+                    content_size=row["content_size"],
+                    content_type=row["content_type"]
                 )
                 folder_id = str(row["folder_id"])
                 if folder_id not in documents_by_folder:
@@ -161,34 +567,229 @@ class DocumentTreeRepository:
         if not root_folder:
             return None
         
-        # Build the tree structure
-        def build_tree(folder: Folder) -> DocumentTree:
-            # Find child folders
-            child_folders = [f for f in folders_map.values() if f.parent_folder_id == folder.id]
-            folder.children_folder_ids = [f.id for f in child_folders]
-            
-            # Find documents in this folder
-            folder_documents = documents_by_folder.get(folder.id, [])
-            folder.document_ids = [d.id for d in folder_documents]
-            
-            # Create DocumentTree nodes for children
-            children = []
-            
-            # Add child folders (recursive)
-            for child_folder in sorted(child_folders, key=lambda f: f.name):
-                children.append(build_tree(child_folder))
-            
-            # Add documents
-            for document in sorted(folder_documents, key=lambda d: d.name):
-                children.append(DocumentTree(
-                    data=document,
-                    children=[]
-                ))
-            
-            return DocumentTree(
-                data=folder,
-                children=children
+        return build_document_tree(root_folder, folders_map.values(), documents_by_folder)
+
+    async def stream_document_tree_async(
+            self,
+            data_room_id: str,
+            include_content: bool = False,
+            max_depth: int | None = None,
+            root_folder_id: str | None = None
+        ) -> AsyncIterator[DocumentTreeNode]:
+        """Yield the tree as flat nodes, folders parents-first and then documents, without buffering it."""
+        # Only the folders are sorted, the documents follow from a cursor of their own in no particular order
+        statements = [
+            self._get_document_tree_sql(include_content, branch="folders"),
+            self._get_document_tree_sql(include_content, branch="documents"),
+        ]
+        params = {"data_room_id": data_room_id, "max_depth": max_depth, "root_folder_id": root_folder_id}
+
+        async for row in self.db_client.stream_sql_statements_async(statements, params):
+            is_folder = row["type"] == "folder"
+            parent_folder_id = row["parent_folder_id"] if is_folder else row["folder_id"]
+
+            yield DocumentTreeNode(
+                type="Folder" if is_folder else "Document",
+                id=str(row["id"]),
+                name=row["name"],
+                data_room_id=str(row["data_room_id"]),
+                parent_folder_id=str(parent_folder_id) if parent_folder_id else None,
+                created_at=row["created_at"],
+                updated_at=row["updated_at"],
+                status=EntityStatus(row["status"]),
+                content=row["content"],
+                content_hash=row["content_hash"],
+                content_size=row["content_size"],
+                content_type=row["content_type"]
             )
-        
-        return build_tree(root_folder)
-        
\ No newline at end of file
+
+    async def get_folder_children_async(
+            self,
+            data_room_id: str,
+            folder_id: str,
+            limit: int,
+            cursor: str | None = None
+        ) -> Page[FolderChild]:
+        params = {"data_room_id": data_room_id, "folder_id": normalize_uuid(folder_id), "limit": limit + 1}
+
+        after_rank = None
+        if cursor:
+            after_rank, after_name, after_id = decode_cursor(cursor, 3)
+            if after_rank not in (FOLDER_RANK, DOCUMENT_RANK) or not isinstance(after_name, str) or not isinstance(after_id, str):
+                raise InvalidCursorError("Malformed pagination cursor.")
+            params["after_name"], params["after_id"] = after_name, normalize_uuid(after_id)
+
+        # Each branch is a range scan on (parent_folder_id, name, id) / (folder_id, name, id)
+        # starting after the cursor; the folder branch is skipped once the cursor is past it
+        branches = []
+        if after_rank is None or after_rank == FOLDER_RANK:
+            keyset = "AND (f.name, f.id) > (:after_name, CAST(:after_id AS uuid))" if after_rank == FOLDER_RANK else ""
+            branches.append(f'''
+                (SELECT 
+                    {FOLDER_RANK} as type_rank,
+                    f.id, f.name, f.data_room_id, f.parent_folder_id,
+                    f.created_at, f.updated_at, f.status,
+                    EXISTS (SELECT 1 FROM folders c WHERE c.parent_folder_id = f.id AND c.status = 'active')
+                        OR EXISTS (SELECT 1 FROM documents d WHERE d.folder_id = f.id AND d.status = 'active') as has_children
+                FROM folders f
+                WHERE f.parent_folder_id = :folder_id AND f.data_room_id = :data_room_id AND f.status = 'active'
+                {keyset}
+                ORDER BY f.name, f.id
+                LIMIT :limit)
+            ''')
+        keyset = "AND (d.name, d.id) > (:after_name, CAST(:after_id AS uuid))" if after_rank == DOCUMENT_RANK else ""
+        branches.append(f'''
+            (SELECT 
+                {DOCUMENT_RANK} as type_rank,
+                d.id, d.name, d.data_room_id, d.folder_id as parent_folder_id,
+                d.created_at, d.updated_at, d.status,
+                false as has_children
+            FROM documents d
+            WHERE d.folder_id = :folder_id AND d.data_room_id = :data_room_id AND d.status = 'active'
+            {keyset}
+            ORDER BY d.name, d.id
+            LIMIT :limit)
+        ''')
+
+        sql = f"SELECT * FROM ({' UNION ALL '.join(branches)}) children ORDER BY type_rank, name, id LIMIT :limit"
+        results = await self.db_client.execute_sql_async(sql, params, read_only=True)
+
+        items = [FolderChild(
+            type="Folder" if row["type_rank"] == FOLDER_RANK else "Document",
+            id=str(row["id"]),
+            name=row["name"],
+            data_room_id=str(row["data_room_id"]),
+            parent_folder_id=str(row["parent_folder_id"]),
+            created_at=row["created_at"],
+            updated_at=row["updated_at"],
+            status=EntityStatus(row["status"]),
+            has_children=row["has_children"]
+        ) for row in results[:limit]]
+
+        next_cursor = None
+        if len(results) > limit:
+            last = results[limit - 1]
+            next_cursor = encode_cursor([last["type_rank"], last["name"], str(last["id"])])
+
+        return Page(items=items, next_cursor=next_cursor)
+
+    def _get_document_tree_sql(self, include_content: bool, branch: str | None = None) -> str:
+        """Folders and documents of the tree, or only the "folders", every one after its parent, or the "documents"."""
+        # Leave document bodies out of the query entirely unless they are requested
+        content_column = "d.content" if include_content else "NULL::text"
+
+        folders_sql = f'''
+            SELECT 
+                'folder' as type, {FOLDER_RANK} as type_rank,
+                ft.id, ft.name, ft.data_room_id, ft.parent_folder_id,
+                ft.created_at, ft.updated_at, ft.status, ft.level,
+                NULL::text as content, NULL::uuid as folder_id,
+                NULL::char(64) as content_hash, NULL::bigint as content_size, NULL::varchar as content_type
+            FROM folder_tree ft
+        '''
+        documents_sql = f'''
+            SELECT 
+                'document' as type, {DOCUMENT_RANK} as type_rank,
+                fd.id, fd.name, fd.data_room_id, NULL as parent_folder_id,
+                fd.created_at, fd.updated_at, fd.status, NULL as level,
+                fd.content, fd.folder_id,
+                fd.content_hash, fd.content_size, fd.content_type
+            FROM folder_documents fd
+        '''
+        if branch == "folders":
+            main_sql = f"{folders_sql} ORDER BY ft.level"
+        elif branch == "documents":
+            main_sql = documents_sql
+        else:
+            main_sql = f"{folders_sql} UNION ALL {documents_sql}"
+
+        return f'''
+            WITH tree_root AS (
+                -- The requested folder, or the data room root folder
+                SELECT f.id, f.path
+                FROM data_rooms dr
+                JOIN folders f ON f.id = COALESCE(CAST(:root_folder_id AS uuid), dr.root_folder_id)
+                    AND f.data_room_id = dr.id
+                WHERE dr.id = :data_room_id AND dr.status = 'active' AND f.status = 'active'
+            ),
+            -- Every folder whose materialized path contains the root, one GIN index lookup
+            subtree AS (
+                SELECT 
+                    f.id, f.name, f.data_room_id, f.parent_folder_id,
+                    f.created_at, f.updated_at, f.status, f.path,
+                    cardinality(f.path) - cardinality(tr.path) as level
+                FROM tree_root tr
+                JOIN folders f ON f.path @> ARRAY[tr.id]
+                WHERE f.data_room_id = :data_room_id
+                AND (CAST(:max_depth AS integer) IS NULL
+                    OR cardinality(f.path) - cardinality(tr.path) <= CAST(:max_depth AS integer))
+            ),
+            -- Active folders that are not below an inactive folder. The inactive ids are an uncorrelated
+            -- subquery, collected once, so each folder costs a single array overlap.
+            folder_tree AS (
+                SELECT st.*
+                FROM subtree st
+                WHERE st.status = 'active'
+                AND NOT (st.path && (SELECT COALESCE(array_agg(id), '{{}}') FROM subtree WHERE status <> 'active'))
+            ),
+            -- Get all documents for folders in the tree
+            folder_documents AS (
+                SELECT 
+                    d.id, d.name, {content_column} as content, d.data_room_id, d.folder_id,
+                    d.created_at, d.updated_at, d.status, d.content_hash,
+                    COALESCE(d.content_size, octet_length(d.content)) as content_size, d.content_type
+                FROM documents d
+                JOIN folder_tree ft ON d.folder_id = ft.id
+                WHERE d.status = 'active'
+                AND (CAST(:max_depth AS integer) IS NULL OR ft.level < CAST(:max_depth AS integer))
+            )
+            -- Main query: the folders, the documents, or both
+            {main_sql}
+        '''
+
+
+def build_document_tree(
+        root_folder: Folder,
+        folders: Iterable[Folder],
+        documents_by_folder: dict[str, list[Document]]
+    ) -> DocumentTree:
+    # Index child folders by parent in a single pass so each folder is visited once
+    children_by_parent: dict[str, list[Folder]] = {}
+    for folder in folders:
+        if folder.parent_folder_id is not None:
+            children_by_parent.setdefault(folder.parent_folder_id, []).append(folder)
+
+    root = DocumentTree(data=root_folder, children=[])
+
+    # Walk with an explicit stack so deep trees cannot hit the recursion limit
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        folder = node.data
+
+        child_folders = sorted(children_by_parent.get(folder.id, []), key=lambda f: f.name)
+        folder_documents = sorted(documents_by_folder.get(folder.id, []), key=lambda d: d.name)
+        folder.children_folder_ids = [f.id for f in child_folders]
+        folder.document_ids = [d.id for d in folder_documents]
+
+        # Child folders first, then documents, each group ordered by name
+        child_nodes = [DocumentTree(data=child_folder, children=[]) for child_folder in child_folders]
+        node.children.extend(child_nodes)
+        node.children.extend(DocumentTree(data=document, children=[]) for document in folder_documents)
+
+        stack.extend(child_nodes)
+
+    return root
+
+
+def _to_path_node(row: dict) -> PathNode:
+    return PathNode(
+        type="Folder" if row["type_rank"] == FOLDER_RANK else "Document",
+        id=str(row["id"]),
+        name=row["name"],
+        data_room_id=str(row["data_room_id"]),
+        parent_folder_id=str(row["parent_folder_id"]) if row["parent_folder_id"] else None,
+        created_at=row["created_at"],
+        updated_at=row["updated_at"],
+        status=EntityStatus(row["status"])
+    )
@@ -1,13 +1,27 @@
 from typing import Optional
+from pydantic import TypeAdapter
 from core.infrastructure.database.database_client import DatabaseClient
+from core.infrastructure.database.unit_of_work import has_consistent_snapshot
+from core.infrastructure.repositories.data_loader import DataLoader
 from core.models.project import Project, ProjectIn, ProjectUserOut
 from core.models.data_room import DataRoom
-from core.models.user_project import UserProjectIn
+from core.models.user_project import ProjectUserRoleIn, UserProjectIn
+from core.models.batch_item_result import BatchItemResult
+from core.models.batch_item_status import BatchItemStatus
 from core.models.entity_status import EntityStatus
+from core.models.page import Page
+from core.models.project_expansion import ProjectExpansion
+from core.utils.cursor import decode_created_at_cursor, to_created_at_page
+from core.utils.ids import normalize_uuid
+
+DATA_ROOMS_ADAPTER = TypeAdapter(list[DataRoom])
+PROJECT_USERS_ADAPTER = TypeAdapter(list[ProjectUserOut])
 
 class ProjectRepository:
     def __init__(self, database_client: DatabaseClient):
         self.db = database_client
+        self.project_loader: DataLoader[str, Project] = DataLoader(self._load_projects_async)
+        self.revision_loader: DataLoader[str, int] = DataLoader(self._load_project_revisions_async)
 
     async def create_project_async(self, project: ProjectIn) -> Project:
         sql = "INSERT INTO projects (name, description) VALUES (:name, :description) RETURNING id, created_at, updated_at"
@@ -57,61 +71,258 @@ class ProjectRepository:
         '''
         await self.db.execute_sql_async(sql, {"project_id": project_id, "user_id": user_id})
 
-    async def get_project_by_id_async(self, project_id: str) -> Optional[Project]:
-        sql = "SELECT * FROM projects WHERE id = :project_id"
-        result = (await self.db.execute_sql_async(sql, {"project_id": project_id}))[0]
+    async def add_users_to_project_async(self, project_id: str, project_users: list[ProjectUserRoleIn]) -> list[BatchItemResult]:
+        """Add users or change their role in one statement; unknown users and projects come back as not found."""
+        sql = '''
+            WITH input AS (
+                SELECT user_id, user_role, position
+                FROM unnest(CAST(:user_ids AS uuid[]), CAST(:user_roles AS user_role[]))
+                    WITH ORDINALITY AS i(user_id, user_role, position)
+            ),
+            existing AS (
+                SELECT up.user_id
+                FROM user_projects up
+                JOIN input i ON up.user_id = i.user_id
+                WHERE up.project_id = :project_id
+            ),
+            upserted AS (
+                INSERT INTO user_projects (project_id, user_id, user_role)
+                SELECT p.id, u.id, i.user_role
+                FROM input i
+                JOIN users u ON u.id = i.user_id
+                JOIN projects p ON p.id = :project_id
+                ON CONFLICT (user_id, project_id) DO UPDATE
+                SET user_role = EXCLUDED.user_role
+                WHERE user_projects.user_role IS DISTINCT FROM EXCLUDED.user_role
+                RETURNING user_id
+            )
+            SELECT
+                i.user_id as id,
+                CASE
+                    WHEN u.user_id IS NOT NULL AND e.user_id IS NULL THEN 'added'
+                    WHEN u.user_id IS NOT NULL THEN 'updated'
+                    WHEN e.user_id IS NOT NULL THEN 'unchanged'
+                    ELSE 'not_found'
+                END as status
+            FROM input i
+            LEFT JOIN upserted u ON u.user_id = i.user_id
+            LEFT JOIN existing e ON e.user_id = i.user_id
+            ORDER BY i.position
+        '''
+        params = {
+            "project_id": project_id,
+            "user_ids": [project_user.user_id for project_user in project_users],
+            "user_roles": [project_user.user_role.value for project_user in project_users]
+        }
+        results = await self.db.execute_sql_async(sql, params)
+        return [BatchItemResult(id=str(result["id"]), status=BatchItemStatus(result["status"])) for result in results]
+
+    async def remove_users_from_project_async(self, project_id: str, user_ids: list[str]) -> list[BatchItemResult]:
+        sql = '''
+            WITH input AS (
+                SELECT user_id, position
+                FROM unnest(CAST(:user_ids AS uuid[])) WITH ORDINALITY AS i(user_id, position)
+            ),
+            removed AS (
+                DELETE FROM user_projects up
+                USING input i
+                WHERE up.project_id = :project_id AND up.user_id = i.user_id
+                RETURNING up.user_id
+            )
+            SELECT i.user_id as id, CASE WHEN r.user_id IS NOT NULL THEN 'removed' ELSE 'not_found' END as status
+            FROM input i
+            LEFT JOIN removed r ON r.user_id = i.user_id
+            ORDER BY i.position
+        '''
+        results = await self.db.execute_sql_async(sql, {"project_id": project_id, "user_ids": user_ids})
+        return [BatchItemResult(id=str(result["id"]), status=BatchItemStatus(result["status"])) for result in results]
+
+    async def link_data_rooms_to_project_async(self, project_id: str, data_room_ids: list[str]) -> list[BatchItemResult]:
+        sql = '''
+            WITH input AS (
+                SELECT data_room_id, position
+                FROM unnest(CAST(:data_room_ids AS uuid[])) WITH ORDINALITY AS i(data_room_id, position)
+            ),
+            existing AS (
+                SELECT pdr.data_room_id
+                FROM project_data_rooms pdr
+                JOIN input i ON pdr.data_room_id = i.data_room_id
+                WHERE pdr.project_id = :project_id
+            ),
+            linked AS (
+                INSERT INTO project_data_rooms (project_id, data_room_id)
+                SELECT p.id, dr.id
+                FROM input i
+                JOIN data_rooms dr ON dr.id = i.data_room_id
+                JOIN projects p ON p.id = :project_id
+                ON CONFLICT (project_id, data_room_id) DO NOTHING
+                RETURNING data_room_id
+            )
+            SELECT
+                i.data_room_id as id,
+                CASE
+                    WHEN l.data_room_id IS NOT NULL THEN 'added'
+                    WHEN e.data_room_id IS NOT NULL THEN 'unchanged'
+                    ELSE 'not_found'
+                END as status
+            FROM input i
+            LEFT JOIN linked l ON l.data_room_id = i.data_room_id
+            LEFT JOIN existing e ON e.data_room_id = i.data_room_id
+            ORDER BY i.position
+        '''
+        results = await self.db.execute_sql_async(sql, {"project_id": project_id, "data_room_ids": data_room_ids})
+        return [BatchItemResult(id=str(result["id"]), status=BatchItemStatus(result["status"])) for result in results]
+
+    async def unlink_data_rooms_from_project_async(self, project_id: str, data_room_ids: list[str]) -> list[BatchItemResult]:
+        sql = '''
+            WITH input AS (
+                SELECT data_room_id, position
+                FROM unnest(CAST(:data_room_ids AS uuid[])) WITH ORDINALITY AS i(data_room_id, position)
+            ),
+            unlinked AS (
+                DELETE FROM project_data_rooms pdr
+                USING input i
+                WHERE pdr.project_id = :project_id AND pdr.data_room_id = i.data_room_id
+                RETURNING pdr.data_room_id
+            )
+            SELECT i.data_room_id as id, CASE WHEN u.data_room_id IS NOT NULL THEN 'removed' ELSE 'not_found' END as status
+            FROM input i
+            LEFT JOIN unlinked u ON u.data_room_id = i.data_room_id
+            ORDER BY i.position
+        '''
+        results = await self.db.execute_sql_async(sql, {"project_id": project_id, "data_room_ids": data_room_ids})
+        return [BatchItemResult(id=str(result["id"]), status=BatchItemStatus(result["status"])) for result in results]
+
+    async def get_project_by_id_async(self, project_id: str, expand: set[ProjectExpansion] | None = None) -> Optional[Project]:
+        project_id = normalize_uuid(project_id)
+        if expand:
+            # Expanded projects are large and rarely requested at once; not worth sharing a load
+            return (await self._load_projects_async([project_id], expand)).get(project_id)
+
+        return await self.project_loader.load_async(project_id)
+
+    async def _load_projects_async(self, project_ids: list[str], expand: set[ProjectExpansion] | None = None) -> dict[str, Project]:
+        expand = expand or set()
 
-        if result:
-            return Project(
+        # Aggregated in scalar subqueries, so the memberships never multiply each other's rows
+        expansions = ""
+        if ProjectExpansion.DATA_ROOMS in expand:
+            expansions += ''',
+                (SELECT COALESCE(json_agg(json_build_object(
+                        'id', dr.id, 'created_at', dr.created_at, 'updated_at', dr.updated_at, 'status', dr.status,
+                        'name', dr.name, 'source', dr.source, 'root_folder_id', dr.root_folder_id,
+                        'client_id', dr.client_id, 'client_secret', dr.client_secret
+                    ) ORDER BY pdr.created_at, pdr.id), '[]')
+                    FROM project_data_rooms pdr
+                        JOIN data_rooms dr ON dr.id = pdr.data_room_id
+                    WHERE pdr.project_id = p.id) AS data_rooms'''
+        if ProjectExpansion.USERS in expand:
+            expansions += ''',
+                (SELECT COALESCE(json_agg(json_build_object(
+                        'user_id', u.id, 'user_auth_provider_user_id', u.auth_provider_user_id,
+                        'user_role', up.user_role, 'user_status', u.status
+                    ) ORDER BY up.created_at, up.id), '[]')
+                    FROM user_projects up
+                        JOIN users u ON u.id = up.user_id
+                    WHERE up.project_id = p.id) AS users'''
+
+        sql = f'''
+            SELECT p.id, p.name, p.description, p.created_at, p.updated_at, p.status,
+                ARRAY(
+                    SELECT pdr.data_room_id::text FROM project_data_rooms pdr
+                    WHERE pdr.project_id = p.id
+                    ORDER BY pdr.created_at, pdr.id
+                ) AS data_room_ids,
+                ARRAY(
+                    SELECT up.id::text FROM user_projects up
+                    WHERE up.project_id = p.id
+                    ORDER BY up.created_at, up.id
+                ) AS accessible_user_project_ids{expansions}
+            FROM projects p
+            WHERE p.id = ANY(CAST(:project_ids AS uuid[]))
+        '''
+        results = await self.db.execute_sql_async(sql, {"project_ids": project_ids}, read_only=True)
+
+        projects = {}
+        for result in results:
+            project = Project(
                 id=str(result["id"]),
                 name=result["name"],
                 description=result["description"],
-                data_room_ids=[],
+                data_room_ids=result["data_room_ids"],
                 created_at=result["created_at"],
                 updated_at=result["updated_at"],
-                status=EntityStatus.ACTIVE,
-                accessible_user_project_ids=[]
+                status=result["status"],
+                accessible_user_project_ids=result["accessible_user_project_ids"]
             )
-        
-        return None
 
-    async def get_project_data_rooms_async(self, project_id: str) -> list[DataRoom]:
-        sql = '''
-            SELECT dr.* FROM data_rooms dr
-            JOIN project_data_rooms pdr ON dr.id = pdr.data_room_id
-            WHERE pdr.project_id = :project_id
+            # Assigned rather than passed as None, so unexpanded fields stay unset and out of the response
+            if ProjectExpansion.DATA_ROOMS in expand:
+                project.data_rooms = DATA_ROOMS_ADAPTER.validate_python(result["data_rooms"])
+            if ProjectExpansion.USERS in expand:
+                project.users = PROJECT_USERS_ADAPTER.validate_python(result["users"])
+            projects[project.id] = project
+
+        return projects
+
+    async def get_project_data_room_rows_async(self, project_id: str, limit: int, cursor: str | None = None) -> Page[dict]:
+        """
+        A page of the project's data rooms in the order they were linked, as rows shaped like DataRoom
+        for responses that skip model validation.
+        """
+        params = {"project_id": project_id, "limit": limit + 1}
+        keyset = ""
+        if cursor:
+            params["after_created_at"], params["after_id"] = decode_created_at_cursor(cursor)
+            keyset = "AND (pdr.created_at, pdr.id) > (:after_created_at, CAST(:after_id AS uuid))"
+
+        # A range scan on (project_id, created_at, id) however deep the page
+        sql = f'''
+            SELECT dr.id::text AS id, dr.created_at, dr.updated_at, dr.status, dr.name, dr.source,
+                dr.root_folder_id::text AS root_folder_id, dr.client_id, dr.client_secret,
+                pdr.created_at AS cursor_created_at, pdr.id AS cursor_id
+            FROM project_data_rooms pdr
+                JOIN data_rooms dr ON dr.id = pdr.data_room_id
+            WHERE pdr.project_id = :project_id {keyset}
+            ORDER BY pdr.created_at, pdr.id
+            LIMIT :limit
         '''
-        results = await self.db.execute_sql_async(sql, {"project_id": project_id})
-        if not results:
-            return []
-        
-        return [DataRoom(
-            id=str(data_room["id"]),
-            name=data_room["name"],
-            source=data_room["source"],
-            created_at=data_room["created_at"],
-            updated_at=data_room["updated_at"],
-            status=data_room["status"],
-            root_folder_id=str(data_room["root_folder_id"]),
-            client_id=data_room["client_id"],
-            client_secret=data_room["client_secret"]
-        ) for data_room in results]
-
-    async def get_project_users_async(self, project_id: str) -> list[ProjectUserOut]:
-        sql = '''
-            SELECT u.id, u.auth_provider_user_id, up.user_role, u.status
-            FROM users u
-                JOIN user_projects up ON u.id = up.user_id
-            WHERE up.project_id = :project_id
+        rows = await self.db.execute_sql_async(sql, params, read_only=True)
+        return to_created_at_page(rows, limit)
+
+    async def get_project_user_rows_async(self, project_id: str, limit: int, cursor: str | None = None) -> Page[dict]:
+        """
+        A page of the project's users in the order they were added, as rows shaped like ProjectUserOut
+        for responses that skip model validation.
+        """
+        params = {"project_id": project_id, "limit": limit + 1}
+        keyset = ""
+        if cursor:
+            params["after_created_at"], params["after_id"] = decode_created_at_cursor(cursor)
+            keyset = "AND (up.created_at, up.id) > (:after_created_at, CAST(:after_id AS uuid))"
+
+        # A range scan on (project_id, created_at, id) however deep the page
+        sql = f'''
+            SELECT u.id::text AS user_id, u.auth_provider_user_id AS user_auth_provider_user_id,
+                up.user_role, u.status AS user_status,
+                up.created_at AS cursor_created_at, up.id AS cursor_id
+            FROM user_projects up
+                JOIN users u ON u.id = up.user_id
+            WHERE up.project_id = :project_id {keyset}
+            ORDER BY up.created_at, up.id
+            LIMIT :limit
         '''
-        results = await self.db.execute_sql_async(sql, {"project_id": project_id})
-        
-        if not results:
-            return []
-
-        return [ProjectUserOut(
-            user_id=str(result["id"]),
-            user_auth_provider_user_id=result["auth_provider_user_id"],
-            user_role=result["user_role"],
-            user_status=result["status"]
-        ) for result in results]
+        rows = await self.db.execute_sql_async(sql, params, read_only=True)
+        return to_created_at_page(rows, limit)
+
+    async def get_project_revision_async(self, project_id: str) -> int | None:
+        project_id = normalize_uuid(project_id)
+        if has_consistent_snapshot():
+            # Read in the request's snapshot, which a shared batch on another connection is not
+            return (await self._load_project_revisions_async([project_id])).get(project_id)
+        return await self.revision_loader.load_async(project_id)
+
+    async def _load_project_revisions_async(self, project_ids: list[str]) -> dict[str, int]:
+        sql = "SELECT id, revision FROM projects WHERE id = ANY(CAST(:project_ids AS uuid[]))"
+        results = await self.db.execute_sql_async(sql, {"project_ids": project_ids}, read_only=True)
+        return {str(result["id"]): result["revision"] for result in results}
@@ -1,10 +1,15 @@
 from core.infrastructure.database.database_client import DatabaseClient
+from core.infrastructure.repositories.data_loader import DataLoader
 from core.models.entity_status import EntityStatus
-from core.models.user import User, UserAccessibleProjectOut, UserIn
+from core.models.page import Page
+from core.models.user import User, UserIn
+from core.utils.cursor import decode_created_at_cursor, to_created_at_page
+from core.utils.ids import normalize_uuid
 
 class UserRepository:
     def __init__(self, db_client: DatabaseClient):
         self.db_client = db_client
+        self.user_loader: DataLoader[str, User] = DataLoader(self._load_users_async)
 
     async def create_user_async(self, user: UserIn) -> User | None:
         sql = '''
@@ -27,39 +32,41 @@ class UserRepository:
         )
     
     async def get_user_async(self, user_id: str) -> User | None:
-        sql = "SELECT * FROM users WHERE id = :id"
-        result = (await self.db_client.execute_sql_async(sql, {"id": user_id}))[0]
+        return await self.user_loader.load_async(normalize_uuid(user_id))
 
-        if not result:
-            return None
-        
-        return User(
+    async def _load_users_async(self, user_ids: list[str]) -> dict[str, User]:
+        sql = "SELECT * FROM users WHERE id = ANY(CAST(:ids AS uuid[]))"
+        results = await self.db_client.execute_sql_async(sql, {"ids": user_ids}, read_only=True)
+
+        return {str(result["id"]): User(
             id=str(result["id"]),
             auth_provider_user_id=result["auth_provider_user_id"],
             created_at=result["created_at"],
             updated_at=result["updated_at"],
             status=EntityStatus.ACTIVE,
             accessible_user_project_ids=[]
-        )
+        ) for result in results}
 
-    async def get_user_accessible_projects_async(self, user_id: str) -> list[UserAccessibleProjectOut]:
-        sql = '''
-            SELECT p.id, p.name, p.description, p.created_at, p.updated_at, p.status, up.user_role
-            FROM projects p
-                JOIN user_projects up ON p.id = up.project_id
-            WHERE up.user_id = :user_id
-        '''
-        results = await self.db_client.execute_sql_async(sql, {"user_id": user_id})
-
-        if not results:
-            return []
+    async def get_user_accessible_project_rows_async(self, user_id: str, limit: int, cursor: str | None = None) -> Page[dict]:
+        """
+        A page of the user's projects in the order the user joined them, as rows shaped like
+        UserAccessibleProjectOut for responses that skip model validation.
+        """
+        params = {"user_id": user_id, "limit": limit + 1}
+        keyset = ""
+        if cursor:
+            params["after_created_at"], params["after_id"] = decode_created_at_cursor(cursor)
+            keyset = "AND (up.created_at, up.id) > (:after_created_at, CAST(:after_id AS uuid))"
 
-        return [UserAccessibleProjectOut(
-            id=str(result["id"]),
-            name=result["name"],
-            description=result["description"],
-            created_at=result["created_at"],
-            updated_at=result["updated_at"],
-            role=result["user_role"],
-            status=result["status"]
-        ) for result in results]
\ No newline at end of file
+        # A range scan on (user_id, created_at, id) however deep the page
+        sql = f'''
+            SELECT p.id::text AS id, p.name, p.description, p.created_at, p.updated_at, p.status, up.user_role AS role,
+                up.created_at AS cursor_created_at, up.id AS cursor_id
+            FROM user_projects up
+                JOIN projects p ON p.id = up.project_id
+            WHERE up.user_id = :user_id {keyset}
+            ORDER BY up.created_at, up.id
+            LIMIT :limit
+        '''
+        rows = await self.db_client.execute_sql_async(sql, params, read_only=True)
+        return to_created_at_page(rows, limit)
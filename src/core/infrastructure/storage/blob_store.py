@@ -0,0 +1,48 @@
+import asyncio
+from abc import ABC, abstractmethod
+from typing import AsyncIterator
+
+
+class BlobStore(ABC):
+    """Content-addressed storage for document bodies, keyed by the SHA-256 hex digest of the bytes."""
+
+    @abstractmethod
+    async def put_async(self, content: bytes) -> str:
+        """Store the content if it is not stored yet and return its hash."""
+
+    async def put_many_async(self, contents: list[bytes]) -> list[str]:
+        """Store several contents at once and return their hashes in order; backends can batch the writes."""
+        return list(await asyncio.gather(*(self.put_async(content) for content in contents)))
+
+    @abstractmethod
+    async def read_async(self, content_hash: str) -> bytes | None:
+        """Return the whole blob, or None if it does not exist."""
+
+    @abstractmethod
+    async def get_size_async(self, content_hash: str) -> int | None:
+        """Return the blob size in bytes, or None if it does not exist."""
+
+    @abstractmethod
+    def read_range_async(self, content_hash: str, start: int, end: int) -> AsyncIterator[bytes]:
+        """Yield the bytes in [start, end) of the blob in chunks."""
+
+    @abstractmethod
+    async def append_upload_async(self, upload_id: str, offset: int, chunks: AsyncIterator[bytes]) -> int:
+        """
+        Append chunks to a staged upload that currently holds exactly `offset` bytes and return its new size.
+
+        Raises ConflictError if the staged size is not `offset`. Callers make sure that a single request
+        appends to or commits an upload at a time.
+        """
+
+    @abstractmethod
+    async def get_upload_size_async(self, upload_id: str) -> int:
+        """Return the number of bytes staged so far, 0 for an upload that has not started."""
+
+    @abstractmethod
+    async def commit_upload_async(self, upload_id: str) -> tuple[str, int]:
+        """Store a copy of a staged upload as a blob and return its hash and size; the staged bytes are kept until deleted."""
+
+    @abstractmethod
+    async def delete_upload_async(self, upload_id: str) -> None:
+        """Discard a staged upload, if any."""
@@ -0,0 +1,245 @@
+import asyncio
+import hashlib
+import mmap
+import os
+import re
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import AsyncIterator, BinaryIO
+
+from core.exceptions import ConflictError
+from core.infrastructure.storage.blob_store import BlobStore
+
+CONTENT_HASH_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+UPLOAD_ID_PATTERN = re.compile(r"^[0-9a-f-]{36}$")
+
+# Threads syncing the blobs of a batch write
+BLOB_SYNC_CONCURRENCY = 16
+
+
+class LocalFileBlobStore(BlobStore):
+    """
+    Blobs as files under `root_path`, fanned out as ab/cd/<hash> to keep directories small.
+
+    Writes go to a temporary file in the target directory and are renamed into place, so a blob
+    is either absent or complete. Range reads are served from a read-only memory map.
+
+    Uploads are staged under uploads/ and hashed as their chunks arrive. The running hash only lives
+    in memory, so an upload resumed after a restart or on another worker is hashed again from disk when
+    it is committed. Committing copies the staged bytes, the blob never shares a file with an upload.
+    """
+
+    def __init__(self, root_path: str, chunk_size: int = 1024 * 1024):
+        self.root_path = Path(root_path)
+        self.chunk_size = chunk_size
+        self._upload_hashes: dict[str, tuple["hashlib._Hash", int]] = {}
+
+    async def put_async(self, content: bytes) -> str:
+        content_hash = hashlib.sha256(content).hexdigest()
+        await asyncio.to_thread(self._write_blob, content_hash, content)
+        return content_hash
+
+    async def put_many_async(self, contents: list[bytes]) -> list[str]:
+        content_hashes = [hashlib.sha256(content).hexdigest() for content in contents]
+        await asyncio.to_thread(self._write_blobs, dict(zip(content_hashes, contents)))
+        return content_hashes
+
+    async def read_async(self, content_hash: str) -> bytes | None:
+        try:
+            return await asyncio.to_thread(self._get_blob_path(content_hash).read_bytes)
+        except FileNotFoundError:
+            return None
+
+    async def get_size_async(self, content_hash: str) -> int | None:
+        try:
+            return (await asyncio.to_thread(os.stat, self._get_blob_path(content_hash))).st_size
+        except FileNotFoundError:
+            return None
+
+    async def read_range_async(self, content_hash: str, start: int, end: int) -> AsyncIterator[bytes]:
+        if start >= end:
+            return
+
+        with await asyncio.to_thread(_map_file, self._get_blob_path(content_hash)) as mapped:
+            end = min(end, len(mapped))
+            for offset in range(start, end, self.chunk_size):
+                # Page faults on a cold cache would otherwise block the event loop
+                yield await asyncio.to_thread(mapped.__getitem__, slice(offset, min(offset + self.chunk_size, end)))
+
+    async def append_upload_async(self, upload_id: str, offset: int, chunks: AsyncIterator[bytes]) -> int:
+        path = self._get_upload_path(upload_id)
+        await asyncio.to_thread(path.parent.mkdir, parents=True, exist_ok=True)
+        with await asyncio.to_thread(open, path, "ab") as file:
+            size = file.tell()
+            if size != offset:
+                raise ConflictError(f"The upload is at offset {size}, not {offset}.")
+
+            hasher, hashed_size = self._upload_hashes.pop(upload_id, (hashlib.sha256(), 0))
+            if hashed_size != size:
+                hasher = None
+
+            try:
+                async for chunk in chunks:
+                    await asyncio.to_thread(self._write_upload_chunk, file, hasher, chunk)
+                    size += len(chunk)
+            finally:
+                # Keep whatever arrived before a dropped connection, it is where the client resumes from
+                await asyncio.to_thread(file.flush)
+                if hasher is not None:
+                    self._upload_hashes[upload_id] = (hasher, size)
+
+        return size
+
+    async def get_upload_size_async(self, upload_id: str) -> int:
+        try:
+            return (await asyncio.to_thread(os.stat, self._get_upload_path(upload_id))).st_size
+        except FileNotFoundError:
+            return 0
+
+    async def commit_upload_async(self, upload_id: str) -> tuple[str, int]:
+        path = self._get_upload_path(upload_id)
+        size = await self.get_upload_size_async(upload_id)
+        hasher, hashed_size = self._upload_hashes.pop(upload_id, (None, 0))
+        if hashed_size != size:
+            hasher = None
+
+        content_hash = await asyncio.to_thread(self._copy_upload_to_blob, path, size, hasher)
+        return content_hash, size
+
+    async def delete_upload_async(self, upload_id: str) -> None:
+        self._upload_hashes.pop(upload_id, None)
+        try:
+            await asyncio.to_thread(os.unlink, self._get_upload_path(upload_id))
+        except FileNotFoundError:
+            pass
+
+    def _write_upload_chunk(self, file: BinaryIO, hasher: "hashlib._Hash | None", chunk: bytes) -> None:
+        file.write(chunk)
+        if hasher is not None:
+            hasher.update(chunk)
+
+    def _copy_upload_to_blob(self, upload_path: Path, size: int, hasher: "hashlib._Hash | None") -> str:
+        """Copy the first `size` staged bytes into their blob and return its hash, hashing them on the way if needed."""
+        if hasher is not None and self._get_blob_path(hasher.hexdigest()).exists():
+            return hasher.hexdigest()
+
+        # The temporary file sits next to the staged one, on the file system of the blobs it is renamed to
+        fd, temp_path = tempfile.mkstemp(dir=upload_path.parent, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as temp_file:
+                copy_hasher = hashlib.sha256() if hasher is None else None
+                if size > 0:
+                    with open(upload_path, "rb") as file:
+                        remaining = size
+                        while remaining > 0:
+                            chunk = file.read(min(self.chunk_size, remaining))
+                            if not chunk:
+                                raise ConflictError("The upload was deleted while it was being completed.")
+                            temp_file.write(chunk)
+                            if copy_hasher is not None:
+                                copy_hasher.update(chunk)
+                            remaining -= len(chunk)
+                temp_file.flush()
+                os.fsync(temp_file.fileno())
+
+            content_hash = (hasher or copy_hasher).hexdigest()
+            path = self._get_blob_path(content_hash)
+            if path.exists():
+                os.unlink(temp_path)
+                return content_hash
+
+            path.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(temp_path, path)
+            _fsync_directory(path.parent)
+            return content_hash
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+            raise
+
+    def _write_blob(self, content_hash: str, content: bytes) -> None:
+        path = self._get_blob_path(content_hash)
+        if path.exists():
+            return
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as file:
+                file.write(content)
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(temp_path, path)
+            _fsync_directory(path.parent)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+            raise
+
+    def _write_blobs(self, contents_by_hash: dict[str, bytes]) -> None:
+        # The fsyncs run side by side instead of one blob after the other, which dominates for many small files
+        temp_suffix = f".tmp-{os.getpid()}-{threading.get_ident()}"
+        pending: list[tuple[str, str, bytes]] = []
+        touched_directories: set[str] = set()
+        for content_hash, content in contents_by_hash.items():
+            path = str(self._get_blob_path(content_hash))
+            if os.path.exists(path):
+                continue
+
+            directory = os.path.dirname(path)
+            if directory not in touched_directories:
+                os.makedirs(directory, exist_ok=True)
+                touched_directories.add(directory)
+            pending.append((path + temp_suffix, path, content))
+
+        if not pending:
+            return
+
+        try:
+            with ThreadPoolExecutor(max_workers=min(BLOB_SYNC_CONCURRENCY, len(pending))) as executor:
+                list(executor.map(_write_synced_file, [temp_path for temp_path, _, _ in pending], [content for _, _, content in pending]))
+            for temp_path, path, _ in pending:
+                os.replace(temp_path, path)
+            for directory in touched_directories:
+                _fsync_directory(directory)
+        finally:
+            for temp_path, _, _ in pending:
+                if os.path.exists(temp_path):
+                    os.unlink(temp_path)
+
+    def _get_blob_path(self, content_hash: str) -> Path:
+        # Hashes end up in file paths, so never accept anything but a digest
+        if not CONTENT_HASH_PATTERN.match(content_hash):
+            raise ValueError(f"Invalid content hash '{content_hash}'.")
+
+        return self.root_path / content_hash[:2] / content_hash[2:4] / content_hash
+
+    def _get_upload_path(self, upload_id: str) -> Path:
+        if not UPLOAD_ID_PATTERN.match(upload_id):
+            raise ValueError(f"Invalid upload id '{upload_id}'.")
+
+        return self.root_path / "uploads" / upload_id
+
+
+def _fsync_directory(path: Path | str) -> None:
+    """Make the entries renamed into a directory durable, the file contents being synced on their own."""
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _write_synced_file(path: str, content: bytes) -> None:
+    with open(path, "wb") as file:
+        file.write(content)
+        file.flush()
+        os.fdatasync(file.fileno())
+
+
+def _map_file(path: Path) -> mmap.mmap:
+    # The mapping outlives the file object, it holds a descriptor of its own
+    with open(path, "rb") as file:
+        return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
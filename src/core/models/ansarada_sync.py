@@ -0,0 +1,36 @@
+from typing import Literal
+from pydantic import BaseModel
+from core.models.entity_status import EntityStatus
+
+class AnsaradaIndexItem(BaseModel):
+    # An item of an Ansarada document index, mirrored as a folder or a document
+    external_id: str
+    type: Literal["Folder", "Document"]
+    name: str
+    status: EntityStatus
+
+    # None for items at the top of the index, which go below the data room root folder
+    parent_external_id: str | None
+
+    # SHA-256 of the Ansarada fields, compared against the mirrored row to skip unchanged items
+    sync_hash: str
+
+    # Documents only
+    content_type: str | None = None
+    content_size: int | None = None
+
+class AnsaradaSyncResult(BaseModel):
+    data_room_id: str
+    item_count: int
+    changed_count: int
+    deleted_count: int
+
+class AnsaradaSyncState(BaseModel):
+    data_room_id: str
+    external_id: str
+    root_folder_id: str
+    client_id: str
+    client_secret: str
+
+    # Of the last successful sync, None before the first
+    index_hash: str | None
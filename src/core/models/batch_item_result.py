@@ -0,0 +1,6 @@
+from pydantic import BaseModel
+from core.models.batch_item_status import BatchItemStatus
+
+class BatchItemResult(BaseModel):
+    id: str
+    status: BatchItemStatus
\ No newline at end of file
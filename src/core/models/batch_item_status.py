@@ -0,0 +1,8 @@
+from enum import Enum
+
+class BatchItemStatus(Enum):
+    ADDED = "added"
+    UPDATED = "updated"
+    UNCHANGED = "unchanged"
+    REMOVED = "removed"
+    NOT_FOUND = "not_found"
\ No newline at end of file
@@ -0,0 +1,10 @@
+from pydantic import BaseModel
+
+class CacheStats(BaseModel):
+    entries: int
+    bytes: int
+    max_entries: int
+    max_bytes: int
+    hits: int
+    misses: int
+    evictions: int
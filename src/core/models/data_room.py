@@ -5,7 +5,9 @@ from core.models.data_room_source import DataRoomSource
 class DataRoom(BaseEntity):
     name: str
     source: DataRoomSource
-    root_folder_id: str
+
+    # None once the root folder has been deleted
+    root_folder_id: str | None
 
     # Only available for Ansarada sources
     client_id: str | None
@@ -16,4 +18,7 @@ class DataRoomIn(BaseModel):
     name: str
     source: DataRoomSource
     client_id: str | None = None
-    client_secret: str | None = None
\ No newline at end of file
+    client_secret: str | None = None
+
+    # Id of the data room in Ansarada, which the sync mirrors from
+    external_id: str | None = None
\ No newline at end of file
@@ -1,13 +1,19 @@
 from pydantic import BaseModel
 from core.models.base_entity import BaseEntity
 
+DEFAULT_CONTENT_TYPE = "text/plain; charset=utf-8"
+
 class Document(BaseEntity):
     name: str
-    content: str
+    content: str | None
     data_room_id: str
+    content_hash: str | None = None
+    content_size: int | None = None
+    content_type: str | None = None
 
 class DocumentIn(BaseModel):
     name: str
     content: str
     data_room_id: str
-    folder_id: str
\ No newline at end of file
+    folder_id: str
+    content_type: str = DEFAULT_CONTENT_TYPE
@@ -0,0 +1,14 @@
+from datetime import datetime
+from pydantic import BaseModel
+
+class DocumentSearchHit(BaseModel):
+    id: str
+    data_room_id: str
+    folder_id: str | None
+    name: str
+    content_type: str | None
+    updated_at: datetime
+    rank: float
+
+    # HTML excerpt of the body, or of the name: the text is escaped and matches are wrapped in <mark> tags
+    snippet: str
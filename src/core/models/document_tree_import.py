@@ -0,0 +1,23 @@
+from typing import Literal
+from pydantic import BaseModel, Field
+from core.models.document import DEFAULT_CONTENT_TYPE
+
+class DocumentTreeImportNodeIn(BaseModel):
+    # Generated by the client so children can reference a folder before it exists
+    id: str
+    type: Literal["Folder", "Document"]
+    name: str = Field(min_length=1, max_length=255)
+
+    # A folder in the same manifest, or None for the folder being imported into
+    parent_folder_id: str | None = None
+
+    # Documents only
+    content: str = ""
+    content_type: str = DEFAULT_CONTENT_TYPE
+
+class DocumentTreeImportIn(BaseModel):
+    nodes: list[DocumentTreeImportNodeIn]
+
+class DocumentTreeImportOut(BaseModel):
+    folder_count: int
+    document_count: int
\ No newline at end of file
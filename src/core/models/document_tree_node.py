@@ -0,0 +1,21 @@
+from pydantic import BaseModel
+from datetime import datetime
+from core.models.entity_status import EntityStatus
+
+class DocumentTreeNode(BaseModel):
+    type: str
+    id: str
+    name: str
+    data_room_id: str
+
+    # The parent folder for folders, the containing folder for documents; None only for the data room root
+    parent_folder_id: str | None
+    created_at: datetime
+    updated_at: datetime
+    status: EntityStatus
+
+    # Documents only; `content` is filled in only when requested
+    content: str | None = None
+    content_hash: str | None = None
+    content_size: int | None = None
+    content_type: str | None = None
\ No newline at end of file
@@ -0,0 +1,23 @@
+from pydantic import BaseModel
+from core.models.base_entity import BaseEntity
+from core.models.document import DEFAULT_CONTENT_TYPE
+
+class DocumentUpload(BaseEntity):
+    name: str
+    content_type: str
+    data_room_id: str
+    folder_id: str
+
+    # Declared total size, if the client knew it up front
+    size: int | None
+
+    # Bytes received so far; the next chunk must start here
+    offset: int = 0
+    document_id: str | None = None
+
+class DocumentUploadIn(BaseModel):
+    name: str
+    data_room_id: str
+    folder_id: str
+    content_type: str = DEFAULT_CONTENT_TYPE
+    size: int | None = None
\ No newline at end of file
@@ -0,0 +1,16 @@
+from pydantic import BaseModel
+from datetime import datetime
+from core.models.entity_status import EntityStatus
+
+class FolderChild(BaseModel):
+    type: str
+    id: str
+    name: str
+    data_room_id: str
+    parent_folder_id: str
+    created_at: datetime
+    updated_at: datetime
+    status: EntityStatus
+
+    # Folders only, true when the folder holds any active folder or document
+    has_children: bool
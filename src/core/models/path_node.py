@@ -0,0 +1,15 @@
+from pydantic import BaseModel
+from datetime import datetime
+from core.models.entity_status import EntityStatus
+
+class PathNode(BaseModel):
+    type: str
+    id: str
+    name: str
+    data_room_id: str
+
+    # None for the root folder of the data room
+    parent_folder_id: str | None
+    created_at: datetime
+    updated_at: datetime
+    status: EntityStatus
@@ -1,8 +1,15 @@
 from pydantic import BaseModel
 from core.models.base_entity import BaseEntity
+from core.models.data_room import DataRoom
 from core.models.entity_status import EntityStatus
 from core.models.user_role import UserRole
 
+class ProjectUserOut(BaseModel):
+    user_id: str
+    user_auth_provider_user_id: str
+    user_role: UserRole
+    user_status: EntityStatus
+
 class Project(BaseEntity):
     id: str
     name: str
@@ -10,12 +17,10 @@ class Project(BaseEntity):
     data_room_ids: list[str]
     accessible_user_project_ids: list[str]
 
+    # Only set when expanded
+    data_rooms: list[DataRoom] | None = None
+    users: list[ProjectUserOut] | None = None
+
 class ProjectIn(BaseModel):
     name: str
     description: str | None
-
-class ProjectUserOut(BaseModel):
-    user_id: str
-    user_auth_provider_user_id: str
-    user_role: UserRole
-    user_status: EntityStatus
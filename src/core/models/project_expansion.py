@@ -0,0 +1,5 @@
+from enum import Enum
+
+class ProjectExpansion(Enum):
+    DATA_ROOMS = "data_rooms"
+    USERS = "users"
\ No newline at end of file
@@ -10,4 +10,8 @@ class UserProject(BaseEntity):
 class UserProjectIn(BaseModel):
     user_id: str
     project_id: str
+    user_role: UserRole
+
+class ProjectUserRoleIn(BaseModel):
+    user_id: str
     user_role: UserRole
\ No newline at end of file
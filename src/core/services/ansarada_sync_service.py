@@ -0,0 +1,249 @@
+import asyncio
+import contextvars
+import hashlib
+import json
+import logging
+import mimetypes
+import os
+import time
+from typing import Any
+from core.exceptions import ConflictError, InvalidRequestError
+from core.infrastructure.proxies.ansarada.ansarada_api import AnsaradaApi
+from core.infrastructure.repositories.ansarada_sync_repository import AnsaradaSyncRepository
+from core.models.ansarada_sync import AnsaradaIndexItem, AnsaradaSyncResult
+from core.models.entity_status import EntityStatus
+from core.services.document_tree_service import DocumentTreeService
+from core.utils.ids import normalize_uuid
+
+logger = logging.getLogger(__name__)
+
+
+class SyncInProgressError(ConflictError):
+    """Raised when another worker is writing a sync of the same data room."""
+
+
+class AnsaradaSyncService:
+    """Mirror the document index of Ansarada data rooms into their folders and documents."""
+
+    def __init__(
+            self,
+            sync_repository: AnsaradaSyncRepository,
+            ansarada_api: AnsaradaApi,
+            document_tree_service: DocumentTreeService,
+            page_size: int = 100,
+            folder_batch_size: int = 50,
+            max_concurrent_requests: int = 4
+        ):
+        self.sync_repository = sync_repository
+        self.ansarada_api = ansarada_api
+        self.document_tree_service = document_tree_service
+        self.page_size = page_size
+        self.folder_batch_size = folder_batch_size
+        self.max_concurrent_requests = max_concurrent_requests
+
+        # client_id -> (access token, monotonic time to renew it at)
+        self._access_tokens: dict[str, tuple[str, float]] = {}
+        self._syncs: dict[str, asyncio.Task[AnsaradaSyncResult | None]] = {}
+
+    async def sync_data_room_async(self, data_room_id: str) -> AnsaradaSyncResult | None:
+        data_room_id = normalize_uuid(data_room_id)
+
+        # A data room already being synced by this process is not walked twice, callers wait for the running
+        # sync. Other workers may walk it too, apply_sync_async keeps them from writing it at the same time.
+        sync = self._syncs.get(data_room_id)
+        if sync is None:
+            # Commits on its own, whichever request started it
+            sync = asyncio.get_running_loop().create_task(self._sync_data_room_async(data_room_id), context=contextvars.Context())
+            sync.add_done_callback(lambda _: self._syncs.pop(data_room_id, None))
+            self._syncs[data_room_id] = sync
+
+        return await asyncio.shield(sync)
+
+    async def sync_all_async(self) -> list[AnsaradaSyncResult]:
+        results = []
+        for data_room_id in await self.sync_repository.get_syncable_data_room_ids_async():
+            try:
+                result = await self.sync_data_room_async(data_room_id)
+            except SyncInProgressError:
+                logger.info("Skipped Ansarada data room %s, another worker is syncing it", data_room_id)
+                continue
+            except Exception:
+                logger.exception("Syncing Ansarada data room %s failed", data_room_id)
+                continue
+
+            if result is not None:
+                results.append(result)
+        return results
+
+    async def run_periodically_async(self, interval_seconds: float) -> None:
+        while True:
+            started = time.monotonic()
+            try:
+                results = await self.sync_all_async()
+                logger.info(
+                    "Synced %d Ansarada data rooms in %.1fs, %d rows changed, %d deleted",
+                    len(results), time.monotonic() - started,
+                    sum(result.changed_count for result in results), sum(result.deleted_count for result in results),
+                )
+            except Exception:
+                logger.exception("Syncing Ansarada data rooms failed")
+
+            await asyncio.sleep(max(0.0, interval_seconds - (time.monotonic() - started)))
+
+    async def _sync_data_room_async(self, data_room_id: str) -> AnsaradaSyncResult | None:
+        state = await self.sync_repository.get_sync_state_async(data_room_id)
+        if state is None:
+            return None
+
+        # The whole index is read before the first write, so no connection is held while Ansarada answers
+        access_token = await self._get_access_token_async(state.client_id, state.client_secret)
+        folder_levels, documents = await self._fetch_document_index_async(access_token, state.external_id)
+
+        items = [folder for folders in folder_levels for folder in folders] + documents
+        index_hash = hashlib.sha256("".join(sorted(item.sync_hash for item in items)).encode("utf-8")).hexdigest()
+        if index_hash == state.index_hash:
+            await self.sync_repository.record_unchanged_sync_async(data_room_id)
+            return AnsaradaSyncResult(data_room_id=data_room_id, item_count=len(items), changed_count=0, deleted_count=0)
+
+        applied = await self.sync_repository.apply_sync_async(state, folder_levels, documents, index_hash)
+        if applied is None:
+            raise SyncInProgressError("The data room is being synced by another worker.")
+
+        changed_count, deleted_count = applied
+        if changed_count or deleted_count:
+            await self.document_tree_service.invalidate_data_room_async(data_room_id)
+
+        return AnsaradaSyncResult(
+            data_room_id=data_room_id,
+            item_count=len(items),
+            changed_count=changed_count,
+            deleted_count=deleted_count,
+        )
+
+    async def _fetch_document_index_async(
+            self,
+            access_token: str,
+            external_id: str
+        ) -> tuple[list[list[AnsaradaIndexItem]], list[AnsaradaIndexItem]]:
+        """Walk the index breadth-first, returning its folders level by level and its documents."""
+        semaphore = asyncio.Semaphore(self.max_concurrent_requests)
+        folder_levels: list[list[AnsaradaIndexItem]] = []
+        documents: list[AnsaradaIndexItem] = []
+        seen_ids: set[str] = set()
+
+        # The children of several folders are listed by one paginated query
+        folder_id_batches: list[list[str] | None] = [None]
+        while folder_id_batches:
+            batches = await asyncio.gather(*(
+                self._fetch_index_items_async(semaphore, access_token, external_id, folder_ids)
+                for folder_ids in folder_id_batches
+            ))
+
+            folders = []
+            parent_ids = []
+            for nodes in batches:
+                for node in nodes:
+                    if node["id"] in seen_ids:
+                        continue
+                    seen_ids.add(node["id"])
+
+                    item = _to_index_item(node)
+                    if item.type == "Folder":
+                        folders.append(item)
+                        if node.get("hasChildren"):
+                            parent_ids.append(item.external_id)
+                    else:
+                        documents.append(item)
+
+            if folders:
+                folder_levels.append(folders)
+            folder_id_batches = [
+                parent_ids[i:i + self.folder_batch_size] for i in range(0, len(parent_ids), self.folder_batch_size)
+            ]
+
+        _make_sibling_names_unique([folder for folders in folder_levels for folder in folders])
+        _make_sibling_names_unique(documents)
+        return folder_levels, documents
+
+    async def _fetch_index_items_async(
+            self,
+            semaphore: asyncio.Semaphore,
+            access_token: str,
+            external_id: str,
+            folder_ids: list[str] | None
+        ) -> list[dict[str, Any]]:
+        nodes = []
+        after = None
+        while True:
+            async with semaphore:
+                response = await self.ansarada_api.get_document_index_items_async(
+                    access_token, external_id, folder_ids, self.page_size, after
+                )
+
+            index = response["dataRoomDocumentIndex"]
+            if index is None or index["items"] is None:
+                raise InvalidRequestError(f"Ansarada data room '{external_id}' has no document index.")
+
+            nodes.extend(index["items"]["nodes"] or [])
+            page_info = index["items"]["pageInfo"]
+            if not page_info["hasNextPage"] or not page_info["endCursor"]:
+                return nodes
+            after = page_info["endCursor"]
+
+    async def _get_access_token_async(self, client_id: str, client_secret: str) -> str:
+        cached = self._access_tokens.get(client_id)
+        if cached is not None and cached[1] > time.monotonic():
+            return cached[0]
+
+        access_token, expires_in = await self.ansarada_api.get_access_token_async(client_id, client_secret)
+
+        # Renewed a minute early, so a token does not expire halfway through a walk
+        self._access_tokens[client_id] = (access_token, time.monotonic() + max(0, expires_in - 60))
+        return access_token
+
+
+def _to_index_item(node: dict[str, Any]) -> AnsaradaIndexItem:
+    # Gaining or losing children is not a change of the folder row itself
+    hashed_fields = {key: value for key, value in node.items() if key != "hasChildren"}
+    sync_hash = hashlib.sha256(json.dumps(hashed_fields, sort_keys=True).encode("utf-8")).hexdigest()
+    status = EntityStatus.ACTIVE if node["status"] == "ENABLED" else EntityStatus.DISABLED
+
+    if node["__typename"] == "DataRoomFolder":
+        return AnsaradaIndexItem(
+            external_id=node["id"],
+            type="Folder",
+            name=node["name"][:255],
+            status=status,
+            parent_external_id=node["parentId"],
+            sync_hash=sync_hash,
+        )
+
+    file = node.get("file") or {}
+    extension = file.get("extension")
+    return AnsaradaIndexItem(
+        external_id=node["id"],
+        type="Document",
+        name=node["name"][:255],
+        status=status,
+        parent_external_id=node["parentId"],
+        sync_hash=sync_hash,
+        content_type=mimetypes.guess_type(f"document.{extension}")[0] if extension else None,
+        content_size=int(file["size"]) if file.get("size") is not None else None,
+    )
+
+
+def _make_sibling_names_unique(items: list[AnsaradaIndexItem]) -> None:
+    """Ansarada allows siblings with the same name, the mirror does not: all but the first by id get their id appended."""
+    siblings: dict[tuple[str | None, str], list[AnsaradaIndexItem]] = {}
+    for item in items:
+        if item.status == EntityStatus.ACTIVE:
+            siblings.setdefault((item.parent_external_id, item.name), []).append(item)
+
+    for duplicates in siblings.values():
+        for item in sorted(duplicates, key=lambda duplicate: duplicate.external_id)[1:]:
+            stem, extension = os.path.splitext(item.name) if item.type == "Document" else (item.name, "")
+            suffix = f" ({item.external_id}){extension}"
+            item.name = stem[:255 - len(suffix)] + suffix
+
+            # A row renamed here has to be written even though Ansarada did not change it
+            item.sync_hash = hashlib.sha256(f"{item.sync_hash}{item.name}".encode("utf-8")).hexdigest()
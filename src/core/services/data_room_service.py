@@ -1,39 +1,164 @@
+import asyncio
+import contextvars
+import hashlib
 from datetime import datetime
+from typing import AsyncIterator
 from core.infrastructure.proxies.ansarada.ansarada_api import AnsaradaApi
 from core.infrastructure.repositories.data_room_repository import DataRoomRepository
 from core.models.data_room import DataRoom, DataRoomIn
 from core.models.data_room_source import DataRoomSource
 from core.models.entity_status import EntityStatus
+from core.utils.lru_cache import LruCache
+
+# About what a data room takes serialized besides its name
+DATA_ROOM_SIZE_BYTES = 250
 
 
 class DataRoomService:
-    def __init__(self, data_room_repository: DataRoomRepository, ansarada_api: AnsaradaApi):
+    def __init__(
+            self,
+            data_room_repository: DataRoomRepository,
+            ansarada_api: AnsaradaApi,
+            ansarada_cache: LruCache[str, list[DataRoom]] | None = None,
+            ansarada_page_size: int = 100
+        ):
         self.data_room_repository = data_room_repository
         self.ansarada_api = ansarada_api
+        # Keyed by a hash of the access token
+        self.ansarada_cache = ansarada_cache or LruCache(max_entries=1024, max_bytes=32 * 1024 * 1024, ttl_seconds=60)
+        self.ansarada_page_size = ansarada_page_size
+        self._ansarada_fetches: dict[str, _AnsaradaDataRoomsFetch] = {}
 
     async def create_data_room_with_root_folder_async(self, data_room: DataRoomIn) -> DataRoom:
         return await self.data_room_repository.create_data_room_with_root_folder_async(data_room)
 
+    async def create_data_rooms_with_root_folders_async(self, data_rooms: list[DataRoomIn]) -> list[DataRoom]:
+        return await self.data_room_repository.create_data_rooms_with_root_folders_async(data_rooms)
+
     async def get_data_room_by_id_async(self, id: str) -> DataRoom | None:
         return await self.data_room_repository.get_data_room_by_id_async(id)
 
-    async def get_ansarada_data_rooms_async(self, access_token: str, first: int = 10) -> list[DataRoom]:
-        response = await self.ansarada_api.get_data_rooms_async(access_token, first)
-
-        data_rooms = []
-        data_room_users = response["me"]["dataRoomUsers"]["nodes"]
-        for data_room_user in data_room_users:
-            data_room = data_room_user["dataRoom"]
-            data_rooms.append(DataRoom(
-                id=f"{DataRoomSource.ANSARADA.value}_{data_room['id']}",
-                name=data_room["displayName"], 
-                created_at=datetime.now(), 
-                updated_at=datetime.now(), 
-                source=DataRoomSource.ANSARADA,
-                status=EntityStatus.ACTIVE,
-                root_folder_id="",
-                client_id=None,
-                client_secret=None
-            ))
-
-        return data_rooms
+    async def get_data_room_revision_async(self, id: str) -> int | None:
+        return await self.data_room_repository.get_data_room_revision_async(id)
+
+    async def get_ansarada_data_rooms_async(self, access_token: str, first: int | None = None) -> list[DataRoom]:
+        """The data rooms of the access token, only the first `first` if given."""
+        key = _hash_access_token(access_token)
+        data_rooms = self.ansarada_cache.get(key)
+        if data_rooms is not None:
+            return data_rooms[:first]
+
+        if first is None:
+            return await self._get_ansarada_fetch(key, access_token).wait_async()
+        # The walk goes on to fill the cache, this request does not wait for it
+        return [data_room async for data_room in self.stream_ansarada_data_rooms_async(access_token, first)]
+
+    async def stream_ansarada_data_rooms_async(self, access_token: str, first: int | None = None) -> AsyncIterator[DataRoom]:
+        """Yield the data rooms of the access token as their pages arrive from Ansarada, only the first `first` if given."""
+        key = _hash_access_token(access_token)
+        data_rooms = self.ansarada_cache.get(key)
+        if data_rooms is not None:
+            for data_room in data_rooms[:first]:
+                yield data_room
+            return
+
+        count = 0
+        async for data_room in self._get_ansarada_fetch(key, access_token).iterate_async():
+            yield data_room
+            count += 1
+            # Without waiting for the page after the last one wanted
+            if count == first:
+                return
+
+    def _get_ansarada_fetch(self, key: str, access_token: str) -> "_AnsaradaDataRoomsFetch":
+        # Requests arriving while the data rooms of the token are being fetched share that fetch
+        fetch = self._ansarada_fetches.get(key)
+        if fetch is None:
+            fetch = _AnsaradaDataRoomsFetch(self._walk_ansarada_data_rooms_async(access_token))
+            fetch.task.add_done_callback(lambda _: self._complete_ansarada_fetch(key, fetch))
+            self._ansarada_fetches[key] = fetch
+        return fetch
+
+    def _complete_ansarada_fetch(self, key: str, fetch: "_AnsaradaDataRoomsFetch") -> None:
+        del self._ansarada_fetches[key]
+        if fetch.error is None:
+            size = sum(DATA_ROOM_SIZE_BYTES + len(data_room.name) for data_room in fetch.data_rooms)
+            self.ansarada_cache.set(key, fetch.data_rooms, size)
+
+    async def _walk_ansarada_data_rooms_async(self, access_token: str) -> AsyncIterator[list[DataRoom]]:
+        after = None
+        while True:
+            response = await self.ansarada_api.get_data_rooms_async(access_token, self.ansarada_page_size, after)
+            data_room_users = response["me"]["dataRoomUsers"]
+            yield [_to_ansarada_data_room(node["dataRoom"]) for node in data_room_users["nodes"]]
+
+            page_info = data_room_users["pageInfo"]
+            if not page_info["hasNextPage"] or not page_info["endCursor"]:
+                return
+            after = page_info["endCursor"]
+
+
+class _AnsaradaDataRoomsFetch:
+    """One walk over the data room pages of an access token, read by every request that joins it."""
+
+    def __init__(self, pages: AsyncIterator[list[DataRoom]]):
+        self.data_rooms: list[DataRoom] = []
+        self.error: Exception | None = None
+        self._changed = asyncio.Event()
+
+        # Not part of the request that happened to start it, which may go away before the others
+        self.task = asyncio.get_running_loop().create_task(self._run_async(pages), context=contextvars.Context())
+
+    async def wait_async(self) -> list[DataRoom]:
+        await asyncio.shield(self.task)
+        if self.error is not None:
+            raise self.error
+        return self.data_rooms
+
+    async def iterate_async(self) -> AsyncIterator[DataRoom]:
+        index = 0
+        while True:
+            changed = self._changed
+            while index < len(self.data_rooms):
+                yield self.data_rooms[index]
+                index += 1
+
+            if self.task.done():
+                if self.error is not None:
+                    raise self.error
+                return
+
+            await changed.wait()
+
+    async def _run_async(self, pages: AsyncIterator[list[DataRoom]]) -> None:
+        try:
+            async for page in pages:
+                self.data_rooms.extend(page)
+                self._notify()
+        except Exception as e:
+            self.error = e
+        finally:
+            self._notify()
+
+    def _notify(self) -> None:
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+
+def _hash_access_token(access_token: str) -> str:
+    # Tokens are not kept in memory longer than the request that carries them
+    return hashlib.sha256(access_token.encode("utf-8")).hexdigest()
+
+
+def _to_ansarada_data_room(data_room: dict) -> DataRoom:
+    return DataRoom(
+        id=f"{DataRoomSource.ANSARADA.value}_{data_room['id']}",
+        name=data_room["displayName"],
+        created_at=datetime.now(),
+        updated_at=datetime.now(),
+        source=DataRoomSource.ANSARADA,
+        status=EntityStatus.ACTIVE,
+        root_folder_id="",
+        client_id=None,
+        client_secret=None
+    )
@@ -0,0 +1,14 @@
+from core.infrastructure.repositories.document_search_repository import DocumentSearchRepository
+from core.models.document_search_hit import DocumentSearchHit
+from core.models.page import Page
+
+
+class DocumentSearchService:
+    def __init__(self, document_search_repository: DocumentSearchRepository):
+        self.document_search_repository = document_search_repository
+
+    async def search_data_room_documents_async(self, data_room_id: str, query: str, limit: int, cursor: str | None = None) -> Page[DocumentSearchHit]:
+        return await self.document_search_repository.search_data_room_documents_async(data_room_id, query, limit, cursor)
+
+    async def search_project_documents_async(self, project_id: str, query: str, limit: int, cursor: str | None = None) -> Page[DocumentSearchHit]:
+        return await self.document_search_repository.search_project_documents_async(project_id, query, limit, cursor)
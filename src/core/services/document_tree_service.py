@@ -1,18 +1,390 @@
+import asyncio
+import time
+from functools import partial
+from typing import AsyncIterator, Awaitable, Callable
+from core.exceptions import ConflictError, InvalidRequestError
+from core.infrastructure.database.unit_of_work import after_commit_async, commit_unit_of_work_async, has_consistent_snapshot
 from core.infrastructure.repositories.document_tree_repository import DocumentTreeRepository
+from core.infrastructure.storage.blob_store import BlobStore
+from core.models.cache_stats import CacheStats
 from core.models.folder import Folder, FolderIn
 from core.models.document import Document, DocumentIn
 from core.models.document_tree import DocumentTree
+from core.models.document_tree_import import DocumentTreeImportIn, DocumentTreeImportNodeIn, DocumentTreeImportOut
+from core.models.document_tree_node import DocumentTreeNode
+from core.models.document_upload import DocumentUpload, DocumentUploadIn
+from core.models.folder_child import FolderChild
+from core.models.page import Page
+from core.models.path_node import PathNode
+from core.utils.ids import CANONICAL_UUID_PATTERN, normalize_uuid
+from core.utils.lru_cache import LruCache
+
+# (data_room_id, revision, include_content, max_depth, root_folder_id)
+DocumentTreeCacheKey = tuple[str, int, bool, int | None, str | None]
+
+# Longer bodies are only searchable by their beginning
+MAX_SEARCH_TEXT_LENGTH = 100_000
+
+# Bounds the recursive walk of a path lookup
+MAX_PATH_DEPTH = 256
+
+# About what a node takes serialized besides its name and content: ids, timestamps, status, and its id in
+# the child list of its parent
+TREE_NODE_SIZE_BYTES = 450
+
+# A request appending to an upload renews its lease while the body arrives; completing holds one long enough
+# to hash and copy the staged bytes
+UPLOAD_LEASE_SECONDS = 60
+UPLOAD_LEASE_RENEWAL_SECONDS = 20
+UPLOAD_COMPLETE_LEASE_SECONDS = 600
 
 
 class DocumentTreeService:
-    def __init__(self, document_tree_repository: DocumentTreeRepository):
+    def __init__(
+            self,
+            document_tree_repository: DocumentTreeRepository,
+            blob_store: BlobStore,
+            tree_cache: LruCache[DocumentTreeCacheKey, DocumentTree] | None = None
+        ):
         self.document_tree_repository = document_tree_repository
+        self.blob_store = blob_store
+        self.tree_cache = tree_cache or LruCache(max_entries=256, max_bytes=64 * 1024 * 1024)
 
     async def create_folder_async(self, folder: FolderIn) -> Folder | None:
-        return await self.document_tree_repository.create_folder_async(folder)
+        created = await self.document_tree_repository.create_folder_async(folder)
+        await self._evict_cached_trees_async(folder.data_room_id)
+        return created
 
     async def create_document_async(self, document: DocumentIn) -> Document | None:
-        return await self.document_tree_repository.create_document_async(document)
+        # Blobs are shared across documents, so one left behind by a failed insert is harmless
+        content = document.content.encode("utf-8")
+        content_hash = await self.blob_store.put_async(content)
+
+        search_text = _to_search_text(document.content, document.content_type)
+        created = await self.document_tree_repository.create_document_async(document, content_hash, len(content), search_text)
+        await self._evict_cached_trees_async(document.data_room_id)
+        return created
+
+    async def create_document_upload_async(self, upload: DocumentUploadIn) -> DocumentUpload | None:
+        return await self.document_tree_repository.create_document_upload_async(upload)
+
+    async def get_document_upload_async(self, data_room_id: str, upload_id: str) -> DocumentUpload | None:
+        upload = await self.document_tree_repository.get_document_upload_async(data_room_id, upload_id)
+        if upload is not None and upload.document_id is None:
+            upload.offset = await self.blob_store.get_upload_size_async(upload.id)
+        return upload
+
+    async def append_document_upload_async(
+            self,
+            data_room_id: str,
+            upload_id: str,
+            offset: int,
+            chunks: AsyncIterator[bytes]
+        ) -> DocumentUpload | None:
+        upload = await self.document_tree_repository.get_document_upload_async(data_room_id, upload_id)
+        if upload is None:
+            return None
+        if upload.document_id is not None:
+            raise ConflictError("The upload has already been completed.")
+
+        lease_id = await self.document_tree_repository.acquire_document_upload_lease_async(data_room_id, upload.id, UPLOAD_LEASE_SECONDS)
+        if lease_id is None:
+            raise ConflictError("The upload is already receiving data or being completed.")
+
+        # Do not hold a connection for as long as the client takes to send the body
+        await commit_unit_of_work_async()
+        try:
+            renew_async = partial(self.document_tree_repository.renew_document_upload_lease_async, upload.id, lease_id, UPLOAD_LEASE_SECONDS)
+            chunks = _limit_chunks(_renew_lease_chunks(chunks, renew_async), offset, upload.size)
+            upload.offset = await self.blob_store.append_upload_async(upload.id, offset, chunks)
+        finally:
+            await self.document_tree_repository.release_document_upload_lease_async(upload.id, lease_id)
+        return upload
+
+    async def complete_document_upload_async(self, data_room_id: str, upload_id: str) -> Document | None:
+        upload = await self.document_tree_repository.get_document_upload_async(data_room_id, upload_id)
+        if upload is None:
+            return None
+        if upload.document_id is not None:
+            raise ConflictError("The upload has already been completed.")
+
+        lease_id = await self.document_tree_repository.acquire_document_upload_lease_async(data_room_id, upload.id, UPLOAD_COMPLETE_LEASE_SECONDS)
+        if lease_id is None:
+            raise ConflictError("The upload is still receiving data or already being completed.")
+
+        # Other workers have to see the lease before the staged bytes are hashed, or they could still append to them
+        await commit_unit_of_work_async()
+        try:
+            offset = await self.blob_store.get_upload_size_async(upload.id)
+            if upload.size is not None and offset != upload.size:
+                raise InvalidRequestError(f"The upload has {offset} of {upload.size} bytes.")
+
+            content_hash, content_size = await self.blob_store.commit_upload_async(upload.id)
+            search_text = await self._read_search_text_async(content_hash, content_size, upload.content_type)
+            document = await self.document_tree_repository.complete_document_upload_async(
+                data_room_id, upload.id, lease_id, content_hash, content_size, search_text
+            )
+        finally:
+            await self.document_tree_repository.release_document_upload_lease_async(upload.id, lease_id)
+        if document is None:
+            raise ConflictError("The upload has already been completed.")
+
+        # The staged bytes are the only copy until the document row is durable
+        await after_commit_async(lambda: self.blob_store.delete_upload_async(upload.id))
+        await self._evict_cached_trees_async(data_room_id)
+        return document
+
+    async def delete_document_upload_async(self, data_room_id: str, upload_id: str) -> None:
+        if await self.document_tree_repository.delete_document_upload_async(data_room_id, upload_id):
+            await self.blob_store.delete_upload_async(upload_id)
+
+    async def import_document_tree_async(self, data_room_id: str, folder_id: str, tree_import: DocumentTreeImportIn) -> DocumentTreeImportOut | None:
+        folders, documents = _order_import_nodes(tree_import.nodes)
+
+        contents = [document.content.encode("utf-8") for document in documents]
+        content_hashes = await self.blob_store.put_many_async(contents)
+        documents_with_content = [
+            (document, content_hash, len(content), _to_search_text(document.content, document.content_type))
+            for document, content, content_hash in zip(documents, contents, content_hashes)
+        ]
+
+        result = await self.document_tree_repository.import_document_tree_async(data_room_id, folder_id, folders, documents_with_content)
+        if result is not None:
+            await self._evict_cached_trees_async(data_room_id)
+        return result
+
+    async def move_folder_async(self, data_room_id: str, folder_id: str, parent_folder_id: str) -> Folder | None:
+        moved = await self.document_tree_repository.move_folder_async(data_room_id, folder_id, parent_folder_id)
+        await self._evict_cached_trees_async(data_room_id)
+        return moved
+
+    async def resolve_path_async(self, data_room_id: str, path: str) -> PathNode | None:
+        """Resolve a path such as "/Legal/Contracts/NDA.pdf", relative to the root folder of the data room."""
+        names = [name for name in path.split("/") if name]
+        if len(names) > MAX_PATH_DEPTH:
+            raise InvalidRequestError(f"A path can have at most {MAX_PATH_DEPTH} segments.")
+        return await self.document_tree_repository.resolve_path_async(data_room_id, names)
+
+    async def get_folder_breadcrumbs_async(self, data_room_id: str, folder_id: str) -> list[PathNode] | None:
+        return await self.document_tree_repository.get_folder_breadcrumbs_async(data_room_id, folder_id)
+
+    async def get_document_breadcrumbs_async(self, data_room_id: str, document_id: str) -> list[PathNode] | None:
+        return await self.document_tree_repository.get_document_breadcrumbs_async(data_room_id, document_id)
+
+    async def get_document_tree_async(
+            self,
+            data_room_id: str,
+            include_content: bool = False,
+            max_depth: int | None = None,
+            root_folder_id: str | None = None
+        ) -> DocumentTree | None:
+        if root_folder_id is not None:
+            root_folder_id = normalize_uuid(root_folder_id)
+
+        # Keyed on what the database says rather than on the writes this process saw, since a lagging
+        # replica can serve the tree from before a write long after it committed
+        revision = await self.document_tree_repository.get_data_room_revision_async(data_room_id)
+        if revision is None:
+            return None
+
+        key = (data_room_id, revision, include_content, max_depth, root_folder_id)
+        tree = self.tree_cache.get(key)
+        if tree is not None:
+            return tree
+
+        tree = await self.document_tree_repository.get_document_tree_async(data_room_id, include_content, max_depth, root_folder_id)
+        if tree is not None and include_content:
+            await self._load_tree_content_async(tree)
+
+        # Only a tree read in the same snapshot as the revision is known to be the tree of that revision
+        if tree is not None and has_consistent_snapshot():
+            self.tree_cache.set(key, tree, _estimate_tree_size(tree))
+
+        return tree
+
+    def stream_document_tree_async(
+            self,
+            data_room_id: str,
+            include_content: bool = False,
+            max_depth: int | None = None,
+            root_folder_id: str | None = None
+        ) -> AsyncIterator[DocumentTreeNode]:
+        # Checked before the first node is pulled, since by then the response has started
+        if root_folder_id is not None:
+            root_folder_id = normalize_uuid(root_folder_id)
+        return self._stream_document_tree_async(data_room_id, include_content, max_depth, root_folder_id)
+
+    async def _stream_document_tree_async(
+            self,
+            data_room_id: str,
+            include_content: bool,
+            max_depth: int | None,
+            root_folder_id: str | None
+        ) -> AsyncIterator[DocumentTreeNode]:
+        nodes = self.document_tree_repository.stream_document_tree_async(data_room_id, include_content, max_depth, root_folder_id)
+        async for node in nodes:
+            if include_content and node.content is None and node.content_hash is not None:
+                node.content = await self._read_text_content_async(node.content_hash, node.content_type)
+            yield node
+
+    async def get_document_async(self, data_room_id: str, document_id: str) -> Document | None:
+        return await self.document_tree_repository.get_document_async(data_room_id, document_id)
+
+    async def get_document_content_size_async(self, document: Document) -> int | None:
+        """The size of the document body in bytes, None if its blob is missing."""
+        if document.content_hash is None:
+            return len((document.content or "").encode("utf-8"))
+        return await self.blob_store.get_size_async(document.content_hash)
+
+    async def read_document_content_async(self, document: Document, start: int, end: int) -> AsyncIterator[bytes]:
+        """Yield the bytes in [start, end) of the document body."""
+        if document.content_hash is None:
+            # Written before the blob store existed
+            yield (document.content or "").encode("utf-8")[start:end]
+            return
+
+        async for chunk in self.blob_store.read_range_async(document.content_hash, start, end):
+            yield chunk
+
+    async def get_folder_children_async(self, data_room_id: str, folder_id: str, limit: int, cursor: str | None = None) -> Page[FolderChild]:
+        return await self.document_tree_repository.get_folder_children_async(data_room_id, folder_id, limit, cursor)
+
+    def get_tree_cache_stats(self) -> CacheStats:
+        return self.tree_cache.stats()
+
+    async def invalidate_data_room_async(self, data_room_id: str) -> None:
+        """Drop the cached trees of a data room that was written to outside of this service."""
+        await self._evict_cached_trees_async(data_room_id)
+
+    async def _evict_cached_trees_async(self, data_room_id: str) -> None:
+        # Cached trees are keyed on their revision, this only frees the memory of superseded ones early
+        def evict() -> None:
+            self.tree_cache.remove_where(lambda key: key[0] == data_room_id)
+
+        await after_commit_async(evict)
+
+    async def _load_tree_content_async(self, tree: DocumentTree) -> None:
+        documents: list[Document] = []
+        stack = [tree]
+        while stack:
+            node = stack.pop()
+            if isinstance(node.data, Document):
+                if node.data.content is None and node.data.content_hash is not None:
+                    documents.append(node.data)
+            else:
+                stack.extend(node.children)
+
+        # Identical bodies are read once
+        content_keys = list({(d.content_hash, d.content_type) for d in documents})
+        contents = await asyncio.gather(*(self._read_text_content_async(*key) for key in content_keys))
+        content_by_key = dict(zip(content_keys, contents))
+
+        for document in documents:
+            document.content = content_by_key[(document.content_hash, document.content_type)]
+
+    async def _read_search_text_async(self, content_hash: str, content_size: int, content_type: str | None) -> str | None:
+        if not _is_text(content_type):
+            return None
+
+        # Enough bytes for the longest search text, however wide its characters
+        end = min(content_size, MAX_SEARCH_TEXT_LENGTH * 4)
+        chunks = [chunk async for chunk in self.blob_store.read_range_async(content_hash, 0, end)]
+        return _to_search_text(b"".join(chunks).decode("utf-8", errors="ignore"), content_type)
+
+    async def _read_text_content_async(self, content_hash: str, content_type: str | None) -> str | None:
+        # Binary bodies are only served through the content endpoint
+        if not _is_text(content_type):
+            return None
+
+        content = await self.blob_store.read_async(content_hash)
+        return content.decode("utf-8", errors="replace") if content is not None else None
+
+
+def _is_text(content_type: str | None) -> bool:
+    return content_type is None or content_type.startswith("text/")
+
+
+def _to_search_text(content: str, content_type: str | None) -> str | None:
+    if not _is_text(content_type):
+        return None
+
+    # Postgres text cannot hold NUL characters
+    return content[:MAX_SEARCH_TEXT_LENGTH].replace("\x00", "")
+
+
+def _order_import_nodes(nodes: list[DocumentTreeImportNodeIn]) -> tuple[list[DocumentTreeImportNodeIn], list[DocumentTreeImportNodeIn]]:
+    """Validate an import manifest and return its folders parents-first, and its documents."""
+    children_by_parent: dict[str | None, list[DocumentTreeImportNodeIn]] = {}
+    folder_ids = set()
+    seen_ids = set()
+
+    for node in nodes:
+        if not CANONICAL_UUID_PATTERN.match(node.id):
+            node.id = normalize_uuid(node.id)
+        if node.parent_folder_id is not None and not CANONICAL_UUID_PATTERN.match(node.parent_folder_id):
+            node.parent_folder_id = normalize_uuid(node.parent_folder_id)
+        if node.id in seen_ids:
+            raise InvalidRequestError(f"Node '{node.id}' appears more than once.")
+        seen_ids.add(node.id)
+
+        if node.type == "Folder":
+            folder_ids.add(node.id)
+        children_by_parent.setdefault(node.parent_folder_id, []).append(node)
+
+    for parent_folder_id in children_by_parent:
+        if parent_folder_id is not None and parent_folder_id not in folder_ids:
+            raise InvalidRequestError(f"Parent '{parent_folder_id}' is not a folder of the import.")
+
+    # Breadth-first from the top-level nodes; folders never reached are part of a cycle
+    folders = []
+    documents = []
+    parent_folder_ids: list[str | None] = [None]
+    while parent_folder_ids:
+        next_parent_folder_ids = []
+        for parent_folder_id in parent_folder_ids:
+            for node in children_by_parent.get(parent_folder_id, []):
+                if node.type == "Folder":
+                    folders.append(node)
+                    next_parent_folder_ids.append(node.id)
+                else:
+                    documents.append(node)
+        parent_folder_ids = next_parent_folder_ids
+
+    if len(folders) != len(folder_ids):
+        raise InvalidRequestError("The import contains a folder cycle.")
+
+    return folders, documents
+
+
+async def _renew_lease_chunks(chunks: AsyncIterator[bytes], renew_async: Callable[[], Awaitable[bool]]) -> AsyncIterator[bytes]:
+    """Pass chunks through, renewing the upload lease before a chunk once it is due and failing if it was lost."""
+    renewed_at = time.monotonic()
+    async for chunk in chunks:
+        if time.monotonic() - renewed_at >= UPLOAD_LEASE_RENEWAL_SECONDS:
+            # A client that stalled past the lease may have been taken over by another request meanwhile
+            if not await renew_async():
+                raise ConflictError("The upload is being written by another request.")
+            renewed_at = time.monotonic()
+        yield chunk
+
+
+async def _limit_chunks(chunks: AsyncIterator[bytes], offset: int, size: int | None) -> AsyncIterator[bytes]:
+    """Pass chunks through, failing before the upload would grow past its declared size."""
+    async for chunk in chunks:
+        offset += len(chunk)
+        if size is not None and offset > size:
+            raise InvalidRequestError(f"The upload would exceed its declared size of {size} bytes.")
+        yield chunk
+
 
-    async def get_document_tree_async(self, data_room_id: str) -> DocumentTree | None:
-        return await self.document_tree_repository.get_document_tree_async(data_room_id)
+def _estimate_tree_size(tree: DocumentTree) -> int:
+    """Approximate serialized size of a tree, for the cache budget, without serializing it."""
+    size = 0
+    stack = [tree]
+    while stack:
+        node = stack.pop()
+        size += TREE_NODE_SIZE_BYTES + len(node.data.name)
+        if isinstance(node.data, Document) and node.data.content is not None:
+            size += len(node.data.content)
+        stack.extend(node.children)
+    return size
@@ -1,7 +1,11 @@
 from core.infrastructure.repositories.project_repository import ProjectRepository
-from core.models.data_room import DataRoom
-from core.models.project import Project, ProjectIn, ProjectUserOut
-from core.models.user_project import UserProjectIn
+from core.models.page import Page
+from core.models.project import Project, ProjectIn
+from core.models.project_expansion import ProjectExpansion
+from core.models.user_project import ProjectUserRoleIn, UserProjectIn
+from core.models.batch_item_result import BatchItemResult
+from core.exceptions import InvalidRequestError
+from core.utils.ids import normalize_uuid
 
 class ProjectService:
     def __init__(self, project_repository: ProjectRepository):
@@ -22,11 +26,39 @@ class ProjectService:
     async def remove_user_from_project_async(self, user_id: str, project_id: str) -> None:
         await self.project_repository.remove_user_from_project_async(user_id, project_id)
 
-    async def get_project_by_id_async(self, project_id: str) -> Project | None:
-        return await self.project_repository.get_project_by_id_async(project_id)
+    async def add_users_to_project_async(self, project_id: str, project_users: list[ProjectUserRoleIn]) -> list[BatchItemResult]:
+        for project_user in project_users:
+            project_user.user_id = normalize_uuid(project_user.user_id)
+        _ensure_unique_ids([project_user.user_id for project_user in project_users])
+        return await self.project_repository.add_users_to_project_async(normalize_uuid(project_id), project_users)
+
+    async def remove_users_from_project_async(self, project_id: str, user_ids: list[str]) -> list[BatchItemResult]:
+        user_ids = _ensure_unique_ids([normalize_uuid(user_id) for user_id in user_ids])
+        return await self.project_repository.remove_users_from_project_async(normalize_uuid(project_id), user_ids)
+
+    async def link_data_rooms_to_project_async(self, project_id: str, data_room_ids: list[str]) -> list[BatchItemResult]:
+        data_room_ids = _ensure_unique_ids([normalize_uuid(data_room_id) for data_room_id in data_room_ids])
+        return await self.project_repository.link_data_rooms_to_project_async(normalize_uuid(project_id), data_room_ids)
+
+    async def unlink_data_rooms_from_project_async(self, project_id: str, data_room_ids: list[str]) -> list[BatchItemResult]:
+        data_room_ids = _ensure_unique_ids([normalize_uuid(data_room_id) for data_room_id in data_room_ids])
+        return await self.project_repository.unlink_data_rooms_from_project_async(normalize_uuid(project_id), data_room_ids)
+
+    async def get_project_by_id_async(self, project_id: str, expand: set[ProjectExpansion] | None = None) -> Project | None:
+        return await self.project_repository.get_project_by_id_async(project_id, expand)
     
-    async def get_project_data_rooms_async(self, project_id: str) -> list[DataRoom]:
-        return await self.project_repository.get_project_data_rooms_async(project_id)
+    async def get_project_data_room_rows_async(self, project_id: str, limit: int, cursor: str | None = None) -> Page[dict]:
+        return await self.project_repository.get_project_data_room_rows_async(project_id, limit, cursor)
+
+    async def get_project_user_rows_async(self, project_id: str, limit: int, cursor: str | None = None) -> Page[dict]:
+        return await self.project_repository.get_project_user_rows_async(project_id, limit, cursor)
+
+    async def get_project_revision_async(self, project_id: str) -> int | None:
+        return await self.project_repository.get_project_revision_async(project_id)
+
 
-    async def get_project_users_async(self, project_id: str) -> list[ProjectUserOut]:
-        return await self.project_repository.get_project_users_async(project_id)
\ No newline at end of file
+def _ensure_unique_ids(ids: list[str]) -> list[str]:
+    # One statement cannot touch the same row twice
+    if len(set(ids)) != len(ids):
+        raise InvalidRequestError("Each id can only appear once in a batch.")
+    return ids
@@ -1,5 +1,6 @@
 from core.infrastructure.repositories.user_repository import UserRepository
-from core.models.user import User, UserAccessibleProjectOut, UserIn
+from core.models.page import Page
+from core.models.user import User, UserIn
 
 class UserService:
     def __init__(self, user_repository: UserRepository):
@@ -11,5 +12,5 @@ class UserService:
     async def get_user_async(self, user_id: str) -> User | None:
         return await self.user_repository.get_user_async(user_id)
 
-    async def get_user_accessible_projects_async(self, user_id: str) -> list[UserAccessibleProjectOut]:
-        return await self.user_repository.get_user_accessible_projects_async(user_id)
+    async def get_user_accessible_project_rows_async(self, user_id: str, limit: int, cursor: str | None = None) -> Page[dict]:
+        return await self.user_repository.get_user_accessible_project_rows_async(user_id, limit, cursor)
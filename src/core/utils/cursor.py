@@ -0,0 +1,65 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any
+
+from core.exceptions import InvalidRequestError
+from core.models.page import Page
+from core.utils.ids import normalize_uuid
+
+# Extra columns a keyset query selects for the cursor; stripped from the returned items
+CURSOR_CREATED_AT_COLUMN = "cursor_created_at"
+CURSOR_ID_COLUMN = "cursor_id"
+
+
+class InvalidCursorError(InvalidRequestError):
+    pass
+
+
+def encode_cursor(values: list[Any]) -> str:
+    """Encode the sort key of the last returned row into an opaque pagination cursor."""
+    payload = json.dumps(values, separators=(",", ":"), default=str).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, length: int) -> list[Any]:
+    """Decode a cursor produced by encode_cursor, checking it carries `length` values."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (binascii.Error, ValueError) as e:
+        raise InvalidCursorError("Malformed pagination cursor.") from e
+
+    if not isinstance(values, list) or len(values) != length:
+        raise InvalidCursorError("Malformed pagination cursor.")
+
+    return values
+
+
+def decode_created_at_cursor(cursor: str) -> tuple[datetime, str]:
+    """Decode a cursor produced by to_created_at_page into the (created_at, id) to continue after."""
+    after_created_at, after_id = decode_cursor(cursor, 2)
+    try:
+        return datetime.fromisoformat(after_created_at), normalize_uuid(after_id)
+    except (TypeError, ValueError, InvalidRequestError) as e:
+        raise InvalidCursorError("Malformed pagination cursor.") from e
+
+
+def to_created_at_page(rows: list[dict], limit: int) -> Page[dict]:
+    """
+    Turn up to `limit + 1` rows ordered by (created_at, id) into a page of `limit` rows.
+
+    The rows carry their sort key in the cursor columns, which are moved into the next cursor.
+    """
+    next_cursor = None
+    if len(rows) > limit:
+        last = rows[limit - 1]
+        next_cursor = encode_cursor([last[CURSOR_CREATED_AT_COLUMN].isoformat(), str(last[CURSOR_ID_COLUMN])])
+
+    items = rows[:limit]
+    for row in items:
+        del row[CURSOR_CREATED_AT_COLUMN], row[CURSOR_ID_COLUMN]
+
+    # The rows are already shaped by the query
+    return Page[dict].model_construct(items=items, next_cursor=next_cursor)
@@ -6,4 +6,7 @@ def get_required_env(var_name: str) -> str:
     if value is None:
         raise EnvironmentError(f"Required environment variable '{var_name}' is not set.")
     
-    return value
\ No newline at end of file
+    return value
+
+def get_optional_env(var_name: str, default: str) -> str:
+    return os.getenv(var_name, default)
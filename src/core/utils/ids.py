@@ -0,0 +1,17 @@
+import re
+import uuid
+
+from core.exceptions import InvalidRequestError
+
+# Lowercase hyphenated ids, the form Postgres returns; anything else is parsed and normalized
+CANONICAL_UUID_PATTERN = re.compile(r"^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$")
+
+
+def normalize_uuid(value: str) -> str:
+    if CANONICAL_UUID_PATTERN.match(value):
+        return value
+
+    try:
+        return str(uuid.UUID(value))
+    except ValueError:
+        raise InvalidRequestError(f"'{value}' is not a valid UUID.")
\ No newline at end of file
@@ -0,0 +1,34 @@
+from contextvars import ContextVar, Token
+
+
+class RequestTiming:
+    """Wall time of one request, accumulated per phase, e.g. waiting for a connection or running SQL."""
+
+    def __init__(self):
+        self.phases: dict[str, float] = {}
+
+    def add(self, phase: str, seconds: float) -> None:
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+
+_current_request_timing: ContextVar[RequestTiming | None] = ContextVar("current_request_timing", default=None)
+
+
+def begin_request_timing() -> tuple[RequestTiming, Token]:
+    request_timing = RequestTiming()
+    return request_timing, _current_request_timing.set(request_timing)
+
+
+def end_request_timing(token: Token) -> None:
+    _current_request_timing.reset(token)
+
+
+def get_current_request_timing() -> RequestTiming | None:
+    return _current_request_timing.get()
+
+
+def record_phase(phase: str, seconds: float) -> None:
+    """Attribute `seconds` to `phase` of the current request; a no-op outside of one."""
+    request_timing = _current_request_timing.get()
+    if request_timing is not None:
+        request_timing.add(phase, seconds)
\ No newline at end of file
@@ -0,0 +1,39 @@
+from fastapi import Request, Response, status
+
+
+def make_etag(entity_id: str, revision: int) -> str:
+    return f'"{entity_id}.{revision}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Evaluate If-None-Match with the weak comparison RFC 9110 prescribes for it."""
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+
+    if if_none_match.strip() == "*":
+        return True
+
+    candidates = (candidate.strip().removeprefix("W/") for candidate in if_none_match.split(","))
+    return etag in candidates
+
+
+def not_modified_response(etag: str) -> Response:
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+
+def apply_etag(request: Request, response: Response, etag: str | None) -> Response | None:
+    """
+    Conditional GET against `etag`, the current version of the resource, None when it does not exist.
+
+    Returns the 304 response when the client already holds that version. Otherwise sets the ETag on `response`,
+    the response FastAPI gives the route, and returns None; routes returning a Response of their own pass it
+    `headers=response.headers`.
+    """
+    if etag is None:
+        return None
+    if etag_matches(request, etag):
+        return not_modified_response(etag)
+
+    response.headers["ETag"] = etag
+    return None
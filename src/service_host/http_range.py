@@ -0,0 +1,49 @@
+from fastapi import Request
+
+
+class RangeNotSatisfiableError(Exception):
+    pass
+
+
+def parse_range(request: Request, size: int, etag: str) -> tuple[int, int] | None:
+    """
+    Resolve the Range header against a body of `size` bytes into a [start, end) slice.
+
+    Returns None when the whole body should be sent: no Range, a stale If-Range, several ranges,
+    or a header that does not parse, all of which RFC 9110 allows a server to ignore.
+    """
+    range_header = request.headers.get("range")
+    if not range_header:
+        return None
+
+    if_range = request.headers.get("if-range")
+    if if_range is not None and if_range.strip() != etag:
+        return None
+
+    unit, _, range_set = range_header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in range_set:
+        return None
+
+    first, separator, last = range_set.strip().partition("-")
+    if not separator:
+        return None
+
+    try:
+        if first:
+            start = int(first)
+            end = int(last) + 1 if last else size
+            if last and end <= start:
+                return None
+        else:
+            # bytes=-N is the last N bytes
+            suffix_length = int(last)
+            if suffix_length <= 0:
+                raise RangeNotSatisfiableError()
+            start, end = max(size - suffix_length, 0), size
+    except ValueError:
+        return None
+
+    if start >= size:
+        raise RangeNotSatisfiableError()
+
+    return start, min(end, size)
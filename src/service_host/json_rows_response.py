@@ -0,0 +1,18 @@
+from typing import Any
+from fastapi import Response
+from pydantic_core import to_json
+
+
+class JSONRowsResponse(Response):
+    """
+    JSON response encoded straight from database rows, without building or validating models.
+
+    Opt-in for large lists: the query must already return rows, or a Page of rows, shaped like the
+    route's response_model, columns in field order and NULL only where the field is optional.
+    pydantic-core encodes datetimes, UUIDs and enums exactly as the validated path would.
+    """
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return to_json(content)
\ No newline at end of file
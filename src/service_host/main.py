@@ -1,5 +1,10 @@
-from fastapi import FastAPI, Body, status
+import asyncio
+import hashlib
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Body, Header, Query, Request, Response, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from dotenv import load_dotenv
 
 from core.infrastructure.proxies.ansarada.ansarada_api import AnsaradaApi
@@ -9,30 +14,109 @@ from core.infrastructure.repositories.data_room_repository import DataRoomReposi
 from core.infrastructure.repositories.project_repository import ProjectRepository
 from core.infrastructure.repositories.user_repository import UserRepository
 from core.infrastructure.repositories.document_tree_repository import DocumentTreeRepository
+from core.infrastructure.repositories.ansarada_sync_repository import AnsaradaSyncRepository
+from core.infrastructure.repositories.document_search_repository import DocumentSearchRepository
+from core.infrastructure.storage.local_file_blob_store import LocalFileBlobStore
 
 from core.services.project_service import ProjectService
 from core.services.data_room_service import DataRoomService
 from core.services.user_service import UserService
 from core.services.document_tree_service import DocumentTreeService
+from core.services.ansarada_sync_service import AnsaradaSyncService
+from core.services.document_search_service import DocumentSearchService
 
 from core.models.data_room import DataRoom, DataRoomIn
 from core.models.project import Project, ProjectIn, ProjectUserOut
 from core.models.user import User, UserAccessibleProjectOut, UserIn
-from core.models.user_project import UserProjectIn
+from core.models.user_project import ProjectUserRoleIn, UserProjectIn
 from core.models.user_role import UserRole
-from core.models.document import Document, DocumentIn
+from core.models.document import DEFAULT_CONTENT_TYPE, Document, DocumentIn
+from core.models.document_upload import DocumentUpload, DocumentUploadIn
 from core.models.folder import Folder, FolderIn
 from core.models.document_tree import DocumentTree
+from core.models.document_tree_import import DocumentTreeImportIn, DocumentTreeImportOut
+from core.models.folder_child import FolderChild
+from core.models.page import Page
+from core.models.project_expansion import ProjectExpansion
+from core.models.cache_stats import CacheStats
+from core.models.batch_item_result import BatchItemResult
+from core.models.ansarada_sync import AnsaradaSyncResult
+from core.models.document_search_hit import DocumentSearchHit
+from core.models.path_node import PathNode
+
+from core.exceptions import ConflictError, InvalidRequestError
+from core.utils.env import get_optional_env
+from core.utils.lru_cache import LruCache
+
+from service_host.etag import apply_etag, make_etag
+from service_host.http_range import RangeNotSatisfiableError, parse_range
+from service_host.json_rows_response import JSONRowsResponse
+from service_host.server_timing_middleware import ServerTimingMiddleware, TimedRoute
+from service_host.unit_of_work_middleware import UnitOfWorkMiddleware
 
 load_dotenv()
 
 database_client = DatabaseClient()
-data_room_service = DataRoomService(DataRoomRepository(database_client), AnsaradaApi())
+ansarada_api = AnsaradaApi(
+    base_url=get_optional_env("ANSARADA_GRAPHQL_URL", AnsaradaApi.BASE_URL),
+    token_url=get_optional_env("ANSARADA_TOKEN_URL", "") or None,
+    max_connections=int(get_optional_env("ANSARADA_MAX_CONNECTIONS", "100")),
+    max_connections_per_host=int(get_optional_env("ANSARADA_MAX_CONNECTIONS_PER_HOST", "20")),
+    keepalive_seconds=float(get_optional_env("ANSARADA_KEEPALIVE_SECONDS", "30")),
+    timeout_seconds=int(get_optional_env("ANSARADA_TIMEOUT_SECONDS", "30")),
+)
+data_room_service = DataRoomService(
+    DataRoomRepository(database_client),
+    ansarada_api,
+    LruCache(
+        max_entries=int(get_optional_env("ANSARADA_DATA_ROOMS_CACHE_MAX_ENTRIES", "1024")),
+        max_bytes=int(get_optional_env("ANSARADA_DATA_ROOMS_CACHE_MAX_BYTES", str(32 * 1024 * 1024))),
+        ttl_seconds=float(get_optional_env("ANSARADA_DATA_ROOMS_CACHE_TTL_SECONDS", "60")),
+    ),
+    ansarada_page_size=int(get_optional_env("ANSARADA_PAGE_SIZE", "100")),
+)
 project_service = ProjectService(ProjectRepository(database_client))
-document_tree_service = DocumentTreeService(DocumentTreeRepository(database_client))
+document_tree_service = DocumentTreeService(
+    DocumentTreeRepository(database_client),
+    LocalFileBlobStore(get_optional_env("BLOB_STORAGE_PATH", "data/blobs")),
+    LruCache(
+        max_entries=int(get_optional_env("DOCUMENT_TREE_CACHE_MAX_ENTRIES", "256")),
+        max_bytes=int(get_optional_env("DOCUMENT_TREE_CACHE_MAX_BYTES", str(64 * 1024 * 1024))),
+    ),
+)
 user_service = UserService(UserRepository(database_client))
+document_search_service = DocumentSearchService(DocumentSearchRepository(database_client))
+ansarada_sync_service = AnsaradaSyncService(
+    AnsaradaSyncRepository(database_client),
+    ansarada_api,
+    document_tree_service,
+    page_size=int(get_optional_env("ANSARADA_PAGE_SIZE", "100")),
+    max_concurrent_requests=int(get_optional_env("ANSARADA_SYNC_MAX_CONCURRENT_REQUESTS", "4")),
+)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await ansarada_api.start_async()
 
-app = FastAPI()
+    # Off unless an interval is set
+    sync_interval_seconds = float(get_optional_env("ANSARADA_SYNC_INTERVAL_SECONDS", "0"))
+    sync_task = asyncio.create_task(ansarada_sync_service.run_periodically_async(sync_interval_seconds)) if sync_interval_seconds > 0 else None
+    try:
+        yield
+    finally:
+        if sync_task is not None:
+            sync_task.cancel()
+            await asyncio.gather(sync_task, return_exceptions=True)
+        await ansarada_api.close_async()
+
+app = FastAPI(lifespan=lifespan)
+app.router.route_class = TimedRoute
+
+app.add_middleware(
+    UnitOfWorkMiddleware,
+    database_client=database_client,
+    read_your_writes_seconds=float(get_optional_env("DATABASE_READ_YOUR_WRITES_SECONDS", "5")),
+)
 
 # CORS
 origins = [
@@ -47,11 +131,67 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Outermost, so the commit that precedes every response is timed too
+app.add_middleware(
+    ServerTimingMiddleware,
+    log_sample_rate=float(get_optional_env("SERVER_TIMING_LOG_SAMPLE_RATE", "0")),
+)
+
+@app.exception_handler(InvalidRequestError)
+async def invalid_request_error_handler(request: Request, exc: InvalidRequestError) -> JSONResponse:
+    return JSONResponse(status_code=status.HTTP_400_BAD_REQUEST, content={"detail": str(exc)})
+
+@app.exception_handler(ConflictError)
+async def conflict_error_handler(request: Request, exc: ConflictError) -> JSONResponse:
+    return JSONResponse(status_code=status.HTTP_409_CONFLICT, content={"detail": str(exc)})
+
+# The revision is the first read of the request and is read in its snapshot. That also gives the request its
+# connection, which keeps the body's lookups out of shared batches, so body and ETag come from the same snapshot.
+async def get_project_etag_async(project_id: str) -> str | None:
+    revision = await project_service.get_project_revision_async(project_id)
+    return make_etag(project_id, revision) if revision is not None else None
+
+async def get_data_room_etag_async(data_room_id: str) -> str | None:
+    revision = await data_room_service.get_data_room_revision_async(data_room_id)
+    return make_etag(data_room_id, revision) if revision is not None else None
+
 # Projects
 @app.post("/projects")
 async def create_project_async(project: ProjectIn) -> Project:
     return await project_service.create_project_async(project)
 
+# Batches run as one statement each and report a result per item, in request order.
+# Declared before the single-item routes so that 'batch' is not taken for an id.
+MAX_BATCH_SIZE = 1000
+
+@app.post("/projects/{project_id}/users/batch")
+async def add_users_to_project_async(
+        project_id: str,
+        users: list[ProjectUserRoleIn] = Body(..., embed=True, max_length=MAX_BATCH_SIZE),
+    ) -> list[BatchItemResult]:
+    return await project_service.add_users_to_project_async(project_id, users)
+
+@app.post("/projects/{project_id}/users/batch-remove")
+async def remove_users_from_project_async(
+        project_id: str,
+        user_ids: list[str] = Body(..., embed=True, max_length=MAX_BATCH_SIZE),
+    ) -> list[BatchItemResult]:
+    return await project_service.remove_users_from_project_async(project_id, user_ids)
+
+@app.post("/projects/{project_id}/data-rooms/batch")
+async def link_data_rooms_to_project_async(
+        project_id: str,
+        data_room_ids: list[str] = Body(..., embed=True, max_length=MAX_BATCH_SIZE),
+    ) -> list[BatchItemResult]:
+    return await project_service.link_data_rooms_to_project_async(project_id, data_room_ids)
+
+@app.post("/projects/{project_id}/data-rooms/batch-remove")
+async def unlink_data_rooms_from_project_async(
+        project_id: str,
+        data_room_ids: list[str] = Body(..., embed=True, max_length=MAX_BATCH_SIZE),
+    ) -> list[BatchItemResult]:
+    return await project_service.unlink_data_rooms_from_project_async(project_id, data_room_ids)
+
 @app.post("/projects/{project_id}/data-rooms/{data_room_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def link_data_room_to_project_async(project_id: str, data_room_id: str) -> None:
     return await project_service.link_data_room_to_project_async(data_room_id, project_id)
@@ -69,17 +209,46 @@ async def add_user_to_project_async(project_id: str, user_id: str, user_role: Us
 async def remove_user_from_project_async(project_id: str, user_id: str) -> None:
     await project_service.remove_user_from_project_async(user_id, project_id)
 
-@app.get("/projects/{project_id}")
-async def get_project_by_id_async(project_id: str) -> Project | None:
-    return await project_service.get_project_by_id_async(project_id)
+# Unexpanded aggregates are left out of the response rather than sent as null
+@app.get("/projects/{project_id}", response_model_exclude_unset=True)
+async def get_project_by_id_async(
+        request: Request,
+        response: Response,
+        project_id: str,
+        expand: list[ProjectExpansion] = Query(default=[]),
+    ) -> Project | None:
+    not_modified = apply_etag(request, response, await get_project_etag_async(project_id))
+    if not_modified is not None:
+        return not_modified
+    return await project_service.get_project_by_id_async(project_id, set(expand))
 
-@app.get("/projects/{project_id}/data-rooms")
-async def get_project_data_rooms_async(project_id: str) -> list[DataRoom]:
-    return await project_service.get_project_data_rooms_async(project_id)
+@app.get("/projects/{project_id}/data-rooms", response_model=Page[DataRoom])
+async def get_project_data_rooms_async(
+        request: Request,
+        response: Response,
+        project_id: str,
+        limit: int = Query(default=50, ge=1, le=500),
+        cursor: str | None = None,
+    ) -> Response:
+    not_modified = apply_etag(request, response, await get_project_etag_async(project_id))
+    if not_modified is not None:
+        return not_modified
+    page = await project_service.get_project_data_room_rows_async(project_id, limit, cursor)
+    return JSONRowsResponse(page, headers=response.headers)
 
-@app.get("/projects/{project_id}/users")
-async def get_project_users_async(project_id: str) -> list[ProjectUserOut]:
-    return await project_service.get_project_users_async(project_id)
+@app.get("/projects/{project_id}/users", response_model=Page[ProjectUserOut])
+async def get_project_users_async(
+        request: Request,
+        response: Response,
+        project_id: str,
+        limit: int = Query(default=50, ge=1, le=500),
+        cursor: str | None = None,
+    ) -> Response:
+    not_modified = apply_etag(request, response, await get_project_etag_async(project_id))
+    if not_modified is not None:
+        return not_modified
+    page = await project_service.get_project_user_rows_async(project_id, limit, cursor)
+    return JSONRowsResponse(page, headers=response.headers)
 
 
 # Data Rooms
@@ -87,14 +256,36 @@ async def get_project_users_async(project_id: str) -> list[ProjectUserOut]:
 async def create_data_room_with_root_folder_async(data_room: DataRoomIn) -> DataRoom:
     return await data_room_service.create_data_room_with_root_folder_async(data_room)
 
+# All or nothing, in one statement
+@app.post("/data-rooms/batch")
+async def create_data_rooms_with_root_folders_async(
+        data_rooms: list[DataRoomIn] = Body(..., embed=True, max_length=MAX_BATCH_SIZE),
+    ) -> list[DataRoom]:
+    return await data_room_service.create_data_rooms_with_root_folders_async(data_rooms)
+
 @app.get("/data-rooms/{data_room_id}")
-async def get_data_room_by_id_async(data_room_id: str) -> DataRoom | None:
+async def get_data_room_by_id_async(request: Request, response: Response, data_room_id: str) -> DataRoom | None:
+    not_modified = apply_etag(request, response, await get_data_room_etag_async(data_room_id))
+    if not_modified is not None:
+        return not_modified
     return await data_room_service.get_data_room_by_id_async(data_room_id)
 
+@app.post("/data-rooms/{data_room_id}/ansarada-sync")
+async def sync_ansarada_data_room_async(data_room_id: str) -> AnsaradaSyncResult | None:
+    return await ansarada_sync_service.sync_data_room_async(data_room_id)
+
+# All of the token's data rooms unless `first` caps them, as it did when only one page was fetched
 @app.get("/ansarada/data-rooms")
-async def get_ansarada_data_rooms_async(access_token: str, first: int = 10) -> list[DataRoom]:
+async def get_ansarada_data_rooms_async(access_token: str, first: int | None = Query(default=None, ge=1)) -> list[DataRoom]:
     return await data_room_service.get_ansarada_data_rooms_async(access_token, first)
 
+@app.get("/ansarada/data-rooms/stream")
+async def stream_ansarada_data_rooms_async(access_token: str, first: int | None = Query(default=None, ge=1)) -> StreamingResponse:
+    # One JSON object per line, written as each page arrives from Ansarada
+    data_rooms = data_room_service.stream_ansarada_data_rooms_async(access_token, first)
+    lines = (data_room.model_dump_json() + "\n" async for data_room in data_rooms)
+    return StreamingResponse(lines, media_type="application/x-ndjson")
+
 
 # Users
 @app.post("/users")
@@ -105,9 +296,13 @@ async def create_user_async(user: UserIn) -> User | None:
 async def get_user_by_id_async(user_id: str) -> User | None:
     return await user_service.get_user_async(user_id)
 
-@app.get("/users/{user_id}/projects")
-async def get_user_accessible_projects_async(user_id: str) -> list[UserAccessibleProjectOut]:
-    return await user_service.get_user_accessible_projects_async(user_id)
+@app.get("/users/{user_id}/projects", response_model=Page[UserAccessibleProjectOut])
+async def get_user_accessible_projects_async(
+        user_id: str,
+        limit: int = Query(default=50, ge=1, le=500),
+        cursor: str | None = None,
+    ) -> Response:
+    return JSONRowsResponse(await user_service.get_user_accessible_project_rows_async(user_id, limit, cursor))
 
 
 # Document Trees
@@ -120,16 +315,181 @@ async def create_folder_async(
     folder = FolderIn(name=name, data_room_id=data_room_id, parent_folder_id=parent_folder_id)
     return await document_tree_service.create_folder_async(folder)
 
+@app.post("/data-rooms/{data_room_id}/folders/{folder_id}/move")
+async def move_folder_async(
+        data_room_id: str,
+        folder_id: str,
+        parent_folder_id: str = Body(..., embed=True)
+    ) -> Folder | None:
+    return await document_tree_service.move_folder_async(data_room_id, folder_id, parent_folder_id)
+
+@app.post("/data-rooms/{data_room_id}/folders/{folder_id}/import")
+async def import_document_tree_async(data_room_id: str, folder_id: str, tree_import: DocumentTreeImportIn) -> DocumentTreeImportOut | None:
+    return await document_tree_service.import_document_tree_async(data_room_id, folder_id, tree_import)
+
 @app.post("/data-rooms/{data_room_id}/folders/{folder_id}/documents")
 async def create_document_async(
         data_room_id: str,
         folder_id: str,
         name: str = Body(..., embed=True),
         content: str = Body(..., embed=True),
+        content_type: str = Body(DEFAULT_CONTENT_TYPE, embed=True),
     ) -> Document | None:
-    document = DocumentIn(name=name, data_room_id=data_room_id, content=content, folder_id=folder_id)
+    document = DocumentIn(name=name, data_room_id=data_room_id, content=content, folder_id=folder_id, content_type=content_type)
     return await document_tree_service.create_document_async(document)
 
+# Resumable uploads: create a session, send the body in one or more PATCH requests, then complete it
+@app.post("/data-rooms/{data_room_id}/folders/{folder_id}/uploads")
+async def create_document_upload_async(
+        data_room_id: str,
+        folder_id: str,
+        name: str = Body(..., embed=True),
+        content_type: str = Body(DEFAULT_CONTENT_TYPE, embed=True),
+        size: int | None = Body(None, embed=True, ge=0),
+    ) -> DocumentUpload | None:
+    upload = DocumentUploadIn(name=name, data_room_id=data_room_id, folder_id=folder_id, content_type=content_type, size=size)
+    return await document_tree_service.create_document_upload_async(upload)
+
+@app.get("/data-rooms/{data_room_id}/uploads/{upload_id}")
+async def get_document_upload_async(data_room_id: str, upload_id: str) -> DocumentUpload | None:
+    return await document_tree_service.get_document_upload_async(data_room_id, upload_id)
+
+@app.patch("/data-rooms/{data_room_id}/uploads/{upload_id}")
+async def append_document_upload_async(
+        request: Request,
+        data_room_id: str,
+        upload_id: str,
+        upload_offset: int = Header(..., ge=0),
+    ) -> DocumentUpload | None:
+    # The raw body is written as it arrives, never buffered whole
+    return await document_tree_service.append_document_upload_async(data_room_id, upload_id, upload_offset, request.stream())
+
+@app.post("/data-rooms/{data_room_id}/uploads/{upload_id}/complete")
+async def complete_document_upload_async(data_room_id: str, upload_id: str) -> Document | None:
+    return await document_tree_service.complete_document_upload_async(data_room_id, upload_id)
+
+@app.delete("/data-rooms/{data_room_id}/uploads/{upload_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_document_upload_async(data_room_id: str, upload_id: str) -> None:
+    await document_tree_service.delete_document_upload_async(data_room_id, upload_id)
+
+@app.get("/data-rooms/{data_room_id}/documents/{document_id}/content", response_model=None)
+async def get_document_content_async(request: Request, response: Response, data_room_id: str, document_id: str) -> Response:
+    document = await document_tree_service.get_document_async(data_room_id, document_id)
+    if document is None:
+        return Response(status_code=status.HTTP_404_NOT_FOUND)
+
+    # Checked before the status line is sent, a body missing from the blob store could not fail the response later
+    size = await document_tree_service.get_document_content_size_async(document)
+    if size is None:
+        return Response(status_code=status.HTTP_404_NOT_FOUND)
+
+    # The body never changes under its hash, so it doubles as a strong validator
+    content_hash = document.content_hash or hashlib.sha256((document.content or "").encode("utf-8")).hexdigest()
+    etag = f'"{content_hash}"'
+    not_modified = apply_etag(request, response, etag)
+    if not_modified is not None:
+        return not_modified
+
+    headers = {**response.headers, "Accept-Ranges": "bytes"}
+    try:
+        byte_range = parse_range(request, size, etag)
+    except RangeNotSatisfiableError:
+        return Response(status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE, headers={**headers, "Content-Range": f"bytes */{size}"})
+
+    start, end = byte_range or (0, size)
+    headers["Content-Length"] = str(end - start)
+    if byte_range is not None:
+        headers["Content-Range"] = f"bytes {start}-{end - 1}/{size}"
+
+    return StreamingResponse(
+        document_tree_service.read_document_content_async(document, start, end),
+        status_code=status.HTTP_206_PARTIAL_CONTENT if byte_range is not None else status.HTTP_200_OK,
+        media_type=document.content_type or DEFAULT_CONTENT_TYPE,
+        headers=headers,
+    )
+
 @app.get("/data-rooms/{data_room_id}/document-tree")
-async def get_document_tree_async(data_room_id: str) -> DocumentTree | None:
-    return await document_tree_service.get_document_tree_async(data_room_id)
\ No newline at end of file
+async def get_document_tree_async(
+        request: Request,
+        response: Response,
+        data_room_id: str,
+        include_content: bool = False,
+        max_depth: int | None = Query(default=None, ge=0),
+        root_folder_id: str | None = None,
+    ) -> DocumentTree | None:
+    not_modified = apply_etag(request, response, await get_data_room_etag_async(data_room_id))
+    if not_modified is not None:
+        return not_modified
+    return await document_tree_service.get_document_tree_async(data_room_id, include_content, max_depth, root_folder_id)
+
+@app.get("/data-rooms/{data_room_id}/document-tree/stream")
+async def stream_document_tree_async(
+        request: Request,
+        response: Response,
+        data_room_id: str,
+        include_content: bool = False,
+        max_depth: int | None = Query(default=None, ge=0),
+        root_folder_id: str | None = None,
+    ) -> StreamingResponse:
+    not_modified = apply_etag(request, response, await get_data_room_etag_async(data_room_id))
+    if not_modified is not None:
+        return not_modified
+
+    # One JSON object per line; folders arrive parents-first, then documents
+    nodes = document_tree_service.stream_document_tree_async(data_room_id, include_content, max_depth, root_folder_id)
+    lines = (node.model_dump_json() + "\n" async for node in nodes)
+    return StreamingResponse(lines, media_type="application/x-ndjson", headers=response.headers)
+
+@app.get("/data-rooms/{data_room_id}/folders/{folder_id}/children")
+async def get_folder_children_async(
+        request: Request,
+        response: Response,
+        data_room_id: str,
+        folder_id: str,
+        limit: int = Query(default=50, ge=1, le=500),
+        cursor: str | None = None,
+    ) -> Page[FolderChild]:
+    not_modified = apply_etag(request, response, await get_data_room_etag_async(data_room_id))
+    if not_modified is not None:
+        return not_modified
+    return await document_tree_service.get_folder_children_async(data_room_id, folder_id, limit, cursor)
+
+@app.get("/data-rooms/{data_room_id}/resolve")
+async def resolve_path_async(data_room_id: str, path: str = Query(..., max_length=4096)) -> PathNode | None:
+    return await document_tree_service.resolve_path_async(data_room_id, path)
+
+@app.get("/data-rooms/{data_room_id}/folders/{folder_id}/breadcrumbs")
+async def get_folder_breadcrumbs_async(data_room_id: str, folder_id: str) -> list[PathNode] | None:
+    return await document_tree_service.get_folder_breadcrumbs_async(data_room_id, folder_id)
+
+@app.get("/data-rooms/{data_room_id}/documents/{document_id}/breadcrumbs")
+async def get_document_breadcrumbs_async(data_room_id: str, document_id: str) -> list[PathNode] | None:
+    return await document_tree_service.get_document_breadcrumbs_async(data_room_id, document_id)
+
+@app.get("/data-rooms/{data_room_id}/search")
+async def search_data_room_documents_async(
+        data_room_id: str,
+        q: str = Query(..., min_length=1, max_length=256),
+        limit: int = Query(default=20, ge=1, le=100),
+        cursor: str | None = None,
+    ) -> Page[DocumentSearchHit]:
+    return await document_search_service.search_data_room_documents_async(data_room_id, q, limit, cursor)
+
+@app.get("/projects/{project_id}/search")
+async def search_project_documents_async(
+        project_id: str,
+        q: str = Query(..., min_length=1, max_length=256),
+        limit: int = Query(default=20, ge=1, le=100),
+        cursor: str | None = None,
+    ) -> Page[DocumentSearchHit]:
+    return await document_search_service.search_project_documents_async(project_id, q, limit, cursor)
+
+@app.get("/document-trees/cache-stats")
+async def get_document_tree_cache_stats_async() -> CacheStats:
+    return document_tree_service.get_tree_cache_stats()
+
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics_async() -> PlainTextResponse:
+    query_metrics = database_client.query_metrics
+    content = query_metrics.render_prometheus() if query_metrics is not None else ""
+    return PlainTextResponse(content, media_type="text/plain; version=0.0.4")
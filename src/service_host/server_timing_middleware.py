@@ -0,0 +1,114 @@
+import functools
+import json
+import logging
+import random
+import time
+from typing import Any, Callable, Coroutine
+from fastapi import Request, Response
+from fastapi.routing import APIRoute
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from core.utils.request_timing import begin_request_timing, end_request_timing, get_current_request_timing
+
+logger = logging.getLogger(__name__)
+
+# Reported in this order; "app" covers e.g. building models from rows
+PHASE_DESCRIPTIONS = {
+    "pool": "Connection checkout",
+    "db": "SQL",
+    "app": "Endpoint excluding SQL",
+    "serialize": "Request parsing and response serialization",
+    "total": "Until the response started",
+}
+
+
+class ServerTimingMiddleware:
+    """
+    Report where each request spent its time in a `Server-Timing` response header, visible in browser devtools.
+
+    Phases are measured up to the start of the response, so the body of a streamed response is not included.
+    A `log_sample_rate` share of requests is also logged as one JSON line.
+    """
+
+    def __init__(self, app: ASGIApp, log_sample_rate: float = 0):
+        self.app = app
+        self.log_sample_rate = log_sample_rate
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started_at = time.perf_counter()
+        request_timing, token = begin_request_timing()
+
+        async def send_with_timing(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                phases = {phase: request_timing.phases[phase] for phase in PHASE_DESCRIPTIONS if phase in request_timing.phases}
+                phases["total"] = time.perf_counter() - started_at
+                headers = MutableHeaders(scope=message)
+                headers.append("Server-Timing", ", ".join(
+                    f'{phase};desc="{PHASE_DESCRIPTIONS[phase]}";dur={seconds * 1000:.2f}' for phase, seconds in phases.items()
+                ))
+
+                if self.log_sample_rate > 0 and random.random() < self.log_sample_rate:
+                    route = scope.get("route")
+                    logger.info(json.dumps({
+                        "method": scope["method"],
+                        "path": route.path if route is not None else scope["path"],
+                        "status": message["status"],
+                        **{f"{phase}_ms": round(seconds * 1000, 2) for phase, seconds in phases.items()},
+                    }))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            end_request_timing(token)
+
+
+class TimedRoute(APIRoute):
+    """Route that separates the endpoint's own time from parsing the request and serializing the response."""
+
+    def __init__(self, path: str, endpoint: Callable[..., Any], **kwargs: Any):
+        super().__init__(path, _time_endpoint(endpoint), **kwargs)
+
+    def get_route_handler(self) -> Callable[[Request], Coroutine[Any, Any, Response]]:
+        route_handler = super().get_route_handler()
+
+        async def timed_route_handler(request: Request) -> Response:
+            request_timing = get_current_request_timing()
+            if request_timing is None:
+                return await route_handler(request)
+
+            started_at = time.perf_counter()
+            endpoint_seconds_before = request_timing.phases.get("endpoint", 0)
+            try:
+                return await route_handler(request)
+            finally:
+                endpoint_seconds = request_timing.phases.get("endpoint", 0) - endpoint_seconds_before
+                request_timing.add("serialize", time.perf_counter() - started_at - endpoint_seconds)
+
+        return timed_route_handler
+
+
+def _time_endpoint(endpoint: Callable[..., Any]) -> Callable[..., Any]:
+    # FastAPI reads the parameters and the response model through __wrapped__
+    @functools.wraps(endpoint)
+    async def timed_endpoint(*args: Any, **kwargs: Any) -> Any:
+        request_timing = get_current_request_timing()
+        if request_timing is None:
+            return await endpoint(*args, **kwargs)
+
+        started_at = time.perf_counter()
+        sql_seconds_before = request_timing.phases.get("pool", 0) + request_timing.phases.get("db", 0)
+        try:
+            return await endpoint(*args, **kwargs)
+        finally:
+            seconds = time.perf_counter() - started_at
+            sql_seconds = request_timing.phases.get("pool", 0) + request_timing.phases.get("db", 0) - sql_seconds_before
+            request_timing.add("endpoint", seconds)
+            request_timing.add("app", max(seconds - sql_seconds, 0))
+
+    return timed_endpoint
\ No newline at end of file
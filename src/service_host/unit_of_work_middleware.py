@@ -0,0 +1,74 @@
+import time
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from core.infrastructure.database.database_client import DatabaseClient
+
+READ_ONLY_METHODS = {"GET", "HEAD", "OPTIONS"}
+CLIENT_ID_HEADER = b"x-client-id"
+
+
+class UnitOfWorkMiddleware:
+    """
+    Run each HTTP request in one unit of work: a single connection and transaction for every repository call.
+
+    The transaction is committed just before the response starts, so a client never sees a response for a
+    write that is not durable yet. Error responses roll back. Safe methods use a read-only transaction,
+    served by a read replica unless the same client wrote within the last `read_your_writes_seconds`.
+    """
+
+    def __init__(self, app: ASGIApp, database_client: DatabaseClient, read_your_writes_seconds: float = 5):
+        self.app = app
+        self.database_client = database_client
+        self.recent_writers = RecentWriters(read_your_writes_seconds)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        read_only = scope["method"] in READ_ONLY_METHODS
+        client_key = _get_client_key(scope)
+        use_replica = read_only and not self.recent_writers.has_written(client_key)
+
+        async with self.database_client.unit_of_work_async(read_only, use_replica) as unit_of_work:
+            if not read_only:
+                unit_of_work.after_commit(lambda: self.recent_writers.mark(client_key))
+
+            async def send_after_commit(message: Message) -> None:
+                if message["type"] == "http.response.start":
+                    if message["status"] < 400:
+                        await unit_of_work.commit_async()
+                    else:
+                        await unit_of_work.rollback_async()
+                await send(message)
+
+            await self.app(scope, receive, send_after_commit)
+
+
+class RecentWriters:
+    """Clients that committed a write recently, so their reads can wait out replication lag on the primary."""
+
+    def __init__(self, window_seconds: float):
+        self.window_seconds = window_seconds
+        self._written_until: dict[str, float] = {}
+        self._next_prune_at = 0.0
+
+    def mark(self, client_key: str) -> None:
+        now = time.monotonic()
+        self._written_until[client_key] = now + self.window_seconds
+        if now >= self._next_prune_at:
+            self._written_until = {key: until for key, until in self._written_until.items() if until > now}
+            self._next_prune_at = now + self.window_seconds
+
+    def has_written(self, client_key: str) -> bool:
+        return self._written_until.get(client_key, 0) > time.monotonic()
+
+
+def _get_client_key(scope: Scope) -> str:
+    # Clients behind a shared proxy can identify themselves explicitly
+    for name, value in scope["headers"]:
+        if name == CLIENT_ID_HEADER:
+            return value.decode("latin-1")
+
+    client = scope.get("client")
+    return client[0] if client else ""
\ No newline at end of file
@@ -0,0 +1,250 @@
+import hashlib
+import json
+import os
+import uuid
+from pathlib import Path
+
+import pytest
+from aiohttp import web
+
+from ansarada_graphql_stub import DEFAULT_DOCUMENT_INDEX_PATH, make_app
+from core.infrastructure.database.database_client import DatabaseClient
+from core.infrastructure.proxies.ansarada.ansarada_api import AnsaradaApi
+from core.infrastructure.repositories.ansarada_sync_repository import AnsaradaSyncRepository
+from core.infrastructure.repositories.data_room_repository import DataRoomRepository
+from core.infrastructure.repositories.document_tree_repository import DocumentTreeRepository
+from core.infrastructure.storage.local_file_blob_store import LocalFileBlobStore
+from core.models.ansarada_sync import AnsaradaIndexItem
+from core.models.data_room import DataRoomIn
+from core.models.data_room_source import DataRoomSource
+from core.models.entity_status import EntityStatus
+from core.services.ansarada_sync_service import AnsaradaSyncService, _make_sibling_names_unique
+from core.services.document_tree_service import DocumentTreeService
+
+
+def make_item(external_id: str, name: str, parent_external_id: str | None = None, type: str = "Document") -> AnsaradaIndexItem:
+    return AnsaradaIndexItem(
+        external_id=external_id, type=type, name=name, status=EntityStatus.ACTIVE,
+        parent_external_id=parent_external_id, sync_hash=hashlib.sha256(external_id.encode()).hexdigest(),
+    )
+
+
+def test_sibling_names_are_made_unique_by_id():
+    first = make_item("d-2", "Minutes.pdf", "f-1")
+    second = make_item("d-1", "Minutes.pdf", "f-1")
+    elsewhere = make_item("d-3", "Minutes.pdf", "f-2")
+    folder = make_item("f-3", "Minutes", "f-1", type="Folder")
+    other_folder = make_item("f-4", "Minutes", "f-1", type="Folder")
+    sync_hash = first.sync_hash
+
+    _make_sibling_names_unique([first, second, elsewhere])
+    _make_sibling_names_unique([other_folder, folder])
+
+    assert (second.name, first.name, elsewhere.name) == ("Minutes.pdf", "Minutes (d-2).pdf", "Minutes.pdf")
+    assert (folder.name, other_folder.name) == ("Minutes", "Minutes (f-4)")
+    assert first.sync_hash != sync_hash
+
+
+def test_disabled_items_keep_their_names():
+    active = make_item("d-2", "Minutes.pdf")
+    disabled = make_item("d-1", "Minutes.pdf")
+    disabled.status = EntityStatus.DISABLED
+
+    _make_sibling_names_unique([active, disabled])
+
+    assert (active.name, disabled.name) == ("Minutes.pdf", "Minutes.pdf")
+
+
+def test_renamed_duplicate_is_truncated_to_the_column_size():
+    items = [make_item("d-1", "x" * 250 + ".pdf"), make_item("d-2", "x" * 250 + ".pdf")]
+
+    _make_sibling_names_unique(items)
+
+    assert len(items[1].name) == 255
+    assert items[1].name.endswith(" (d-2).pdf")
+
+
+# The sync against the stub writes to a migrated database, only run when one is configured
+requires_database = pytest.mark.skipif(not os.getenv("DATABASE_URL"), reason="DATABASE_URL is not set")
+
+
+class SyncFixture:
+    def __init__(self, sync_service: AnsaradaSyncService, database_client: DatabaseClient, index_path: Path, external_id: str, data_room_id: str):
+        self.sync_service = sync_service
+        self.database_client = database_client
+        self.index_path = index_path
+        self.external_id = external_id
+        self.data_room_id = data_room_id
+
+    @property
+    def items(self) -> list[dict]:
+        return json.loads(self.index_path.read_text())[self.external_id]
+
+    @items.setter
+    def items(self, items: list[dict]) -> None:
+        # Read again by the stub on every request
+        self.index_path.write_text(json.dumps({self.external_id: items}))
+
+    def update(self, external_id: str, **fields) -> None:
+        self.items = [{**item, **fields} if item["id"] == external_id else item for item in self.items]
+
+    async def sync_async(self):
+        return await self.sync_service.sync_data_room_async(self.data_room_id)
+
+    async def get_mirror_async(self) -> dict[str, tuple[str, str | None, str]]:
+        """external id -> (name, external id of the parent, status) of every mirrored row"""
+        sql = '''
+            SELECT f.external_id, f.name, p.external_id AS parent_external_id, f.status
+            FROM folders f LEFT JOIN folders p ON p.id = f.parent_folder_id
+            WHERE f.data_room_id = :data_room_id AND f.external_id IS NOT NULL
+            UNION ALL
+            SELECT d.external_id, d.name, p.external_id, d.status
+            FROM documents d LEFT JOIN folders p ON p.id = d.folder_id
+            WHERE d.data_room_id = :data_room_id AND d.external_id IS NOT NULL
+        '''
+        rows = await self.database_client.execute_sql_async(sql, {"data_room_id": self.data_room_id}, read_only=True)
+        return {row["external_id"]: (row["name"], row["parent_external_id"], row["status"]) for row in rows}
+
+
+def to_mirror(items: list[dict]) -> dict[str, tuple[str, str | None, str]]:
+    return {
+        item["id"]: (item["name"], item["parentId"], "active" if item["status"] == "ENABLED" else "disabled")
+        for item in items
+    }
+
+
+@pytest.fixture
+async def sync(tmp_path):
+    # The recorded index under an id of this test's own
+    external_id = f"dr-{uuid.uuid4()}"
+    index_path = tmp_path / "document_index.json"
+    index_path.write_text(json.dumps({external_id: json.loads(DEFAULT_DOCUMENT_INDEX_PATH.read_text())["dr-1001"]}))
+
+    runner = web.AppRunner(make_app(0, 0, index_path))
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    stub_url = f"http://127.0.0.1:{runner.addresses[0][1]}"
+
+    database_client = DatabaseClient()
+    ansarada_api = AnsaradaApi(base_url=f"{stub_url}/v1/graphql", token_url=f"{stub_url}/connect/token")
+    await ansarada_api.start_async()
+    document_tree_service = DocumentTreeService(DocumentTreeRepository(database_client), LocalFileBlobStore(str(tmp_path / "blobs")))
+    # Small pages and batches, so that the walk pages through every level
+    sync_service = AnsaradaSyncService(
+        AnsaradaSyncRepository(database_client), ansarada_api, document_tree_service, page_size=2, folder_batch_size=1
+    )
+    data_room = await DataRoomRepository(database_client).create_data_room_with_root_folder_async(DataRoomIn(
+        name=f"Ansarada {external_id}", source=DataRoomSource.ANSARADA,
+        client_id="client", client_secret="secret", external_id=external_id,
+    ))
+
+    try:
+        yield SyncFixture(sync_service, database_client, index_path, external_id, data_room.id)
+    finally:
+        await database_client.execute_sql_async("DELETE FROM data_rooms WHERE id = :id", {"id": data_room.id})
+        await database_client.engine.dispose()
+        await ansarada_api.close_async()
+        await runner.cleanup()
+
+
+@requires_database
+@pytest.mark.anyio
+async def test_sync_mirrors_the_whole_index(sync):
+    result = await sync.sync_async()
+
+    assert await sync.get_mirror_async() == to_mirror(sync.items)
+    assert (result.item_count, result.changed_count, result.deleted_count) == (12, 12, 0)
+
+
+@requires_database
+@pytest.mark.anyio
+async def test_unchanged_index_is_not_written(sync, monkeypatch):
+    await sync.sync_async()
+
+    async def apply_sync_async(*args):
+        raise AssertionError("An unchanged index was applied.")
+    monkeypatch.setattr(sync.sync_service.sync_repository, "apply_sync_async", apply_sync_async)
+    result = await sync.sync_async()
+
+    assert (result.changed_count, result.deleted_count) == (0, 0)
+
+
+@requires_database
+@pytest.mark.anyio
+async def test_only_changed_items_are_written(sync):
+    await sync.sync_async()
+    sync.update("d-121", lastModifiedDate="2026-10-01T08:00:00Z")
+    sync.update("f-110", hasChildren=True, name="Constitution and bylaws")
+
+    result = await sync.sync_async()
+
+    assert (result.changed_count, result.deleted_count) == (2, 0)
+    assert await sync.get_mirror_async() == to_mirror(sync.items)
+
+
+@requires_database
+@pytest.mark.anyio
+async def test_swapped_sibling_names_are_applied(sync):
+    await sync.sync_async()
+    sync.update("d-111", name="Shareholder register")
+    sync.update("d-112", name="Certificate of incorporation")
+    sync.update("f-110", name="Board minutes")
+    sync.update("f-120", name="Constitution")
+
+    result = await sync.sync_async()
+
+    assert result.changed_count == 4
+    assert await sync.get_mirror_async() == to_mirror(sync.items)
+
+
+@requires_database
+@pytest.mark.anyio
+async def test_name_can_move_to_another_item(sync):
+    await sync.sync_async()
+    # Written in index order, so d-201 takes the name before d-202 gives it up
+    sync.update("d-201", name="Management accounts")
+    sync.update("d-202", name="Management accounts FY26")
+
+    await sync.sync_async()
+
+    assert await sync.get_mirror_async() == to_mirror(sync.items)
+
+
+@requires_database
+@pytest.mark.anyio
+async def test_moved_item_is_reparented(sync):
+    await sync.sync_async()
+    sync.update("d-001", parentId="f-300")
+    sync.update("f-300", hasChildren=True)
+
+    await sync.sync_async()
+
+    assert (await sync.get_mirror_async())["d-001"] == ("Index", "f-300", "active")
+
+
+@requires_database
+@pytest.mark.anyio
+async def test_items_removed_from_the_index_are_deleted(sync):
+    await sync.sync_async()
+    # Corporate and everything below it, and a top-level document
+    removed_ids = {"f-100", "f-110", "d-111", "d-112", "f-120", "d-121", "d-122", "d-001"}
+    sync.items = [item for item in sync.items if item["id"] not in removed_ids]
+
+    result = await sync.sync_async()
+
+    assert await sync.get_mirror_async() == to_mirror(sync.items)
+    assert result.deleted_count == len(removed_ids)
+    assert result.changed_count == 0
+
+
+@requires_database
+@pytest.mark.anyio
+async def test_duplicate_sibling_names_are_mirrored_apart(sync):
+    sync.update("d-202", name="Audited accounts FY25")
+
+    await sync.sync_async()
+
+    mirror = await sync.get_mirror_async()
+    assert mirror["d-201"][0] == "Audited accounts FY25"
+    assert mirror["d-202"][0] == "Audited accounts FY25 (d-202)"
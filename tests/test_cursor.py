@@ -0,0 +1,62 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from core.utils.cursor import (
+    CURSOR_CREATED_AT_COLUMN,
+    CURSOR_ID_COLUMN,
+    InvalidCursorError,
+    decode_created_at_cursor,
+    decode_cursor,
+    encode_cursor,
+    to_created_at_page,
+)
+
+ID = "5d1f4c1e-0c8e-4f7a-9a51-7c3b0f6e2a10"
+
+
+def test_cursor_round_trips():
+    cursor = encode_cursor([1, "Board minutes", ID])
+
+    assert "=" not in cursor
+    assert decode_cursor(cursor, 3) == [1, "Board minutes", ID]
+
+
+@pytest.mark.parametrize("cursor", ["not base64!", encode_cursor([1, 2]), "eyJhIjoxfQ"])
+def test_malformed_cursor_is_rejected(cursor):
+    with pytest.raises(InvalidCursorError):
+        decode_cursor(cursor, 3)
+
+
+def test_created_at_cursor_round_trips():
+    created_at = datetime(2026, 9, 1, 9, 12, 44, tzinfo=timezone.utc)
+    cursor = encode_cursor([created_at.isoformat(), ID.upper()])
+
+    assert decode_created_at_cursor(cursor) == (created_at, ID)
+
+
+@pytest.mark.parametrize("values", [["yesterday", ID], ["2026-09-01T09:12:44+00:00", "not-a-uuid"]])
+def test_created_at_cursor_with_bad_values_is_rejected(values):
+    with pytest.raises(InvalidCursorError):
+        decode_created_at_cursor(encode_cursor(values))
+
+
+def test_created_at_page_continues_after_its_last_row():
+    rows = [
+        {"name": str(i), CURSOR_CREATED_AT_COLUMN: datetime(2026, 9, 1, i, tzinfo=timezone.utc), CURSOR_ID_COLUMN: f"{ID[:-1]}{i}"}
+        for i in range(3)
+    ]
+
+    page = to_created_at_page(rows, 2)
+
+    assert page.items == [{"name": "0"}, {"name": "1"}]
+    assert decode_created_at_cursor(page.next_cursor) == (datetime(2026, 9, 1, 1, tzinfo=timezone.utc), f"{ID[:-1]}1")
+
+
+def test_last_created_at_page_has_no_cursor():
+    rows = [{"name": "0", CURSOR_CREATED_AT_COLUMN: datetime(2026, 9, 1, tzinfo=timezone.utc), CURSOR_ID_COLUMN: ID}]
+
+    page = to_created_at_page(rows, 2)
+
+    assert page.items == [{"name": "0"}]
+    assert page.next_cursor is None
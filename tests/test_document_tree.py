@@ -0,0 +1,112 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from core.exceptions import InvalidRequestError
+from core.infrastructure.repositories.document_tree_repository import build_document_tree
+from core.models.document import Document
+from core.models.document_tree_import import DocumentTreeImportNodeIn
+from core.models.entity_status import EntityStatus
+from core.models.folder import Folder
+from core.services.document_tree_service import _order_import_nodes
+
+NOW = datetime(2026, 9, 1, tzinfo=timezone.utc)
+ROOT_ID = "00000000-0000-4000-8000-000000000000"
+
+
+def make_folder(id: str, name: str, parent_folder_id: str | None) -> Folder:
+    return Folder(
+        id=id, name=name, data_room_id="room", parent_folder_id=parent_folder_id, created_at=NOW, updated_at=NOW,
+        status=EntityStatus.ACTIVE, children_folder_ids=[], document_ids=[],
+    )
+
+
+def make_document(id: str, name: str) -> Document:
+    return Document(id=id, name=name, content=None, data_room_id="room", created_at=NOW, updated_at=NOW, status=EntityStatus.ACTIVE)
+
+
+def make_node(id: int, type: str, parent: int | None = None) -> DocumentTreeImportNodeIn:
+    return DocumentTreeImportNodeIn(
+        id=f"00000000-0000-4000-8000-{id:012d}",
+        type=type,
+        name=f"{type} {id}",
+        parent_folder_id=f"00000000-0000-4000-8000-{parent:012d}" if parent is not None else None,
+    )
+
+
+def names(tree) -> list:
+    return [(child.data.name, names(child)) for child in tree.children]
+
+
+def test_tree_lists_folders_then_documents_by_name():
+    root = make_folder(ROOT_ID, "Root", None)
+    folders = [
+        root,
+        make_folder("b", "Legal", ROOT_ID),
+        make_folder("a", "Corporate", ROOT_ID),
+        make_folder("c", "Contracts", "b"),
+    ]
+    documents = {ROOT_ID: [make_document("d2", "Index"), make_document("d1", "Agenda")], "c": [make_document("d3", "NDA.pdf")]}
+
+    tree = build_document_tree(root, folders, documents)
+
+    assert names(tree) == [
+        ("Corporate", []),
+        ("Legal", [("Contracts", [("NDA.pdf", [])])]),
+        ("Agenda", []),
+        ("Index", []),
+    ]
+    assert root.children_folder_ids == ["a", "b"]
+    assert root.document_ids == ["d1", "d2"]
+
+
+def test_tree_leaves_out_folders_outside_the_root():
+    root = make_folder("a", "Corporate", ROOT_ID)
+    folders = [make_folder(ROOT_ID, "Root", None), root, make_folder("b", "Legal", ROOT_ID), make_folder("c", "Minutes", "a")]
+
+    tree = build_document_tree(root, folders, {})
+
+    assert names(tree) == [("Minutes", [])]
+
+
+def test_deep_tree_does_not_recurse():
+    root = make_folder("0", "0", None)
+    folders = [root] + [make_folder(str(i), str(i), str(i - 1)) for i in range(1, 5000)]
+
+    tree = build_document_tree(root, folders, {})
+
+    depth = 0
+    while tree.children:
+        tree = tree.children[0]
+        depth += 1
+    assert depth == 4999
+
+
+def test_import_nodes_are_ordered_parents_first():
+    nodes = [make_node(4, "Document", 3), make_node(3, "Folder", 2), make_node(2, "Folder", 1), make_node(1, "Folder"), make_node(5, "Document")]
+
+    folders, documents = _order_import_nodes(nodes)
+
+    assert [folder.name for folder in folders] == ["Folder 1", "Folder 2", "Folder 3"]
+    assert sorted(document.name for document in documents) == ["Document 4", "Document 5"]
+
+
+def test_import_node_ids_are_normalized():
+    node = make_node(1, "Folder")
+    child = make_node(2, "Document", 1)
+    node.id = node.id.upper()
+
+    folders, documents = _order_import_nodes([node, child])
+
+    assert folders[0].id == child.parent_folder_id
+
+
+@pytest.mark.parametrize("nodes, message", [
+    ([make_node(1, "Folder"), make_node(1, "Document")], "more than once"),
+    ([make_node(2, "Document", 1)], "is not a folder of the import"),
+    ([make_node(1, "Document"), make_node(2, "Document", 1)], "is not a folder of the import"),
+    ([make_node(1, "Folder", 2), make_node(2, "Folder", 1)], "cycle"),
+])
+def test_invalid_import_is_rejected(nodes, message):
+    with pytest.raises(InvalidRequestError, match=message):
+        _order_import_nodes(nodes)
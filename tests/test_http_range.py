@@ -0,0 +1,42 @@
+import pytest
+from fastapi import Request
+
+from service_host.http_range import RangeNotSatisfiableError, parse_range
+
+ETAG = '"abc"'
+
+
+def make_request(**headers: str) -> Request:
+    raw_headers = [(name.replace("_", "-").encode(), value.encode()) for name, value in headers.items()]
+    return Request({"type": "http", "method": "GET", "headers": raw_headers})
+
+
+@pytest.mark.parametrize("range_header, expected", [
+    ("bytes=0-0", (0, 1)),
+    ("bytes=6-", (6, 11)),
+    ("bytes=6-100", (6, 11)),
+    ("bytes=-5", (6, 11)),
+    ("bytes=-50", (0, 11)),
+])
+def test_single_range_is_resolved(range_header, expected):
+    assert parse_range(make_request(range=range_header), 11, ETAG) == expected
+
+
+@pytest.mark.parametrize("range_header", ["bytes=0-1,4-5", "items=0-1", "bytes=5-2", "bytes=a-b", "bytes=5"])
+def test_unsupported_or_invalid_range_sends_the_whole_body(range_header):
+    assert parse_range(make_request(range=range_header), 11, ETAG) is None
+
+
+def test_no_range_sends_the_whole_body():
+    assert parse_range(make_request(), 11, ETAG) is None
+
+
+@pytest.mark.parametrize("range_header", ["bytes=11-", "bytes=-0"])
+def test_unsatisfiable_range_is_rejected(range_header):
+    with pytest.raises(RangeNotSatisfiableError):
+        parse_range(make_request(range=range_header), 11, ETAG)
+
+
+def test_range_applies_only_while_if_range_matches():
+    assert parse_range(make_request(range="bytes=0-1", if_range=ETAG), 11, ETAG) == (0, 2)
+    assert parse_range(make_request(range="bytes=0-1", if_range='"stale"'), 11, ETAG) is None
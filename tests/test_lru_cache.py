@@ -0,0 +1,80 @@
+from types import SimpleNamespace
+
+from core.utils import lru_cache
+from core.utils.lru_cache import LruCache
+
+
+def test_get_returns_what_was_set():
+    cache = LruCache(max_entries=2, max_bytes=100)
+    cache.set("a", 1, 10)
+
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_least_recently_used_entry_is_evicted_first():
+    cache = LruCache(max_entries=2, max_bytes=100)
+    cache.set("a", 1, 10)
+    cache.set("b", 2, 10)
+    cache.get("a")
+    cache.set("c", 3, 10)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.evictions == 1
+
+
+def test_entries_are_evicted_until_the_byte_budget_holds():
+    cache = LruCache(max_entries=10, max_bytes=100)
+    cache.set("a", 1, 40)
+    cache.set("b", 2, 40)
+    cache.set("c", 3, 40)
+
+    assert cache.get("a") is None
+    assert cache.stats().bytes == 80
+
+
+def test_value_larger_than_the_budget_is_not_cached():
+    cache = LruCache(max_entries=10, max_bytes=100)
+    cache.set("a", 1, 40)
+    cache.set("b", 2, 101)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+
+
+def test_replacing_a_key_releases_its_old_size():
+    cache = LruCache(max_entries=10, max_bytes=100)
+    cache.set("a", 1, 60)
+    cache.set("a", 2, 30)
+
+    assert cache.get("a") == 2
+    assert cache.stats().bytes == 30
+
+
+def test_expired_entries_are_misses(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(lru_cache, "time", SimpleNamespace(monotonic=lambda: now[0]))
+    cache = LruCache(max_entries=10, max_bytes=100, ttl_seconds=5)
+    cache.set("a", 1, 10)
+
+    now[0] += 4.9
+    assert cache.get("a") == 1
+    now[0] += 0.1
+    assert cache.get("a") is None
+    assert cache.stats().entries == 0
+
+
+def test_remove_where_drops_matching_keys():
+    cache = LruCache(max_entries=10, max_bytes=100)
+    cache.set(("room-1", 1), "x", 10)
+    cache.set(("room-1", 2), "y", 10)
+    cache.set(("room-2", 1), "z", 10)
+
+    cache.remove_where(lambda key: key[0] == "room-1")
+
+    assert cache.stats().entries == 1
+    assert cache.stats().bytes == 10
+    assert cache.get(("room-2", 1)) == "z"